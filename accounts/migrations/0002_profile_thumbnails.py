@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="profile_thumbnails",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
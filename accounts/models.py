@@ -53,6 +53,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     profile_picture = models.ImageField(
         upload_to="profiles/", blank=True, null=True
     )
+    # {"source": picture name, "sizes": {size: name}}, see tasks/thumbnails.py
+    profile_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)  
@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from projects.models import ProjectMembership
+from projects.roles import get_request_role
 
 
 class IsProjectOwner(permissions.BasePermission):
@@ -9,10 +9,7 @@ class IsProjectOwner(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # obj is a Project
-        membership = ProjectMembership.objects.filter(
-            project=obj, user=request.user, role="owner"
-        ).first()
-        return membership is not None
+        return get_request_role(request, obj) == "owner"
 
 
 class IsProjectMember(permissions.BasePermission):
@@ -21,6 +18,4 @@ class IsProjectMember(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return ProjectMembership.objects.filter(
-            project=obj, user=request.user
-        ).exists()
+        return get_request_role(request, obj) is not None
@@ -1,9 +1,12 @@
 # accounts/serializers.py
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from tasks import thumbnails
+
 User = get_user_model()
 
 
@@ -24,11 +27,24 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
+    profile_picture_thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ["id", "email", "name", "profile_picture", "date_joined"]
+        fields = ["id", "email", "name", "profile_picture", "profile_picture_thumbnails", "date_joined"]
         read_only_fields = ["id", "email", "date_joined"]
 
+    def get_profile_picture_thumbnails(self, obj):
+        """{size: url} once the current picture's thumbnails are rendered, else None."""
+        names = thumbnails.profile_thumbnails(obj)
+        if names is None:
+            return None
+        request = self.context.get("request")
+        urls = {size: default_storage.url(name) for size, name in names.items()}
+        if request is not None:
+            urls = {size: request.build_absolute_uri(url) for size, url in urls.items()}
+        return urls
+
 
 class TaskerTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
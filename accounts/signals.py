@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from tasks import thumbnails
+
+
+@receiver(post_save, sender=get_user_model())
+def render_profile_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw and instance.profile_picture and thumbnails.profile_thumbnails(instance) is None:
+        thumbnails.schedule(thumbnails.render_profile, instance.pk)
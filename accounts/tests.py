@@ -1,3 +1,51 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from tasks import thumbnails
+
+User = get_user_model()
+
+
+def picture(color="red"):
+    buffer = BytesIO()
+    Image.new("RGB", (600, 900), color).save(buffer, "JPEG")
+    return SimpleUploadedFile("me.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+@override_settings(THUMBNAILS={"WORKER": "command", "SIZES": {"small": 60, "medium": 300}})
+class ProfileThumbnailTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.user = User.objects.create_user(email="me@example.com", password="pass1234", name="Me")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_thumbnails_follow_the_current_picture(self):
+        response = self.client.patch("/api/auth/me/", {"profile_picture": picture()}, format="multipart")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIsNone(response.data["profile_picture_thumbnails"])
+
+        thumbnails.render_profile(self.user.pk)
+        self.user.refresh_from_db()  # the client is authenticated as this instance
+        urls = self.client.get("/api/auth/me/").data["profile_picture_thumbnails"]
+        self.assertEqual(set(urls), {"small", "medium"})
+        self.assertTrue(urls["small"].startswith("http://testserver/media/profiles/thumbnails/"))
+        with Image.open(default_storage.open(self.user.profile_thumbnails["sizes"]["medium"])) as image:
+            self.assertEqual(image.size, (200, 300))
+
+        # a new picture hides the old thumbnails until its own are rendered
+        self.client.patch("/api/auth/me/", {"profile_picture": picture("blue")}, format="multipart")
+        self.assertIsNone(self.client.get("/api/auth/me/").data["profile_picture_thumbnails"])
+        self.assertEqual(thumbnails.render_missing(), 1)
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.client.get("/api/auth/me/").data["profile_picture_thumbnails"], urls)
@@ -1,4 +1,5 @@
 # accounts/views.py
+from django.contrib.auth import get_user_model
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -10,6 +11,8 @@ from .serializers import (
     TaskerTokenObtainPairSerializer,
 )
 
+User = get_user_model()
+
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -43,6 +46,8 @@ class MeView(generics.RetrieveUpdateAPIView):
     """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # UpdateModelMixin.update() asks for it; the object is always request.user
+    queryset = User.objects.all()
 
     def get_object(self):
         return self.request.user
@@ -0,0 +1,90 @@
+from contextlib import nullcontext
+
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalObjectMixin:
+    """
+    ETag / Last-Modified support for RetrieveUpdateDestroy views whose model
+    has an `updated_at` timestamp.
+
+    GET answers 304 before anything is serialized when If-None-Match or
+    If-Modified-Since shows the client's copy is current. PATCH, PUT and
+    DELETE honour If-Match and answer 412 when the client's copy is stale;
+    the row stays locked from that check until the write commits, so two
+    requests sent with the same ETag cannot both succeed.
+    """
+
+    def get_etag(self, obj):
+        return f'"{obj.pk}-{obj.updated_at.timestamp():.6f}"'
+
+    def check_preconditions(self, request, obj):
+        return get_conditional_response(
+            request,
+            etag=self.get_etag(obj),
+            last_modified=int(obj.updated_at.timestamp()),
+        )
+
+    def has_write_preconditions(self, request):
+        return any(header in request.headers for header in ("If-Match", "If-Unmodified-Since"))
+
+    def write_transaction(self, request):
+        """Check and write in one transaction when the request makes the write conditional."""
+        return transaction.atomic() if self.has_write_preconditions(request) else nullcontext()
+
+    def check_write_preconditions(self, request, obj):
+        """
+        check_preconditions() for PATCH, PUT and DELETE. With If-Match or
+        If-Unmodified-Since, also locks the row for the rest of the
+        transaction, unless it changed after `obj` was read: a 412 as well.
+        """
+        response = self.check_preconditions(request, obj)
+        if response is None and self.has_write_preconditions(request):
+            unchanged = (
+                type(obj)._base_manager.select_for_update()
+                .filter(pk=obj.pk, updated_at=obj.updated_at)
+                .values_list("pk", flat=True)
+            )
+            if not list(unchanged):
+                response = Response(status=status.HTTP_412_PRECONDITION_FAILED)
+        return response
+
+    def set_validators(self, response, obj):
+        response["ETag"] = self.get_etag(obj)
+        response["Last-Modified"] = http_date(obj.updated_at.timestamp())
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        response = self.check_preconditions(request, instance)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, instance)
+
+    def update(self, request, *args, **kwargs):
+        with self.write_transaction(request):
+            instance = self.get_object()
+            response = self.check_write_preconditions(request, instance)
+            if response is not None:
+                return response
+
+            partial = kwargs.pop("partial", False)
+            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
+        if getattr(instance, "_prefetched_objects_cache", None):
+            instance._prefetched_objects_cache = {}
+        return self.set_validators(Response(serializer.data), instance)
+
+    def destroy(self, request, *args, **kwargs):
+        with self.write_transaction(request):
+            instance = self.get_object()
+            response = self.check_write_preconditions(request, instance)
+            if response is not None:
+                return response
+            self.perform_destroy(instance)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,191 @@
+"""
+Fast read path for list views.
+
+ModelSerializer builds every row from a model instance, field by field,
+and JSONRenderer then walks the result with the stdlib encoder. For long
+lists of flat objects most of that work repeats itself. FastListMixin
+instead reads .values() rows, turns them into dicts with a plan compiled
+once per serializer class, and encodes the page with orjson when it is
+installed.
+
+The bytes are the same as the regular path produces; the
+bench_list_rendering command and the tests compare the two. Only plain JSON
+GETs without ?fields= or ?expand= take this path, and only while
+settings.FAST_LIST_RENDERING is on.
+"""
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.http import HttpResponse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from .sparse import get_sparse_params
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder produces the same bytes, more slowly
+    orjson = None
+
+# Fields whose to_representation() returns a .values() column unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+# Fields whose to_representation() only needs the column value.
+CONVERTED_FIELDS = (
+    serializers.DateField,
+    serializers.DateTimeField,
+    serializers.DecimalField,
+    serializers.DurationField,
+    serializers.FloatField,
+    serializers.TimeField,
+    serializers.UUIDField,
+)
+
+
+def dumps(data):
+    """
+    Encode `data` exactly like JSONRenderer with the default settings
+    (compact, unicode, strict). `data` must hold only dicts, lists, strings,
+    integers, booleans and None, as CompiledSerializer produces.
+    """
+    if orjson is not None:
+        content = orjson.dumps(data)
+    else:
+        content = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+    # JSONRenderer escapes these two so the output is also valid JavaScript
+    return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class CompiledSerializer:
+    """
+    A ModelSerializer's read representation as a list of (name, column,
+    converter) steps over .values() rows.
+
+    Supported fields: scalar model fields, foreign keys as ids, sources
+    that follow non-nullable foreign keys (e.g. "created_by.email"), and
+    many-to-many relations rendered as a list of ids. Anything else raises
+    ImproperlyConfigured when the plan is built.
+    """
+
+    def __init__(self, serializer_class):
+        self.model = serializer_class.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.columns = {self.pk}
+        self.steps = []
+        self.many = []  # (column, many-to-many model field)
+        for name, field in serializer_class().fields.items():
+            if not field.write_only:
+                self._compile(name, field)
+
+    def _compile(self, name, field):
+        path = field.source.split(".")
+        model_field = self._model_field(name, path)
+        if model_field.many_to_many:
+            child = getattr(field, "child_relation", None) or getattr(field, "child", None)
+            if not isinstance(child, (serializers.PrimaryKeyRelatedField, serializers.IntegerField)):
+                raise ImproperlyConfigured(f"{name}: only lists of ids are supported for many-to-many fields.")
+            column = f"_many_{name}"
+            self.many.append((column, model_field))
+            self.steps.append((name, column, None))
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            column = "__".join(path)
+            self.columns.add(column)
+            self.steps.append((name, column, None))
+        elif isinstance(field, CONVERTED_FIELDS):
+            column = "__".join(path)
+            self.columns.add(column)
+            self.steps.append((name, column, field.to_representation))
+        else:
+            raise ImproperlyConfigured(f"{name}: {type(field).__name__} is not supported.")
+
+    def _model_field(self, name, path):
+        model = self.model
+        try:
+            for i, part in enumerate(path):
+                model_field = model._meta.get_field(part)
+                if i < len(path) - 1:
+                    # a null link would make the serializer skip the field
+                    if not model_field.many_to_one or model_field.null:
+                        raise ImproperlyConfigured(f"{name}: sources may only follow non-nullable foreign keys.")
+                    model = model_field.related_model
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f"{name}: source is not a model field.")
+        if model_field.one_to_many or (model_field.one_to_one and model_field.auto_created):
+            raise ImproperlyConfigured(f"{name}: reverse relations are not supported.")
+        return model_field
+
+    def values(self, queryset):
+        return queryset.select_related(None).prefetch_related(None).values(*self.columns)
+
+    def _load_many(self, model_field, ids):
+        # same join as prefetch_related(), so the ids come back in the same order
+        query_name = model_field.related_query_name()
+        related = model_field.related_model._default_manager.filter(**{f"{query_name}__in": ids})
+        found = {pk: [] for pk in ids}
+        for owner, pk in related.values_list(query_name, "pk"):
+            found[owner].append(pk)
+        return found
+
+    def serialize(self, rows):
+        rows = list(rows)
+        if self.many and rows:
+            ids = [row[self.pk] for row in rows]
+            for column, model_field in self.many:
+                found = self._load_many(model_field, ids)
+                for row in rows:
+                    row[column] = found[row[self.pk]]
+
+        steps = self.steps
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in steps:
+                value = row[column]
+                item[name] = value if convert is None or value is None else convert(value)
+            data.append(item)
+        return data
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(serializer_class):
+    return CompiledSerializer(serializer_class)
+
+
+class FastListMixin:
+    """
+    List view mixin: answers GET list requests through CompiledSerializer
+    when settings.FAST_LIST_RENDERING is on. Browsable API, ?indent and
+    sparse fieldset requests keep the regular path.
+    """
+
+    def use_fast_path(self):
+        if not getattr(settings, "FAST_LIST_RENDERING", False):
+            return False
+        request = self.request
+        if type(request.accepted_renderer) is not JSONRenderer:
+            return False
+        if request.accepted_renderer.get_indent(request.accepted_media_type, {}) is not None:
+            return False
+        fields, expand = get_sparse_params(request)
+        return fields is None and not expand
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_path():
+            return super().list(request, *args, **kwargs)
+
+        compiled = compile_serializer(self.get_serializer_class())
+        queryset = compiled.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            data = compiled.serialize(queryset)
+        else:
+            data = self.get_paginated_response(compiled.serialize(page)).data
+        return HttpResponse(dumps(data), content_type=JSONRenderer.media_type)
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on (ordering field, id).
+
+    DRF's CursorPagination filters on the first ordering field only and
+    falls back to an OFFSET for ties. Appending the primary key makes every
+    position unique, so each page is a single indexed range scan:
+
+        WHERE (created_at < %s) OR (created_at = %s AND id < %s)
+
+    Ordering fields must be non-nullable. Views pick the field through their
+    ``ordering`` attribute, e.g. ``ordering = ["-uploaded_at"]``.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "MAX_PAGE_SIZE", 200)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        field = ordering[0]
+        tiebreak = "-id" if field.startswith("-") else "id"
+        return (field, tiebreak)
+
+    def _get_position_from_instance(self, instance, ordering):
+        value = super()._get_position_from_instance(instance, ordering)
+        pk = instance["id"] if isinstance(instance, dict) else instance.pk
+        return f"{value}|{pk}"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(
+                *[f[1:] if f.startswith("-") else f"-{f}" for f in self.ordering]
+            )
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._keyset_filter(queryset, current_position, reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _keyset_filter(self, queryset, position, reverse):
+        field = self.ordering[0]
+        descending = field.startswith("-") != reverse
+        op = "lt" if descending else "gt"
+        field = field.lstrip("-")
+
+        value, _, pk = position.rpartition("|")
+        try:
+            value = queryset.model._meta.get_field(field).to_python(value)
+        except ValidationError:
+            value = None
+        if value is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+
+        return Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": pk})
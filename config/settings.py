@@ -85,8 +85,17 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": 50,
 }
 
+# Upper bound for ?page_size= on list endpoints.
+MAX_PAGE_SIZE = 200
+
+# Serve plain JSON task and comment lists from .values() rows instead of
+# ModelSerializer instances (config/fastread.py). The output is identical.
+FAST_LIST_RENDERING = os.environ.get("FAST_LIST_RENDERING", "") == "1"
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -103,6 +112,63 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
 }
 
+# Cross-request cache for project role lookups (projects/roles.py). Without
+# "BACKEND" each worker process keeps its own entries and only the process
+# that handled a membership change drops them, so elsewhere a demoted or
+# removed member keeps the old role for up to LOCAL_TTL seconds. Set
+# "BACKEND" to a CACHES alias shared by all workers to have changes apply
+# everywhere at once; entries then live for TTL seconds.
+PROJECT_ROLE_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "TTL": 300,  # seconds, shared backend
+    "LOCAL_TTL": 5,  # seconds, process-local entries
+    "BACKEND": os.environ.get("PROJECT_ROLE_CACHE_BACKEND") or None,
+}
+
+# Cached JSON responses of the project and task list endpoints
+# (projects/response_cache.py). Writes replace a per-project version, so a
+# stale entry is never served; the TTL bounds memory and edits that do not
+# belong to a project, such as a renamed user.
+RESPONSE_CACHE = {
+    "BACKEND": os.environ.get("RESPONSE_CACHE_BACKEND", "default"),
+    "TTL": 300,  # seconds; 0 turns the cache off
+}
+
+# Notification fan-out (notifications/worker.py). "thread" processes events in
+# a background thread of the web process; "command" leaves them for
+# `manage.py process_notifications --loop`.
+NOTIFICATIONS = {
+    "WORKER": os.environ.get("NOTIFICATIONS_WORKER", "thread"),
+    "BATCH_SIZE": 500,
+    # prune_notifications deletes rows older than this
+    "RETENTION_DAYS": 90,
+}
+
+# Project and task deletion (tasks/purge.py): soft-deleted in the request,
+# purged in batches by a background thread, or by
+# `manage.py process_deletions --loop` with WORKER "command". A running job
+# idle for STALE_SECONDS is taken over by process_deletions.
+DELETIONS = {
+    "WORKER": os.environ.get("DELETIONS_WORKER", "thread"),
+    "BATCH_SIZE": 1000,
+    "STALE_SECONDS": 600,
+}
+
+# Change log behind /changes/ (tasks/changes.py). PostgreSQL and SQLite hand
+# out entries in commit order. On other databases entries younger than
+# CHANGES_SETTLE_SECONDS are held back so a transaction that commits late
+# cannot slip in behind a cursor; keep it above the longest write transaction.
+CHANGES_SETTLE_SECONDS = 60
+# prune_changes deletes entries older than this; older cursors get a 410
+CHANGES_RETENTION_DAYS = 30
+
+# Live updates over WebSockets (tasks/realtime.py). Use
+# "tasks.realtime.PostgresBackend" when running more than one ASGI process.
+REALTIME = {
+    "BACKEND": os.environ.get("REALTIME_BACKEND", "tasks.realtime.InMemoryBackend"),
+    "QUEUE_SIZE": 100,
+}
+
 # CORS (open for dev)
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -110,6 +176,46 @@ CORS_ALLOW_ALL_ORIGINS = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Resumable chunked attachment uploads (tasks/uploads.py). Finalized uploads
+# are assembled by a background thread, or with WORKER "command" by
+# `manage.py assemble_uploads --loop`, which also takes over an assembly
+# started more than STALE_SECONDS ago.
+ATTACHMENT_UPLOADS = {
+    "MAX_SIZE": 2 * 1024 ** 3,  # bytes per file
+    "MAX_CHUNK_SIZE": 16 * 1024 ** 2,  # bytes per PUT
+    # prune_uploads drops sessions older than this (seconds)
+    "SESSION_TTL": 24 * 3600,
+    "WORKER": os.environ.get("UPLOADS_WORKER", "thread"),
+    "STALE_SECONDS": 600,
+}
+
+# Content-addressed attachment files (tasks/storage.py). Unreferenced files
+# younger than GRACE_SECONDS are kept, so an upload that reuses one cannot
+# lose it before its attachment is saved; gc_attachments removes them later.
+ATTACHMENT_BLOBS = {
+    "GRACE_SECONDS": 3600,
+}
+
+# WebP thumbnails of image attachments and profile pictures
+# (tasks/thumbnails.py), by longest edge in pixels. "thread" renders them in
+# a pool in the web process after upload; with "command" run
+# `manage.py generate_thumbnails` periodically instead.
+THUMBNAILS = {
+    "WORKER": os.environ.get("THUMBNAILS_WORKER", "thread"),
+    "WORKERS": 2,
+    "SIZES": {"small": 128, "medium": 512, "large": 1280},
+    "QUALITY": 80,
+}
+
+# Attachment downloads (tasks/downloads.py). Behind nginx use
+# "x-accel-redirect" with an `internal` location mapping ACCEL_PREFIX to
+# MEDIA_ROOT; behind Apache with mod_xsendfile use "x-sendfile". Unset,
+# Django streams the file itself.
+ATTACHMENT_DOWNLOADS = {
+    "OFFLOAD": os.environ.get("ATTACHMENT_OFFLOAD") or None,
+    "ACCEL_PREFIX": "/protected-media/",
+}
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
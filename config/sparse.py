@@ -0,0 +1,139 @@
+"""
+Sparse fieldsets for GET requests:
+
+    GET /api/projects/3/tasks/?fields=id,title,status,priority
+    GET /api/projects/?fields=id,name,created_by&expand=created_by
+
+`fields` keeps only the named top-level fields. `expand` turns a relation
+listed in the serializer's Meta.expandable_fields into nested objects. Once
+`fields` is given, relations that are not expanded come back as plain ids.
+Without either parameter the representation is unchanged.
+
+List views using SparseQuerysetMixin also load only what the chosen fields
+need: .only() on the columns, select_related/prefetch only for relations
+that are asked for.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def _names(request, param):
+    value = request.query_params.get(param) if request is not None else None
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def get_sparse_params(request):
+    """(fields or None, expand set) from a GET request; (None, set()) otherwise."""
+    if request is None or request.method != "GET":
+        return None, set()
+    return _names(request, "fields"), set(_names(request, "expand") or ())
+
+
+class SparseFieldsMixin:
+    """
+    ModelSerializer mixin. Meta.expandable_fields maps a relation to the
+    serializer used when it is expanded, e.g. {"created_by": UserSerializer}.
+    """
+
+    def _is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_top_level():
+            return fields
+        wanted, expand = get_sparse_params(self.context.get("request"))
+        if wanted is None and not expand:
+            return fields
+        self.check_sparse_params(wanted, expand)
+
+        model = self.Meta.model
+        for name, serializer_class in getattr(self.Meta, "expandable_fields", {}).items():
+            many = model._meta.get_field(name).many_to_many
+            if name in expand:
+                fields[name] = serializer_class(many=many, read_only=True)
+            elif wanted is not None:
+                fields[name] = serializers.PrimaryKeyRelatedField(many=many, read_only=True)
+        if wanted is not None:
+            fields = {name: field for name, field in fields.items() if name in wanted}
+        return fields
+
+    @classmethod
+    def check_sparse_params(cls, wanted, expand):
+        unknown = set(wanted or ()) - set(cls.Meta.fields)
+        if unknown:
+            raise ValidationError({"fields": f"Unknown field(s): {', '.join(sorted(unknown))}."})
+        unexpandable = expand - set(getattr(cls.Meta, "expandable_fields", {}))
+        if unexpandable:
+            raise ValidationError({"expand": f"Cannot expand: {', '.join(sorted(unexpandable))}."})
+
+    @classmethod
+    def setup_sparse_loading(cls, queryset, wanted, expand, always=()):
+        """
+        Narrow `queryset` to what serializing `wanted` needs. `always` names
+        columns loaded regardless, e.g. the pagination ordering field.
+        Relations reached through many-to-many fields are left to
+        setup_prefetch().
+        """
+        cls.check_sparse_params(wanted, expand)
+        model = cls.Meta.model
+        expandable = getattr(cls.Meta, "expandable_fields", {})
+        declared = cls().fields
+        columns, related = {model._meta.pk.name, *always}, []
+
+        for name in wanted:
+            source = name if name in expandable else declared[name].source
+            head, _, rest = source.partition(".")
+            try:
+                field = model._meta.get_field(head)
+            except FieldDoesNotExist:
+                return queryset  # computed field; can't tell what it reads
+            if field.many_to_many or field.one_to_many:
+                continue
+            if rest:
+                related.append(head)
+                columns.add(source.replace(".", "__"))
+            else:
+                columns.add(head)
+                if name in expand:
+                    related.append(head)
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return cls.setup_prefetch(queryset.only(*columns), wanted, expand)
+
+    @classmethod
+    def setup_prefetch(cls, queryset, wanted, expand):
+        return queryset
+
+
+class SparseQuerysetMixin:
+    """
+    List view mixin: applies the serializer's setup_sparse_loading() to GET
+    list requests that pass ?fields= or ?expand=.
+    """
+
+    def get_sparse_always_load(self):
+        ordering = getattr(self, "ordering", None) or [self.pagination_class.ordering[0]]
+        return {*getattr(self, "ordering_fields", []), *(field.lstrip("-") for field in ordering)}
+
+    def filter_queryset(self, queryset):
+        # not get_queryset(): list views override that one themselves
+        queryset = super().filter_queryset(queryset)
+        wanted, expand = get_sparse_params(self.request)
+        if wanted is None and not expand:
+            return queryset
+        serializer_class = self.get_serializer_class()
+        return serializer_class.setup_sparse_loading(
+            queryset,
+            serializer_class.Meta.fields if wanted is None else wanted,
+            expand,
+            always=self.get_sparse_always_load(),
+        )
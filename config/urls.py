@@ -15,9 +15,12 @@ urlpatterns = [
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="docs"),
     path("api/projects/", include("projects.urls")),
+    path("api/notifications/", include("notifications.urls")),
     path("api/", include("tasks.urls")),
 
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
 
+# Attachments are only served through /api/attachments/<id>/download/, which
+# checks membership. Profile pictures stay public during development.
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += static(settings.MEDIA_URL + "profiles/", document_root=settings.MEDIA_ROOT / "profiles")
@@ -0,0 +1,40 @@
+from .models import NotificationEvent
+from . import worker
+
+
+def _actor_name(actor):
+    if actor is None or not getattr(actor, "is_authenticated", False):
+        return "Someone"
+    return getattr(actor, "name", "") or actor.email
+
+
+def build_event(kind, *, actor, project, task=None, **payload):
+    """An unsaved event; pass a list of these to publish_many()."""
+    payload.setdefault("actor", _actor_name(actor))
+    if task is not None:
+        payload.setdefault("task_title", task.title)
+    return NotificationEvent(
+        kind=kind,
+        actor=actor if getattr(actor, "is_authenticated", False) else None,
+        project_id=getattr(project, "pk", project),
+        task=task,
+        payload=payload,
+    )
+
+
+def publish(kind, *, actor, project, task=None, **payload):
+    """
+    Queue one event. Costs a single INSERT on the request path; recipients
+    are resolved by the worker once the transaction commits.
+    """
+    event = build_event(kind, actor=actor, project=project, task=task, **payload)
+    event.save()
+    worker.schedule()
+    return event
+
+
+def publish_many(events):
+    events = NotificationEvent.objects.bulk_create(events)
+    if events:
+        worker.schedule()
+    return events
@@ -0,0 +1,95 @@
+import gzip
+import json
+from collections import Counter, defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Notification, NotificationCounter, NotificationEvent
+
+ARCHIVE_FIELDS = ["id", "recipient_id", "kind", "project_id", "task_id", "message", "is_read", "created_at"]
+
+
+def add_unread(deltas):
+    """
+    Add {user_id: delta} to the unread counters, with one UPDATE per distinct
+    delta. Users without a counter row are skipped; it is built on first read.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(
+            unread=F("unread") + delta, updated_at=timezone.now()
+        )
+
+
+def recalculate(user_id):
+    unread = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+    counter, _ = NotificationCounter.objects.update_or_create(user_id=user_id, defaults={"unread": unread})
+    return counter
+
+
+def unread_count(user):
+    counter = NotificationCounter.objects.filter(user=user).first() or recalculate(user.pk)
+    return counter.unread
+
+
+def mark_read(user, ids=None):
+    """
+    Mark the user's notifications read in one UPDATE, either those in `ids`
+    or, when ids is None, all of them. Returns how many changed.
+    """
+    unread = Notification.objects.filter(recipient=user, is_read=False)
+    with transaction.atomic():
+        if ids is None:
+            marked = unread.update(is_read=True)
+            NotificationCounter.objects.filter(user=user).update(unread=0, updated_at=timezone.now())
+        else:
+            marked = unread.filter(pk__in=ids).update(is_read=True)
+            add_unread({user.pk: -marked})
+    return marked
+
+
+def prune(before, batch_size=1000, archive=None):
+    """
+    Delete notifications created before `before`, oldest first, in batches
+    of `batch_size`, then the processed events they came from. When `archive`
+    is a path, deleted rows are appended to it as gzipped JSON lines first.
+    Returns the number of notifications removed.
+    """
+    removed = 0
+    archive_file = gzip.open(archive, "at", encoding="utf-8") if archive else None
+    try:
+        while True:
+            rows = list(
+                Notification.objects.filter(created_at__lt=before)
+                .order_by("id")
+                .values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            if archive_file:
+                archive_file.writelines(json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows)
+            unread = Counter(row["recipient_id"] for row in rows if not row["is_read"])
+            with transaction.atomic():
+                Notification.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+                add_unread({user_id: -n for user_id, n in unread.items()})
+            removed += len(rows)
+    finally:
+        if archive_file:
+            archive_file.close()
+
+    while True:
+        event_ids = list(
+            NotificationEvent.objects.filter(processed_at__lt=before)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not event_ids:
+            break
+        NotificationEvent.objects.filter(pk__in=event_ids).delete()
+    return removed
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.worker import process_pending
+
+
+class Command(BaseCommand):
+    help = "Fan out queued notification events into per-user notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new events.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls when idle.")
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            handled = process_pending(options["batch_size"])
+            if handled:
+                self.stdout.write(f"Processed {handled} events")
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications.inbox import prune
+
+
+class Command(BaseCommand):
+    help = "Delete (and optionally archive) notifications older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "NOTIFICATIONS", {}).get("RETENTION_DAYS", 90),
+            help="Keep notifications newer than this many days.",
+        )
+        parser.add_argument("--archive", help="Append removed rows to this .jsonl.gz file first.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        removed = prune(before, batch_size=options["batch_size"], archive=options["archive"])
+        self.stdout.write(f"Removed {removed} notifications created before {before:%Y-%m-%d}")
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-17 18:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("notifications", "0001_initial"),
+        ("projects", "0005_project_updated_at"),
+        ("tasks", "0005_task_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationCounter",
+            fields=[
+                ("user", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="notification_counter", serialize=False, to=settings.AUTH_USER_MODEL)),
+                ("unread", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(condition=models.Q(("is_read", False)), fields=["recipient", "-created_at", "-id"], name="notif_recipient_unread_idx"),
+        ),
+    ]
@@ -1,3 +1,82 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+User = settings.AUTH_USER_MODEL
+
+
+class NotificationEvent(models.Model):
+    """
+    Something that happened, queued by the request that caused it.
+    The worker (notifications/worker.py) later works out who should hear
+    about it and writes their Notification rows.
+    """
+
+    KIND_CHOICES = [
+        ("task_assigned", "Task assigned"),
+        ("comment_added", "Comment added"),
+        ("subtask_status", "Subtask status changed"),
+        ("project_invite", "Added to project"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    project = models.ForeignKey("projects.Project", on_delete=models.CASCADE, related_name="+")
+    task = models.ForeignKey("tasks.Task", on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    # what the message needs, captured at publish time so fan-out needs no joins
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"], condition=Q(processed_at__isnull=True), name="notif_event_pending_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} in {self.project_id}"
+
+
+class Notification(models.Model):
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    event = models.ForeignKey(NotificationEvent, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.CharField(max_length=20, choices=NotificationEvent.KIND_CHOICES)
+    project = models.ForeignKey("projects.Project", on_delete=models.CASCADE, related_name="+")
+    task = models.ForeignKey("tasks.Task", on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    message = models.CharField(max_length=255)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["recipient", "-created_at", "-id"], name="notif_recipient_created_idx"),
+            models.Index(
+                fields=["recipient", "-created_at", "-id"],
+                condition=Q(is_read=False),
+                name="notif_recipient_unread_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["event", "recipient"], name="unique_notification_per_event"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.recipient}"
+
+
+class NotificationCounter(models.Model):
+    """
+    Denormalized unread count per user, kept in step by notifications/inbox.py.
+    A missing row is rebuilt from the Notification table on first read.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="notification_counter"
+    )
+    unread = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.unread} unread for {self.user_id}"
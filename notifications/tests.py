@@ -1,3 +1,196 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from projects.models import Project, ProjectMembership
+from projects.testing import ProjectTestCase
+from tasks.models import Task, Subtask
+from .models import Notification, NotificationCounter, NotificationEvent
+from .worker import process_pending
+
+User = get_user_model()
+
+
+@override_settings(NOTIFICATIONS={"WORKER": "command", "BATCH_SIZE": 500})
+class NotificationPipelineTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.members = [cls.add_member(f"m{i}@example.com", f"M{i}") for i in range(3)]
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+        cls.task.assignees.set(cls.members[:2])
+
+    def recipients(self, kind):
+        return set(Notification.objects.filter(kind=kind).values_list("recipient_id", flat=True))
+
+    def test_comment_notifies_assignees_and_creator_but_not_author(self):
+        self.client.force_authenticate(self.members[0])
+        self.client.post(f"/api/tasks/{self.task.pk}/comments/", {"content": "hello"}, format="json")
+        self.assertFalse(Notification.objects.exists())  # nothing fanned out on the request path
+
+        self.assertEqual(process_pending(), 1)
+        self.assertEqual(self.recipients("comment_added"), {self.owner.pk, self.members[1].pk})
+        self.assertEqual(process_pending(), 0)
+
+    def test_comment_create_cost_does_not_grow_with_followers(self):
+        extra = [
+            User.objects.create_user(email=f"x{i}@example.com", password="pass1234", name=f"X{i}")
+            for i in range(20)
+        ]
+        for user in extra:
+            ProjectMembership.objects.create(project=self.project, user=user, role="member")
+        self.task.assignees.add(*extra)
+        with self.assertNumQueries(5):  # task, membership, insert, change log, queue event
+            self.client.post(f"/api/tasks/{self.task.pk}/comments/", {"content": "hello"}, format="json")
+        process_pending()
+        self.assertEqual(len(self.recipients("comment_added")), 22)
+
+    def test_only_new_assignees_are_notified(self):
+        ids = [self.members[1].pk, self.members[2].pk]
+        self.client.patch(f"/api/tasks/{self.task.pk}/", {"assignees": ids}, format="json")
+        process_pending()
+        self.assertEqual(self.recipients("task_assigned"), {self.members[2].pk})
+        self.assertIn("assigned you", Notification.objects.get().message)
+
+    def test_bulk_create_queues_one_event_per_task(self):
+        items = [{"title": f"B{i}", "assignees": [self.members[0].pk]} for i in range(3)]
+        self.client.post(f"/api/projects/{self.project.pk}/tasks/bulk/", items, format="json")
+        self.assertEqual(NotificationEvent.objects.filter(kind="task_assigned").count(), 3)
+        process_pending()
+        self.assertEqual(Notification.objects.filter(recipient=self.members[0]).count(), 3)
+
+    def test_subtask_status_change(self):
+        subtask = Subtask.objects.create(task=self.task, title="S")
+        self.client.patch(f"/api/subtasks/{subtask.pk}/", {"title": "S2"}, format="json")
+        self.assertFalse(NotificationEvent.objects.exists())
+        self.client.patch(f"/api/subtasks/{subtask.pk}/", {"status": "done"}, format="json")
+        process_pending()
+        self.assertEqual(self.recipients("subtask_status"), {m.pk for m in self.members[:2]})
+
+    def test_invite(self):
+        newcomer = User.objects.create_user(email="new@example.com", password="pass1234", name="New")
+        self.client.post(
+            f"/api/projects/{self.project.pk}/invite/", {"email": newcomer.email, "role": "member"}, format="json"
+        )
+        process_pending()
+        self.assertEqual(self.recipients("project_invite"), {newcomer.pk})
+
+    def test_batches(self):
+        for _ in range(5):
+            self.client.post(f"/api/tasks/{self.task.pk}/comments/", {"content": "x"}, format="json")
+        self.assertEqual(process_pending(batch_size=2), 2)
+        self.assertEqual(NotificationEvent.objects.filter(processed_at__isnull=True).count(), 3)
+
+
+class NotificationWorkerScheduleTests(TestCase):
+    @override_settings(NOTIFICATIONS={"WORKER": "thread"})
+    def test_thread_worker_starts_after_commit(self):
+        with mock.patch("notifications.worker._submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                from notifications.worker import schedule
+                schedule()
+                submit.assert_not_called()
+        submit.assert_called_once()
+
+
+class InboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.actor = User.objects.create_user(email="actor@example.com", password="pass1234", name="Actor")
+        cls.user = User.objects.create_user(email="user@example.com", password="pass1234", name="User")
+        cls.project = Project.objects.create(name="P", start_date="2025-01-01", created_by=cls.actor)
+        cls.event = NotificationEvent.objects.create(kind="comment_added", project=cls.project)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def notify(self, n, **fields):
+        return Notification.objects.bulk_create(
+            Notification(
+                recipient=self.user,
+                event=NotificationEvent.objects.create(kind="comment_added", project=self.project),
+                kind="comment_added",
+                project=self.project,
+                message=f"n{i}",
+                **fields,
+            )
+            for i in range(n)
+        )
+
+    def unread(self):
+        return self.client.get("/api/notifications/unread-count/").data["unread"]
+
+    def test_counter_is_built_lazily_then_maintained_by_worker(self):
+        self.notify(2)
+        self.assertEqual(self.unread(), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.unread(), 2)
+
+        task = Task.objects.create(project=self.project, title="T", created_by=self.actor)
+        NotificationEvent.objects.create(
+            kind="task_assigned", actor=self.actor, project=self.project, task=task,
+            payload={"user_ids": [self.user.pk], "actor": "Actor", "task_title": "T"},
+        )
+        process_pending()
+        self.assertEqual(self.unread(), 3)
+
+    def test_mark_selected_read(self):
+        ids = [n.pk for n in self.notify(3)]
+        self.unread()  # build the counter
+        # savepoint, update notifications, update counter, release, read counter
+        with self.assertNumQueries(5):
+            response = self.client.post("/api/notifications/read/", {"ids": ids[:2]}, format="json")
+        self.assertEqual(response.data, {"marked": 2, "unread": 1})
+        response = self.client.post("/api/notifications/read/", {"ids": ids[:2]}, format="json")
+        self.assertEqual(response.data["marked"], 0)
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 1)
+
+    def test_mark_all_read_and_ignore_other_users(self):
+        self.notify(3)
+        other = Notification.objects.create(
+            recipient=self.actor, event=self.event, kind="comment_added", project=self.project, message="x"
+        )
+        response = self.client.post("/api/notifications/read/", {"all": True}, format="json")
+        self.assertEqual(response.data, {"marked": 3, "unread": 0})
+        other.refresh_from_db()
+        self.assertFalse(other.is_read)
+        self.assertEqual(self.client.post("/api/notifications/read/", {}, format="json").status_code, 400)
+
+    def test_inbox_pages_newest_first(self):
+        self.notify(5)
+        Notification.objects.filter(message="n1").update(is_read=True)
+        response = self.client.get("/api/notifications/?page_size=2")
+        self.assertEqual([n["message"] for n in response.data["results"]], ["n4", "n3"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([n["message"] for n in response.data["results"]], ["n2", "n1"])
+        response = self.client.get("/api/notifications/?unread=true")
+        self.assertEqual([n["message"] for n in response.data["results"]], ["n4", "n3", "n2", "n0"])
+
+    def test_prune_archives_old_rows_and_fixes_counters(self):
+        old = self.notify(3)
+        self.notify(1)
+        self.unread()
+        long_ago = timezone.now() - timedelta(days=120)
+        Notification.objects.filter(pk__in=[n.pk for n in old]).update(created_at=long_ago)
+        NotificationEvent.objects.filter(notifications__in=old).update(processed_at=long_ago)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "archive.jsonl.gz")
+            call_command("prune_notifications", days=90, archive=path, batch_size=2, stdout=open(os.devnull, "w"))
+            with gzip.open(path, "rt") as f:
+                archived = [json.loads(line) for line in f]
+
+        self.assertEqual(sorted(row["id"] for row in archived), sorted(n.pk for n in old))
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 1)
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 1)
+        self.assertFalse(NotificationEvent.objects.filter(processed_at=long_ago).exists())
@@ -1,3 +1,48 @@
-from django.shortcuts import render
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .inbox import mark_read, unread_count
+from .models import Notification
+from .serializers import MarkReadSerializer, NotificationSerializer
+
+
+class NotificationListView(generics.ListAPIView):
+    """
+    GET /api/notifications/
+    GET /api/notifications/?unread=true
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    ordering_fields = ["created_at"]
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        if self.request.query_params.get("unread") in ("1", "true"):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+
+class UnreadCountView(APIView):
+    """
+    GET /api/notifications/unread-count/
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({"unread": unread_count(request.user)})
+
+
+class MarkReadView(APIView):
+    """
+    POST /api/notifications/read/
+    {"ids": [1, 2, 3]} or {"all": true}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = None if serializer.validated_data["all"] else serializer.validated_data["ids"]
+        marked = mark_read(request.user, ids)
+        return Response({"marked": marked, "unread": unread_count(request.user)})
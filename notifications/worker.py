@@ -0,0 +1,135 @@
+"""
+Fan-out of queued NotificationEvents into per-user Notification rows.
+
+Events are rows in the database, so any process can drain them:
+
+* settings.NOTIFICATIONS["WORKER"] == "thread": the web process hands the
+  work to a background thread as soon as the publishing transaction commits.
+* "command": nothing runs in the web process; run
+  ``manage.py process_notifications --loop`` alongside it instead.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _config():
+    config = {"WORKER": "thread", "BATCH_SIZE": 500}
+    config.update(getattr(settings, "NOTIFICATIONS", {}))
+    return config
+
+
+def schedule():
+    """Ask for pending events to be processed once the current transaction commits."""
+    if _config()["WORKER"] != "thread":
+        return
+    transaction.on_commit(_submit)
+
+
+def _submit():
+    global _executor
+    if _executor is None:
+        # one thread: batches are processed in order and never race each other
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notifications")
+    _executor.submit(_drain)
+
+
+def _drain():
+    close_old_connections()
+    try:
+        while process_pending():
+            pass
+    except Exception:
+        logger.exception("Notification fan-out failed; events stay queued for the next run.")
+    finally:
+        connection.close()
+
+
+def _recipients(events):
+    """{event_id: set(user_id)} for a batch, with one query for all task events."""
+    from tasks.models import Task, TaskAssignment
+
+    task_ids = {e.task_id for e in events if e.task_id and e.kind in ("comment_added", "subtask_status")}
+    followers = {}
+    if task_ids:
+        for task_id, user_id in TaskAssignment.objects.filter(task_id__in=task_ids).values_list("task_id", "user_id"):
+            followers.setdefault(task_id, set()).add(user_id)
+        for task_id, user_id in Task.objects.filter(pk__in=task_ids).values_list("pk", "created_by_id"):
+            followers.setdefault(task_id, set()).add(user_id)
+
+    recipients = {}
+    for event in events:
+        if event.kind == "task_assigned":
+            users = set(event.payload.get("user_ids", []))
+        elif event.kind == "project_invite":
+            users = {event.payload["user_id"]}
+        else:
+            users = set(followers.get(event.task_id, ()))
+        users.discard(event.actor_id)
+        recipients[event.pk] = users
+    return recipients
+
+
+def _message(event):
+    p = event.payload
+    if event.kind == "task_assigned":
+        text = f"{p['actor']} assigned you to “{p['task_title']}”"
+    elif event.kind == "comment_added":
+        text = f"{p['actor']} commented on “{p['task_title']}”: {p.get('excerpt', '')}"
+    elif event.kind == "subtask_status":
+        text = f"{p['actor']} moved “{p['subtask_title']}” to {p['status']} on “{p['task_title']}”"
+    else:
+        text = f"{p['actor']} added you to {p['project_name']}"
+    return text[:255]
+
+
+def process_pending(batch_size=None):
+    """
+    Fan out one batch of queued events. Returns how many events were handled;
+    0 means the queue is empty.
+    """
+    from .inbox import add_unread
+    from .models import Notification, NotificationEvent
+
+    batch_size = batch_size or _config()["BATCH_SIZE"]
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects.filter(processed_at__isnull=True)
+            .order_by("id")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not events:
+            return 0
+
+        recipients = _recipients(events)
+        unread = {}
+        for users in recipients.values():
+            for user_id in users:
+                unread[user_id] = unread.get(user_id, 0) + 1
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    recipient_id=user_id,
+                    event=event,
+                    kind=event.kind,
+                    project_id=event.project_id,
+                    task_id=event.task_id,
+                    message=_message(event),
+                )
+                for event in events
+                for user_id in recipients[event.pk]
+            ],
+            ignore_conflicts=True,
+        )
+        add_unread(unread)
+        NotificationEvent.objects.filter(pk__in=[e.pk for e in events]).update(
+            processed_at=timezone.now()
+        )
+    return len(events)
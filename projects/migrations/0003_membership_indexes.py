@@ -0,0 +1,27 @@
+# Generated by Django 5.0.3 on 2026-10-17 18:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0002_alter_projectmembership_role_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="projectmembership",
+            index=models.Index(
+                fields=["user", "project", "role"], name="membership_user_role_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="projectmembership",
+            index=models.Index(
+                fields=["project", "role"], name="membership_project_role_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.3 on 2026-10-17 18:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0003_membership_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectStats",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                ("tasks_total", models.IntegerField(default=0)),
+                ("tasks_todo", models.IntegerField(default=0)),
+                ("tasks_in_progress", models.IntegerField(default=0)),
+                ("tasks_done", models.IntegerField(default=0)),
+                ("priority_low", models.IntegerField(default=0)),
+                ("priority_medium", models.IntegerField(default=0)),
+                ("priority_high", models.IntegerField(default=0)),
+                ("subtasks_total", models.IntegerField(default=0)),
+                ("subtasks_done", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -7,6 +7,17 @@ from django.core.exceptions import ValidationError
 User = settings.AUTH_USER_MODEL
 
 
+class LiveManager(models.Manager):
+    """
+    Rows that are not soft-deleted. Deleting a project or task only sets
+    deleted_at; tasks/purge.py removes the rows in the background. Use
+    `all_objects` to see them anyway.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Project(models.Model):
     STATUS_CHOICES = [
         ("active", "Active"),
@@ -26,6 +37,8 @@ class Project(models.Model):
         related_name="projects_owned",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
 
     members = models.ManyToManyField(
         User,
@@ -33,6 +46,9 @@ class Project(models.Model):
         related_name="projects",
     )
 
+    objects = LiveManager()
+    all_objects = models.Manager()
+
     def __str__(self):
         return self.name
 
@@ -58,6 +74,11 @@ class ProjectMembership(models.Model):
                 name="unique_owner_per_project",
             )
         ]
+        indexes = [
+            # covers role lookups by (user, project) and by user alone
+            models.Index(fields=["user", "project", "role"], name="membership_user_role_idx"),
+            models.Index(fields=["project", "role"], name="membership_project_role_idx"),
+        ]
         
     def clean(self):
         # App-level guard (defense in depth, and for DBs without partial unique indexes)
@@ -74,3 +95,28 @@ class ProjectMembership(models.Model):
     
     def __str__(self):
         return f"{self.user} in {self.project} ({self.role})"
+
+
+
+class ProjectStats(models.Model):
+    """
+    Denormalized task and subtask counters for a project's dashboard.
+    Kept up to date by tasks/stats.py; rebuilt from scratch when missing.
+    """
+
+    project = models.OneToOneField(
+        Project, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    tasks_total = models.IntegerField(default=0)
+    tasks_todo = models.IntegerField(default=0)
+    tasks_in_progress = models.IntegerField(default=0)
+    tasks_done = models.IntegerField(default=0)
+    priority_low = models.IntegerField(default=0)
+    priority_medium = models.IntegerField(default=0)
+    priority_high = models.IntegerField(default=0)
+    subtasks_total = models.IntegerField(default=0)
+    subtasks_done = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.project}"
@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission
-from .models import ProjectMembership, Project
+from .models import ProjectMembership
+from .roles import ADMIN_ROLES, MEMBER_ROLES, get_request_role
 
 
 def get_user_role(user, project):
@@ -14,8 +15,7 @@ class IsProjectOwner(BasePermission):
     """Allow only project owner."""
 
     def has_object_permission(self, request, view, obj):
-        project = getattr(obj, "project", obj)
-        role = get_user_role(request.user, project)
+        role = get_request_role(request, obj)
         return role == "owner"
 
 
@@ -23,30 +23,27 @@ class IsAdminOrOwner(BasePermission):
     """Allow project admins and owner."""
 
     def has_object_permission(self, request, view, obj):
-        project = getattr(obj, "project", obj)
-        role = get_user_role(request.user, project)
-        return role in ["admin", "owner"]
+        role = get_request_role(request, obj)
+        return role in ADMIN_ROLES
 
 
 class IsMember(BasePermission):
     """Allow any project member."""
 
     def has_object_permission(self, request, view, obj):
-        project = getattr(obj, "project", obj)
-        role = get_user_role(request.user, project)
-        return role in ["member", "admin", "owner"]
+        role = get_request_role(request, obj)
+        return role in MEMBER_ROLES
 
 
 class IsSelfOrAdminOrOwner(BasePermission):
     """Used for cases like deleting/updating own comment or attachment."""
 
     def has_object_permission(self, request, view, obj):
-        project = getattr(obj, "project", obj)
-        role = get_user_role(request.user, project)
+        role = get_request_role(request, obj)
         return (
-            obj.uploaded_by == request.user
+            getattr(obj, "uploaded_by", None) == request.user
             or getattr(obj, "created_by", None) == request.user
-            or role in ["admin", "owner"]
+            or role in ADMIN_ROLES
         )
 
 
@@ -57,17 +54,4 @@ class IsProjectMember(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # obj may be Project itself, or something linked (Task, Comment, etc.)
-        project = None
-        if isinstance(obj, Project):
-            project = obj
-        elif hasattr(obj, "project"):
-            project = obj.project
-        elif hasattr(obj, "task"):  # e.g., Comment, Attachment
-            project = obj.task.project
-
-        if project is None:
-            return False
-
-        return ProjectMembership.objects.filter(
-            project=project, user=request.user
-        ).exists()
\ No newline at end of file
+        return get_request_role(request, obj) is not None
@@ -0,0 +1,110 @@
+"""
+Cached JSON responses for the project and task list endpoints.
+
+Each project has a version token in the cache. Every write to a project,
+its memberships or anything in it replaces the token: changes.record()
+covers tasks, subtasks, comments and attachments (signals and bulk paths
+alike), projects/signals.py covers projects and memberships. A cached list
+is keyed by the versions and roles of the projects it shows plus the full
+request URL, so a write makes every older entry unreachable instead of
+having to find and delete it.
+
+Tokens are replaced both immediately and again on commit: a request that
+read the new token before the writing transaction committed may have
+cached the old rows under it.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from rest_framework.renderers import JSONRenderer
+
+
+def _config():
+    config = {"BACKEND": "default", "TTL": 300}
+    config.update(getattr(settings, "RESPONSE_CACHE", {}))
+    return config
+
+
+def _backend():
+    return caches[_config()["BACKEND"]]
+
+
+def _version_key(project_id):
+    return f"project-version:{project_id}"
+
+
+def get_versions(project_ids):
+    """{project_id: version token}, creating tokens for unseen projects."""
+    backend = _backend()
+    keys = {_version_key(pk): pk for pk in project_ids}
+    found = backend.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            backend.add(key, uuid.uuid4().hex, timeout=None)
+        found.update(backend.get_many(missing))
+    return {keys[key]: token for key, token in found.items()}
+
+
+def _replace(project_id):
+    _backend().set(_version_key(project_id), uuid.uuid4().hex, timeout=None)
+
+
+def bump(project_id):
+    """Invalidate every cached list that shows `project_id`."""
+    _replace(project_id)
+    transaction.on_commit(lambda: _replace(project_id))
+
+
+class CachedListMixin:
+    """
+    List view mixin: serves repeated JSON GETs from the cache. Views say
+    which projects a response depends on by overriding get_cache_projects();
+    a view that does not is never cached.
+    """
+
+    def get_cache_projects(self):
+        """[(project_id, role), ...] the response shows, or None to skip the cache."""
+        return None
+
+    def get_cache_key(self):
+        request = self.request
+        if not _config()["TTL"]:
+            return None
+        if type(request.accepted_renderer) is not JSONRenderer:
+            return None  # the browsable API embeds per-user forms and tokens
+        projects = self.get_cache_projects()
+        if projects is None:
+            return None
+        versions = get_versions([project_id for project_id, _ in projects])
+        parts = [request.build_absolute_uri(), request.accepted_media_type] + [
+            f"{project_id}:{role}:{versions[project_id]}" for project_id, role in sorted(projects)
+        ]
+        return "list-response:" + hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_cache_key()
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        backend = _backend()
+        cached = backend.get(key)
+        if cached is not None:
+            content_type, content = cached
+            return HttpResponse(content, content_type=content_type)
+
+        def store(response):
+            if response.status_code == 200:
+                backend.set(key, (response["Content-Type"], response.content), _config()["TTL"])
+
+        response = super().list(request, *args, **kwargs)
+        if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Project, ProjectMembership
+
+ADMIN_ROLES = ("admin", "owner")
+MEMBER_ROLES = ("member", "admin", "owner")
+
+
+def get_project_id(obj):
+    """
+    Resolve the project id for a Project or anything hanging off one
+    (Task, Comment, Subtask, Attachment) without loading the project row.
+    """
+    if isinstance(obj, Project):
+        return obj.pk
+    if hasattr(obj, "project_id"):
+        return obj.project_id
+    if hasattr(obj, "task"):
+        return obj.task.project_id
+    if isinstance(obj, int):
+        return obj
+    return None
+
+
+# Stored in place of a role for "not a member", so misses can be cached too.
+_NO_ROLE = ""
+
+
+class RoleCache:
+    """
+    Cross-request cache of (user_id, project_id) -> role.
+
+    Entries are dropped by the ProjectMembership signals in projects/signals.py,
+    but only where the signal fires. By default entries live in a
+    process-local LRU, so the other worker processes keep serving a changed
+    or removed membership until the entry expires: local entries therefore
+    only live LOCAL_TTL seconds, which still absorbs the repeated lookups of
+    a client's bursts of requests. If settings.PROJECT_ROLE_CACHE["BACKEND"]
+    names a CACHES alias shared by the workers (Redis, Memcached, database),
+    invalidations reach every process and entries can live for TTL seconds.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def config(self):
+        config = {"MAX_ENTRIES": 10000, "TTL": 300, "LOCAL_TTL": 5, "BACKEND": None}
+        config.update(getattr(settings, "PROJECT_ROLE_CACHE", {}))
+        return config
+
+    def _backend(self):
+        alias = self.config["BACKEND"]
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def _key(user_id, project_id):
+        return f"project-role:{user_id}:{project_id}"
+
+    def get(self, user_id, project_id):
+        """Return (found, role). role is None for a cached non-member."""
+        backend = self._backend()
+        if backend is not None:
+            value = backend.get(self._key(user_id, project_id))
+        else:
+            with self._lock:
+                value = None
+                entry = self._entries.get((user_id, project_id))
+                if entry is not None:
+                    if entry[1] > time.monotonic():
+                        self._entries.move_to_end((user_id, project_id))
+                        value = entry[0]
+                    else:
+                        del self._entries[(user_id, project_id)]
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        return True, value or None
+
+    def set(self, user_id, project_id, role):
+        value = role or _NO_ROLE
+        config = self.config
+        backend = self._backend()
+        if backend is not None:
+            backend.set(self._key(user_id, project_id), value, config["TTL"])
+            return
+        with self._lock:
+            self._entries[(user_id, project_id)] = (value, time.monotonic() + config["LOCAL_TTL"])
+            self._entries.move_to_end((user_id, project_id))
+            while len(self._entries) > config["MAX_ENTRIES"]:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id, project_id):
+        backend = self._backend()
+        if backend is not None:
+            backend.delete(self._key(user_id, project_id))
+        with self._lock:
+            self._entries.pop((user_id, project_id), None)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "backend": self.config["BACKEND"] or "local",
+            }
+
+
+role_cache = RoleCache()
+
+
+class RoleResolver:
+    """
+    Remembers one user's project roles so repeated permission checks within
+    a request hit the database once per project.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._roles = {}
+        self._complete = False
+
+    def get_role(self, project):
+        project_id = get_project_id(project)
+        if project_id is None or not self.user.is_authenticated:
+            return None
+        if project_id in self._roles:
+            return self._roles[project_id]
+        if self._complete:
+            return None
+
+        found, role = role_cache.get(self.user.pk, project_id)
+        if not found:
+            role = (
+                ProjectMembership.objects.filter(user=self.user, project_id=project_id)
+                .values_list("role", flat=True)
+                .first()
+            )
+            role_cache.set(self.user.pk, project_id, role)
+        self._roles[project_id] = role
+        return role
+
+    def load_all(self):
+        """
+        Batch-load the user's role in every project they belong to with a
+        single query. Returns {project_id: role}.
+        """
+        if not self._complete and self.user.is_authenticated:
+            self._roles = dict(
+                ProjectMembership.objects.filter(user=self.user).values_list(
+                    "project_id", "role"
+                )
+            )
+            self._complete = True
+            for project_id, role in self._roles.items():
+                role_cache.set(self.user.pk, project_id, role)
+        return {pid: role for pid, role in self._roles.items() if role}
+
+    def forget(self, project):
+        self._roles.pop(get_project_id(project), None)
+        self._complete = False
+
+
+def get_role_resolver(request):
+    """Return the RoleResolver attached to this request, creating it on first use."""
+    resolver = getattr(request, "_role_resolver", None)
+    if resolver is None or resolver.user != request.user:
+        resolver = RoleResolver(request.user)
+        request._role_resolver = resolver
+    return resolver
+
+
+def get_request_role(request, project):
+    return get_role_resolver(request).get_role(project)
@@ -1,25 +1,28 @@
 from rest_framework import serializers
 from .models import Project, ProjectMembership
 from accounts.serializers import UserSerializer
+from config.sparse import SparseFieldsMixin
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
 
     class Meta:
         model = Project
         fields = ["id", "name", "description", "start_date", "end_date",
-                  "status", "created_by", "created_at"]
+                  "status", "created_by", "created_at", "updated_at"]
+        expandable_fields = {"created_by": UserSerializer}
 
 
-class ProjectMembershipSerializer(serializers.ModelSerializer):
+class ProjectMembershipSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
 
     class Meta:
         model = ProjectMembership
         fields = ["id", "user", "role"]
+        expandable_fields = {"user": UserSerializer}
 
 
 class ProjectInviteSerializer(serializers.Serializer):
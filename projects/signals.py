@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import response_cache
+from .models import Project, ProjectMembership
+from .roles import role_cache
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def invalidate_cached_role(sender, instance, **kwargs):
+    # Covers invites (get_or_create), role changes and removals, so a
+    # demoted admin loses rights on their next request. Dropped again on
+    # commit in case a concurrent request re-cached the old role meanwhile.
+    user_id, project_id = instance.user_id, instance.project_id
+    role_cache.invalidate(user_id, project_id)
+    transaction.on_commit(lambda: role_cache.invalidate(user_id, project_id))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def bump_project_version(sender, instance, **kwargs):
+    response_cache.bump(instance.pk if sender is Project else instance.project_id)
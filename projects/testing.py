@@ -0,0 +1,58 @@
+"""
+Shared fixtures for the API tests of every app.
+"""
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .models import Project, ProjectMembership
+from .roles import role_cache
+
+User = get_user_model()
+
+
+class ProjectTestCase(TestCase):
+    """
+    An owner and their project "P", with self.client logged in as the owner
+    and the role and response caches emptied before each test. Subclasses
+    call super().setUpTestData() and add their own rows with the helpers.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = cls.create_user("owner@example.com", "Owner")
+        cls.project = cls.create_project(cls.owner)
+
+    @staticmethod
+    def create_user(email, name):
+        return User.objects.create_user(email=email, password="pass1234", name=name)
+
+    @staticmethod
+    def create_project(owner, name="P"):
+        project = Project.objects.create(name=name, start_date="2025-01-01", created_by=owner)
+        ProjectMembership.objects.create(project=project, user=owner, role="owner")
+        return project
+
+    @classmethod
+    def add_member(cls, email, name, role="member", project=None):
+        """A new user with `role` in `project` (default: cls.project)."""
+        user = cls.create_user(email, name)
+        ProjectMembership.objects.create(project=project or cls.project, user=user, role=role)
+        return user
+
+    def setUp(self):
+        role_cache.clear()
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def use_temp_media(self, **overrides):
+        """Store files in a directory removed after the test. Returns its path."""
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media, **overrides))
+        return media
@@ -1,3 +1,231 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import generics
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from tasks.models import Task
+from . import response_cache
+from .models import Project, ProjectMembership, ProjectStats
+from .roles import role_cache
+from .serializers import ProjectSerializer
+from .testing import ProjectTestCase
+
+User = get_user_model()
+
+
+class RoleCacheTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = cls.add_member("admin@example.com", "Admin", role="admin")
+
+    def test_role_is_served_from_cache_across_requests(self):
+        self.client.force_authenticate(self.admin)
+        self.client.get(f"/api/projects/{self.project.pk}/")
+        # the role comes from the cache
+        with self.assertNumQueries(1):  # project + created_by
+            response = self.client.get(f"/api/projects/{self.project.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(role_cache.stats()["hits"], 1)
+
+    def test_demoted_admin_loses_rights_immediately(self):
+        task = Task.objects.create(project=self.project, title="T", created_by=self.owner)
+        self.client.force_authenticate(self.admin)
+        self.client.get(f"/api/tasks/{task.pk}/")  # caches "admin"
+
+        owner_client = APIClient()
+        owner_client.force_authenticate(self.owner)
+        response = owner_client.patch(
+            f"/api/projects/projects/{self.project.pk}/members/{self.admin.pk}/role/",
+            {"role": "member"}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.delete(f"/api/tasks/{task.pk}/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_invite_invalidates_cached_non_member(self):
+        guest = User.objects.create_user(email="guest@example.com", password="pass1234", name="Guest")
+        self.client.force_authenticate(guest)
+        self.assertEqual(self.client.get(f"/api/projects/{self.project.pk}/").status_code, 403)
+
+        owner_client = APIClient()
+        owner_client.force_authenticate(self.owner)
+        owner_client.post(f"/api/projects/{self.project.pk}/invite/", {"email": guest.email}, format="json")
+
+        self.assertEqual(self.client.get(f"/api/projects/{self.project.pk}/").status_code, 200)
+
+    def test_local_entries_expire_after_local_ttl(self):
+        # another worker process changed the role: this one got no signal
+        with mock.patch("projects.roles.time.monotonic", return_value=1000.0):
+            role_cache.set(self.admin.pk, self.project.pk, "owner")
+            self.assertEqual(role_cache.get(self.admin.pk, self.project.pk), (True, "owner"))
+        with mock.patch("projects.roles.time.monotonic", return_value=1006.0):
+            self.assertEqual(role_cache.get(self.admin.pk, self.project.pk), (False, None))
+
+    @override_settings(PROJECT_ROLE_CACHE={"BACKEND": "default"})
+    def test_shared_backend_entries_are_dropped_for_every_process(self):
+        role_cache.set(self.admin.pk, self.project.pk, "admin")
+        self.assertEqual(cache.get(f"project-role:{self.admin.pk}:{self.project.pk}"), "admin")
+        ProjectMembership.objects.filter(user=self.admin).get().save()
+        self.assertIsNone(cache.get(f"project-role:{self.admin.pk}:{self.project.pk}"))
+
+
+class ProjectStatsTests(ProjectTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/projects/{self.project.pk}/stats/"
+
+    def assertCountersMatch(self):
+        counters = dict(self.client.get(self.url).data)
+        counters.pop("updated_at")
+        ProjectStats.objects.all().delete()
+        rebuilt = dict(self.client.get(self.url).data)
+        rebuilt.pop("updated_at")
+        self.assertEqual(counters, rebuilt)
+        return counters
+
+    def test_counters_follow_writes(self):
+        self.client.get(self.url)  # builds the row
+        tasks_url = f"/api/projects/{self.project.pk}/tasks/"
+        a = self.client.post(tasks_url, {"title": "a", "priority": "high"}, format="json").data
+        self.client.post(tasks_url, {"title": "b", "due_date": "2000-01-01"}, format="json")
+        self.client.post(f"/api/projects/{self.project.pk}/tasks/bulk/", [{"title": "c"}, {"title": "d"}], format="json")
+        self.client.patch(f"/api/tasks/{a['id']}/", {"status": "done"}, format="json")
+        sub = self.client.post(f"/api/tasks/{a['id']}/subtasks/", {"title": "s"}, format="json").data
+        self.client.post(f"/api/tasks/{a['id']}/subtasks/", {"title": "t"}, format="json")
+        self.client.patch(f"/api/subtasks/{sub['id']}/", {"status": "done"}, format="json")
+
+        counters = self.assertCountersMatch()
+        self.assertEqual(counters["tasks_total"], 4)
+        self.assertEqual(counters["tasks_done"], 1)
+        self.assertEqual(counters["priority_high"], 1)
+        self.assertEqual(counters["overdue"], 1)
+        self.assertEqual((counters["subtasks_total"], counters["subtasks_done"]), (2, 1))
+
+        self.client.delete(f"/api/tasks/{a['id']}/")
+        counters = self.assertCountersMatch()
+        self.assertEqual((counters["tasks_total"], counters["subtasks_total"]), (3, 0))
+
+    def test_read_is_constant_time(self):
+        Task.objects.bulk_create(
+            Task(project=self.project, title=f"T{i}", created_by=self.owner) for i in range(50)
+        )
+        self.client.get(self.url)
+        # project, counters row, overdue count (role is cached)
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+
+class SparseProjectFieldsTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.member = cls.add_member("member@example.com", "Member")
+
+    def test_project_list_compact_creator(self):
+        response = self.client.get("/api/projects/", {"fields": "id,name,created_by"})
+        self.assertEqual(response.data["results"][0], {"id": self.project.pk, "name": "P", "created_by": self.owner.pk})
+        response = self.client.get("/api/projects/", {"fields": "id,created_by", "expand": "created_by"})
+        self.assertEqual(response.data["results"][0]["created_by"]["email"], self.owner.email)
+
+    def test_members(self):
+        url = f"/api/projects/{self.project.pk}/members/"
+        response = self.client.get(url)
+        self.assertEqual([m["user"]["email"] for m in response.data["results"]], [self.owner.email, self.member.email])
+        response = self.client.get(url, {"fields": "user,role"})
+        self.assertEqual(response.data["results"][1], {"user": self.member.pk, "role": "member"})
+
+        outsider = User.objects.create_user(email="out@example.com", password="pass1234", name="Out")
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+@override_settings(NOTIFICATIONS={"WORKER": "command"}, DELETIONS={"WORKER": "command"})
+class ResponseCacheTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.member = cls.add_member("member@example.com", "Member")
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+        cls.url = f"/api/projects/{cls.project.pk}/tasks/"
+
+    def titles(self, params=None):
+        return [row["title"] for row in self.client.get(self.url, params).json()["results"]]
+
+    def project_names(self, client):
+        return [row["name"] for row in client.get("/api/projects/").json()["results"]]
+
+    def test_repeated_list_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+
+        # other query params, roles and renderers get entries of their own
+        self.assertEqual(self.titles({"title": "nope", "status": "done"}), [])
+        member = APIClient()
+        member.force_authenticate(self.member)
+        with self.assertNumQueries(3):  # role, tasks, assignees
+            member.get(self.url)
+        self.assertIn(b"<html", self.client.get(self.url, HTTP_ACCEPT="text/html").content)
+
+    def test_api_writes_invalidate_task_lists(self):
+        self.assertEqual(self.titles(), ["T"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/tasks/{self.task.pk}/", {"title": "Renamed"}, format="json")
+        self.assertEqual(self.titles(), ["Renamed"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url + "bulk/", [{"title": "A"}, {"title": "B"}], format="json")
+        self.assertEqual(sorted(self.titles()), ["A", "B", "Renamed"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/tasks/{self.task.pk}/")
+        self.assertEqual(sorted(self.titles()), ["A", "B"])
+
+    def test_project_and_membership_writes_invalidate_project_lists(self):
+        self.assertEqual(self.project_names(self.client), ["P"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/projects/{self.project.pk}/", {"name": "Q"}, format="json")
+        self.assertEqual(self.project_names(self.client), ["Q"])
+
+        guest = User.objects.create_user(email="guest@example.com", password="pass1234", name="Guest")
+        guest_client = APIClient()
+        guest_client.force_authenticate(guest)
+        self.assertEqual(self.project_names(guest_client), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/projects/{self.project.pk}/invite/", {"email": guest.email}, format="json")
+        self.assertEqual(self.project_names(guest_client), ["Q"])
+
+    def test_version_is_replaced_again_on_commit(self):
+        self.titles()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Task.objects.create(project=self.project, title="U", created_by=self.owner)
+            # a reader between the write and its commit caches under the new version...
+            stale = response_cache.get_versions([self.project.pk])
+        for callback in callbacks:
+            callback()
+        # ...which the commit retires
+        self.assertNotEqual(response_cache.get_versions([self.project.pk]), stale)
+
+    def test_views_that_name_no_projects_are_not_cached(self):
+        class UncachedView(response_cache.CachedListMixin, generics.ListAPIView):
+            serializer_class = ProjectSerializer
+
+            def get_queryset(self):
+                return Project.objects.filter(members=self.request.user)
+
+        view = UncachedView.as_view()
+        for _ in range(2):
+            request = APIRequestFactory().get("/uncached/")
+            force_authenticate(request, self.owner)
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request)
+                response.render()
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(queries.captured_queries)
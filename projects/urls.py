@@ -1,11 +1,16 @@
 from django.urls import path
-from .views import ProjectListCreateView, ProjectDetailView, ProjectInviteView, UpdateMemberRoleView
+from .views import (ProjectListCreateView, ProjectDetailView, ProjectInviteView,
+                    UpdateMemberRoleView, RoleCacheStatsView, ProjectStatsView,
+                    ProjectMemberListView)
 
 urlpatterns = [
     path("", ProjectListCreateView.as_view(), name="project-list-create"),
     path("<int:pk>/", ProjectDetailView.as_view(), name="project-detail"),
+    path("<int:pk>/members/", ProjectMemberListView.as_view(), name="project-members"),
+    path("<int:pk>/stats/", ProjectStatsView.as_view(), name="project-stats"),
     path("<int:pk>/invite/", ProjectInviteView.as_view(), name="project-invite"),
     path("projects/<int:project_id>/members/<int:user_id>/role/", UpdateMemberRoleView.as_view(), name="update-member-role"),
+    path("role-cache/stats/", RoleCacheStatsView.as_view(), name="role-cache-stats"),
 
     
 ]
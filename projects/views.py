@@ -1,18 +1,31 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from .models import Project, ProjectMembership
 from rest_framework.exceptions import PermissionDenied
 from .serializers import (ProjectSerializer, ProjectMembershipSerializer,
                            ProjectInviteSerializer, RoleUpdateSerializer)
 from accounts.permissions import IsProjectOwner, IsProjectMember, IsProjectOwner
+from .response_cache import CachedListMixin
+from .roles import get_request_role, get_role_resolver, role_cache
+from tasks import purge
+from tasks.stats import get_project_stats
+from tasks.views import deletion_accepted
+from config.conditional import ConditionalObjectMixin
+from config.sparse import SparseQuerysetMixin
+from notifications.events import publish
 
 
 
-class ProjectListCreateView(generics.ListCreateAPIView):
+class ProjectListCreateView(CachedListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering_fields = ["created_at", "name", "start_date", "status"]
+
+    def get_cache_projects(self):
+        return list(get_role_resolver(self.request).load_all().items())
 
     def get_queryset(self):
         return Project.objects.filter(members=self.request.user)
@@ -25,8 +38,8 @@ class ProjectListCreateView(generics.ListCreateAPIView):
         )
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Project.objects.all()
+class ProjectDetailView(ConditionalObjectMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Project.objects.select_related("created_by")
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectMember]
 
@@ -40,7 +53,44 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
     def perform_destroy(self, instance):
         if not IsProjectOwner().has_object_permission(self.request, self, instance):
             raise permissions.PermissionDenied("Only project owner can delete.")
-        instance.delete()
+        # hidden at once, purged in the background (tasks/purge.py)
+        self.deletion_job = purge.delete_project(instance, self.request.user)
+        if self.deletion_job is None:
+            raise Http404("No Project matches the given query.")
+
+    def destroy(self, request, *args, **kwargs):
+        response = super().destroy(request, *args, **kwargs)
+        if response.status_code != status.HTTP_204_NO_CONTENT:
+            return response  # failed If-Match
+        return deletion_accepted(request, self.deletion_job)
+
+class ProjectMemberListView(SparseQuerysetMixin, generics.ListAPIView):
+    """
+    GET /api/projects/<id>/members/
+    """
+    serializer_class = ProjectMembershipSerializer
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    ordering = ["id"]
+    ordering_fields = ["id"]
+
+    def get_queryset(self):
+        project = get_object_or_404(Project, pk=self.kwargs["pk"])
+        self.check_object_permissions(self.request, project)
+        return ProjectMembership.objects.filter(project=project).select_related("user")
+
+
+class ProjectStatsView(APIView):
+    """
+    GET /api/projects/<id>/stats/
+    Task counts by status/priority, overdue tasks and subtask completion.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+
+    def get(self, request, pk):
+        project = get_object_or_404(Project, pk=pk)
+        self.check_object_permissions(request, project)
+        return Response(get_project_stats(project))
+
 
 class ProjectInviteView(APIView):
     """
@@ -62,6 +112,8 @@ class ProjectInviteView(APIView):
         )
         serializer.is_valid(raise_exception=True)
         membership = serializer.save()
+        publish("project_invite", actor=request.user, project=project,
+                user_id=membership.user_id, project_name=project.name)
 
         return Response(
             {"message": f"{membership.user.email} added as {membership.role}"},
@@ -72,16 +124,26 @@ class UpdateMemberRoleView(generics.UpdateAPIView):
     """
     PATCH /api/projects/{project_id}/members/{user_id}/role/
     """
+    queryset = ProjectMembership.objects.all()
     serializer_class = RoleUpdateSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectOwner]
 
     def get_object(self):
         project = get_object_or_404(Project, pk=self.kwargs["project_id"])
         # ensure the requester is the owner
-        if not ProjectMembership.objects.filter(project=project, user=self.request.user, role="owner").exists():
+        if get_request_role(self.request, project) != "owner":
             raise PermissionDenied("Only the project owner can change roles.")
 
         member = get_object_or_404(ProjectMembership, project=project, user_id=self.kwargs["user_id"])
         if member.role == "owner":
             raise PermissionDenied("Cannot change the owner's role.")
-        return member
\ No newline at end of file
+        return member
+
+class RoleCacheStatsView(APIView):
+    """
+    GET /api/projects/role-cache/stats/   (staff only)
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(role_cache.stats())
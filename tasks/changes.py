@@ -0,0 +1,153 @@
+"""
+Change log behind GET /api/projects/{id}/changes/?since=<cursor>.
+
+Every create, update and delete of a task, subtask, comment or attachment
+appends a Change row (tasks/signals.py; the bulk endpoints record theirs
+directly). A client keeps the cursor of the last change it has seen and
+asks only for what came after, so a sync costs as much as the changes, not
+the project.
+
+Ids are handed out when a row is inserted but become visible when its
+transaction commits, so a young id can appear after an older, larger one
+and a cursor already past it would skip it. How that is prevented depends
+on the database:
+
+* PostgreSQL: each row also records the id of the transaction that wrote
+  it, and the log is read in (txid, id) order up to the xmin of the current
+  snapshot. Every transaction below xmin has finished and every one still
+  running is at or above it, so nothing can commit behind a cursor. Cursors
+  look like "<txid>.<id>".
+* SQLite: one writer at a time holds the database until it commits, so ids
+  become visible in order.
+* Anything else: changes younger than settings.CHANGES_SETTLE_SECONDS are
+  held back, which is only safe if no write transaction runs longer.
+
+prune_changes deletes entries older than settings.CHANGES_RETENTION_DAYS.
+A client whose cursor has been pruned is told to start over (410), since
+it may have missed deletes.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from projects import response_cache
+from .models import Change
+
+PAGE_SIZE = 500
+
+CURSOR = re.compile(r"(?:(\d+)\.)?(\d+)")
+
+
+class CursorExpired(Exception):
+    """The entries around a cursor have been pruned."""
+
+
+def record(project_id, kind, object_ids, action="upsert"):
+    """Log a change to any number of objects of one kind with one INSERT."""
+    rows = [Change(project_id=project_id, kind=kind, object_id=pk, action=action) for pk in object_ids]
+    if connection.vendor == "postgresql":
+        # the id of the transaction the rows will commit with
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_current_xact_id()::text::bigint")
+                txid = cursor.fetchone()[0]
+            for row in rows:
+                row.txid = txid
+            Change.objects.bulk_create(rows)
+    else:
+        Change.objects.bulk_create(rows)
+    # every content write passes through here, so cached lists go stale here too
+    response_cache.bump(project_id)
+
+
+def parse_cursor(text):
+    """(txid, id) from a cursor string; ValueError if it is not one."""
+    match = CURSOR.fullmatch(text or "")
+    if match is None:
+        raise ValueError(text)
+    return int(match.group(1) or 0), int(match.group(2))
+
+
+def format_cursor(cursor):
+    txid, last_id = cursor
+    return f"{txid}.{last_id}" if txid else str(last_id)
+
+
+def _finished():
+    """Log entries whose transaction, and every one before it, has finished."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+            return Q(txid__lt=cursor.fetchone()[0])
+    if connection.vendor == "sqlite":
+        return Q()
+    settle = timedelta(seconds=getattr(settings, "CHANGES_SETTLE_SECONDS", 60))
+    return Q(created_at__lt=timezone.now() - settle)
+
+
+def head(project_id):
+    """The cursor a client starts from before loading the project's lists."""
+    return (
+        Change.objects.filter(_finished(), project_id=project_id)
+        .order_by("-txid", "-id")
+        .values_list("txid", "id")
+        .first()
+        or (0, 0)
+    )
+
+
+def since(project_id, cursor, limit=None):
+    """
+    Up to `limit` log entries after `cursor` (a (txid, id) pair), reduced to
+    the latest action per object. Returns ([(kind, object_id, action), ...],
+    next_cursor, has_more). Raises CursorExpired if the entry the cursor
+    points at has been pruned.
+    """
+    limit = limit or PAGE_SIZE
+    txid, last_id = cursor
+    finished = _finished()
+    if finished:
+        # the cursor's own entry counts even if CHANGES_SETTLE_SECONDS was raised since
+        finished |= Q(txid=txid, id=last_id)
+    rows = list(
+        Change.objects.filter(
+            finished, Q(txid__gt=txid) | Q(txid=txid, id__gte=last_id), project_id=project_id
+        )
+        .order_by("txid", "id")
+        .values_list("txid", "id", "kind", "object_id", "action")[: limit + 2]
+    )
+    if cursor != (0, 0):
+        # the entry at the cursor comes first unless it has been pruned
+        if not rows or rows[0][:2] != cursor:
+            raise CursorExpired(format_cursor(cursor))
+        rows = rows[1:]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = rows[-1][:2]
+
+    latest = {}
+    for _, _, kind, object_id, action in rows:
+        # re-inserting moves the key to the end, keeping log order
+        latest.pop((kind, object_id), None)
+        latest[(kind, object_id)] = action
+    return [(kind, object_id, action) for (kind, object_id), action in latest.items()], cursor, has_more
+
+
+def prune(before, batch_size=1000):
+    """
+    Delete log entries created before `before`, oldest first, in batches of
+    `batch_size`. Returns the number removed.
+    """
+    removed = 0
+    while True:
+        ids = list(
+            Change.objects.filter(created_at__lt=before).order_by("id").values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        removed += Change.objects.filter(pk__in=ids).delete()[0]
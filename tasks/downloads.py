@@ -0,0 +1,168 @@
+"""
+Attachment downloads for GET /api/attachments/{id}/download/ and
+/api/attachments/{id}/thumbnails/{size}/.
+
+The view checks membership; this module answers with the file. It
+supports If-None-Match / If-Modified-Since (304), a single HTTP Range
+(206, or 416 when it lies past the end) and If-Range.
+
+With settings.ATTACHMENT_DOWNLOADS["OFFLOAD"] set, the web server sends the
+bytes and handles Range itself:
+
+    "x-accel-redirect"  nginx; map ACCEL_PREFIX to MEDIA_ROOT in an
+                        `internal` location
+    "x-sendfile"        Apache mod_xsendfile, lighttpd
+
+Otherwise Django streams a FileResponse. Whole files and open-ended ranges
+("bytes=N-", what resuming clients send) keep the real file object, so
+servers that implement wsgi.file_wrapper with os.sendfile (gunicorn) copy
+them without passing through Python.
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date
+
+from .storage import attachment_storage
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def config():
+    config = {"OFFLOAD": None, "ACCEL_PREFIX": "/protected-media/"}
+    config.update(getattr(settings, "ATTACHMENT_DOWNLOADS", {}))
+    return config
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def get_etag(attachment):
+    digest = attachment_storage.digest(attachment.file.name)
+    if digest is None:
+        # files stored before content addressing: their names are never reused
+        digest = hashlib.sha1(attachment.file.name.encode()).hexdigest()[:16]
+    return f'"{attachment.pk}-{digest}"'
+
+
+def parse_range(request, size, etag):
+    """
+    (first, last) byte of the one range to send, or None to send the whole
+    file. Multiple ranges and malformed headers are ignored, as RFC 9110
+    allows.
+    """
+    header = request.headers.get("Range")
+    if not header:
+        return None
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range != etag:
+        return None  # the client's partial copy is of another version
+    match = RANGE.match(header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        length = int(last)  # "bytes=-N": the last N bytes
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    first = int(first)
+    if last != "" and int(last) < first:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable
+    return first, size - 1 if last == "" else min(int(last), size - 1)
+
+
+class _Slice:
+    """`length` bytes of an open file from its current position."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def _filename(attachment):
+    # blobs are named after their digest; send the name the file was uploaded with
+    return attachment.filename or os.path.basename(attachment.file.name)
+
+
+def _offload(storage, name, filename, as_attachment, mode):
+    content_type, _ = mimetypes.guess_type(filename)
+    response = HttpResponse(content_type=content_type or "application/octet-stream")
+    if mode == "x-accel-redirect":
+        response["X-Accel-Redirect"] = config()["ACCEL_PREFIX"] + quote(name)
+    else:
+        response["X-Sendfile"] = storage.path(name)
+    response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    return response
+
+
+def _stream(request, storage, name, filename, as_attachment, etag):
+    try:
+        file = storage.open(name, "rb")
+    except FileNotFoundError:
+        raise Http404("The file for this attachment is missing.")
+    size = file.size
+
+    try:
+        byte_range = parse_range(request, size, etag)
+    except RangeNotSatisfiable:
+        file.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=as_attachment, filename=filename)
+    else:
+        first, last = byte_range
+        file.seek(first)
+        # to the end of the file: keep the real file so sendfile can be used
+        body = file if last == size - 1 else _Slice(file, last - first + 1)
+        response = FileResponse(body, as_attachment=as_attachment, filename=filename, status=206)
+        response["Content-Length"] = last - first + 1
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def serve_file(request, storage, name, *, filename, etag, modified, as_attachment=True):
+    """Answer `request` with the stored file `name`, honouring the conditional and Range headers."""
+    last_modified = int(modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        mode = config()["OFFLOAD"]
+        if mode:
+            response = _offload(storage, name, filename, as_attachment, mode)
+        else:
+            response = _stream(request, storage, name, filename, as_attachment, etag)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # permission-checked content: browsers may keep it, shared caches may not
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def serve(request, attachment):
+    return serve_file(
+        request, attachment.file.storage, attachment.file.name,
+        filename=_filename(attachment), etag=get_etag(attachment), modified=attachment.uploaded_at,
+    )
@@ -0,0 +1,43 @@
+from django.db.models import Q
+from django.utils import timezone
+from django_filters import rest_framework as filters
+
+from .models import Task
+
+
+class TaskFilterSet(filters.FilterSet):
+    """
+    Query parameters for task lists. Each filter is served by an index on
+    tasks_task (see Task.Meta.indexes) or tasks_taskassignment:
+
+        ?status=todo&status=in_progress   ?priority=high
+        ?assignee=<user id>               ?created_by=<user id>
+        ?due_after=2025-01-01&due_before=2025-02-01
+        ?overdue=true
+    """
+
+    status = filters.MultipleChoiceFilter(choices=Task.STATUS_CHOICES)
+    priority = filters.MultipleChoiceFilter(choices=Task.PRIORITY_CHOICES)
+    assignee = filters.NumberFilter(field_name="assignees")
+    created_by = filters.NumberFilter(field_name="created_by_id")
+    due_after = filters.DateFilter(field_name="due_date", lookup_expr="gte")
+    due_before = filters.DateFilter(field_name="due_date", lookup_expr="lte")
+    overdue = filters.BooleanFilter(method="filter_overdue")
+
+    class Meta:
+        model = Task
+        fields = ["status", "priority", "assignee", "created_by", "due_after", "due_before", "overdue"]
+
+    def filter_overdue(self, queryset, name, value):
+        today = timezone.localdate()
+        overdue = Q(due_date__lt=today) & ~Q(status="done")
+        return queryset.filter(overdue if value else ~overdue | Q(due_date__isnull=True))
+
+
+class MyTaskFilterSet(TaskFilterSet):
+    """TaskFilterSet for /api/tasks/mine/, which also spans projects."""
+
+    project = filters.NumberFilter(field_name="project_id")
+
+    class Meta(TaskFilterSet.Meta):
+        fields = TaskFilterSet.Meta.fields + ["project"]
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.uploads import run_pending
+
+
+class Command(BaseCommand):
+    help = "Assemble finalized resumable uploads into attachments (see tasks/uploads.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for finalized uploads.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls when idle.")
+
+    def handle(self, *args, **options):
+        while True:
+            assembled = run_pending()
+            if assembled:
+                self.stdout.write(f"Assembled {assembled} uploads")
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,99 @@
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from projects.models import Project, ProjectMembership
+from projects.roles import role_cache
+from tasks.models import Task, TaskAssignment, Comment
+from tasks.views import TaskListCreateView, CommentListCreateView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway project, render its task and comment lists through "
+        "TaskSerializer/CommentSerializer and through the fast read path "
+        "(config/fastread.py), and compare time and bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tasks", type=int, default=1000)
+        parser.add_argument("--page-size", type=int, default=200)
+        parser.add_argument("--rounds", type=int, default=20)
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            user, project, task = self._seed(options)
+            factory = APIRequestFactory()
+            for label, view, path, kwargs in [
+                ("task list", TaskListCreateView, f"/api/projects/{project.pk}/tasks/", {"project_pk": project.pk}),
+                ("comment list", CommentListCreateView, f"/api/tasks/{task.pk}/comments/", {"task_pk": task.pk}),
+            ]:
+                request = factory.get(path, {"page_size": options["page_size"]}, HTTP_ACCEPT="application/json")
+                force_authenticate(request, user=user)
+                timings, contents = {}, {}
+                for fast in (False, True):
+                    # the response cache would serve both runs the bytes of the first
+                    with override_settings(FAST_LIST_RENDERING=fast, RESPONSE_CACHE={"TTL": 0}):
+                        timings[fast], contents[fast] = self._time(view.as_view(), request, kwargs, options["rounds"])
+                same = contents[False] == contents[True]
+                status = self.style.SUCCESS("identical") if same else self.style.ERROR("DIFFERENT")
+                self.stdout.write(
+                    f"{label}: serializer {timings[False] * 1000:.1f} ms, fast {timings[True] * 1000:.1f} ms "
+                    f"({timings[False] / timings[True]:.1f}x), {len(contents[True])} bytes {status}"
+                )
+                if not same:
+                    failures.append(label)
+            # Never keep the seeded rows.
+            transaction.set_rollback(True)
+        role_cache.clear()
+
+        if failures:
+            raise CommandError("Fast path output differs in: " + ", ".join(failures))
+
+    def _time(self, view, request, kwargs, rounds):
+        best, content = None, None
+        for _ in range(rounds):
+            started = time.perf_counter()
+            response = view(request, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+            content = response.content
+        return best, content
+
+    def _seed(self, options):
+        owner = User.objects.create_user(email="bench-owner@example.com", name="Bench")
+        users = [owner] + User.objects.bulk_create(
+            User(email=f"bench-{i}@example.com", name=f"Bench {i}") for i in range(10)
+        )
+        project = Project.objects.create(name="Bench", start_date=date.today(), created_by=owner)
+        ProjectMembership.objects.bulk_create(
+            ProjectMembership(project=project, user=u, role="owner" if u is owner else "member") for u in users
+        )
+        tasks = Task.objects.bulk_create(
+            Task(
+                project=project,
+                title=f"Task {i}",
+                description="Lorem ipsum dolor sit amet. " * 8,
+                due_date=date.today() if i % 3 else None,
+                created_by=users[i % len(users)],
+            )
+            for i in range(options["tasks"])
+        )
+        TaskAssignment.objects.bulk_create(
+            TaskAssignment(task=t, user=u) for i, t in enumerate(tasks) for u in users[i % 3: i % 3 + 2]
+        )
+        Comment.objects.bulk_create(
+            Comment(task=tasks[0], author=users[i % len(users)], content=f"Comment {i}")
+            for i in range(options["page_size"])
+        )
+        return owner, project, tasks[0]
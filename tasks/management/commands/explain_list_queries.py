@@ -0,0 +1,147 @@
+import re
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from projects.models import Project, ProjectMembership
+from tasks.filters import TaskFilterSet
+from tasks.models import Task, TaskAssignment, Comment, Subtask, Attachment
+from tasks.serializers import TaskSerializer
+
+User = get_user_model()
+
+# Plan lines that mean "read the whole table".
+SEQ_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (\w+)$"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset, EXPLAIN the query behind each list endpoint "
+        "and fail if any of them falls back to a sequential scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=200)
+        parser.add_argument("--tasks-per-project", type=int, default=100)
+        parser.add_argument(
+            "--children-per-task", type=int, default=5,
+            help="Comments, subtasks and attachments per task in the first 20 projects.",
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError(f"Don't know how to read {vendor} query plans.")
+
+        failures = []
+        with transaction.atomic():
+            user, project, task = self._seed(options)
+            for label, queryset in self._queries(user, project, task):
+                plan = self._explain(queryset)
+                scans = self._seq_scans(vendor, plan)
+                status = self.style.ERROR("SEQ SCAN") if scans else self.style.SUCCESS("ok")
+                self.stdout.write(f"{label}: {status}")
+                for line in plan:
+                    self.stdout.write(f"    {line}")
+                if scans:
+                    failures.append(f"{label} ({', '.join(scans)})")
+            # Never keep the seeded rows.
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("Sequential scans in: " + "; ".join(failures))
+
+    def _queries(self, user, project, task):
+        page = 51  # PAGE_SIZE + 1, as fetched by KeysetCursorPagination
+        tasks = Task.objects.filter(project=project)
+        return [
+            ("project list", Project.objects.filter(members=user).order_by("-created_at", "-id")[:page]),
+            ("membership role", ProjectMembership.objects.filter(user=user, project=project).values_list("role")),
+            ("task list", TaskSerializer.setup_eager_loading(tasks).order_by("-created_at", "-id")[:page]),
+            ("task list by status", tasks.filter(status="todo").order_by("-created_at", "-id")[:page]),
+            ("task list by due date", tasks.filter(due_date__lte=date.today())[:page]),
+        ] + [
+            (f"task list ?{query}", TaskFilterSet(params, queryset=tasks).qs.order_by(*order)[:page])
+            for query, params, order in [
+                ("assignee", {"assignee": user.pk}, ("-created_at", "-id")),
+                ("created_by", {"created_by": user.pk}, ("-created_at", "-id")),
+                ("overdue", {"overdue": "true"}, ("-created_at", "-id")),
+                ("due_after&due_before", {"due_after": date.today(), "due_before": date.today()}, ("-created_at", "-id")),
+                ("ordering=title", {}, ("title", "id")),
+                ("ordering=priority", {}, ("priority", "id")),
+                ("ordering=status", {}, ("status", "id")),
+            ]
+        ] + [
+            (
+                "my tasks",
+                Task.objects.filter(
+                    assignees=user,
+                    project_id__in=ProjectMembership.objects.filter(user=user).values("project_id"),
+                ).order_by("-created_at", "-id")[:page],
+            ),
+            ("comment list", Comment.objects.filter(task=task).order_by("-created_at", "-id")[:page]),
+            ("subtask list", Subtask.objects.filter(task=task).order_by("-created_at", "-id")[:page]),
+            ("attachment list", Attachment.objects.filter(task=task).order_by("-uploaded_at", "-id")[:page]),
+        ]
+
+    def _explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        prefix = "EXPLAIN QUERY PLAN" if connection.vendor == "sqlite" else "EXPLAIN"
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+        # SQLite returns (id, parent, notused, detail); PostgreSQL one text column.
+        return [str(row[-1]) for row in rows]
+
+    def _seq_scans(self, vendor, plan):
+        pattern = SEQ_SCAN_PATTERNS[vendor]
+        return [m.group(1) for line in plan if (m := pattern.search(line.strip()))]
+
+    def _seed(self, options):
+        owner = User.objects.create_user(email="explain-owner@example.com", name="Explain")
+        users = [owner] + User.objects.bulk_create(
+            User(email=f"explain-{i}@example.com", name=f"Explain {i}") for i in range(100)
+        )
+        projects = Project.objects.bulk_create(
+            Project(name=f"Explain {i}", start_date=date.today(), created_by=owner)
+            for i in range(options["projects"])
+        )
+        # Only the first few projects belong to the user, like a real account.
+        ProjectMembership.objects.bulk_create(
+            ProjectMembership(project=p, user=owner, role="owner") for p in projects[:5]
+        )
+
+        statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+        Task.objects.bulk_create(
+            Task(
+                project=p,
+                title=f"Task {i}",
+                status=statuses[i % len(statuses)],
+                due_date=date.today() + timedelta(days=i % 60 - 30),
+                created_by=users[i % len(users)],
+            )
+            for p in projects
+            for i in range(options["tasks_per_project"])
+        )
+
+        tasks = list(Task.objects.filter(project__in=projects[:20]))
+        TaskAssignment.objects.bulk_create(
+            TaskAssignment(task=t, user=users[i % len(users)]) for i, t in enumerate(tasks)
+        )
+        per_task = range(options["children_per_task"])
+        Comment.objects.bulk_create(
+            Comment(task=t, author=owner, content="x") for t in tasks for _ in per_task
+        )
+        Subtask.objects.bulk_create(Subtask(task=t, title="x") for t in tasks for _ in per_task)
+        Attachment.objects.bulk_create(
+            Attachment(task=t, uploaded_by=owner, file="attachments/x") for t in tasks for _ in per_task
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return owner, projects[0], tasks[0]
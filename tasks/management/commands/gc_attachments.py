@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tasks.storage import sweep
+
+
+class Command(BaseCommand):
+    help = "Delete attachment files no attachment refers to any more (see tasks/storage.py)."
+
+    def handle(self, *args, **options):
+        removed = sweep()
+        self.stdout.write(f"Removed {removed} unreferenced attachment files")
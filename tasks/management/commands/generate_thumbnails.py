@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tasks.thumbnails import render_missing
+
+
+class Command(BaseCommand):
+    help = "Render missing thumbnails of image attachments and profile pictures (see tasks/thumbnails.py)."
+
+    def handle(self, *args, **options):
+        rendered = render_missing()
+        self.stdout.write(f"Rendered thumbnails for {rendered} images")
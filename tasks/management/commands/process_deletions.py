@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.models import DeletionJob
+from tasks.purge import run_pending
+
+
+class Command(BaseCommand):
+    help = "Purge soft-deleted projects and tasks (see tasks/purge.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls when idle.")
+        parser.add_argument("--retry-failed", action="store_true", help="Run failed jobs again first.")
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            retried = DeletionJob.objects.filter(status="failed").update(status="pending", error="")
+            self.stdout.write(f"Retrying {retried} failed jobs")
+        while True:
+            ran = run_pending()
+            if ran:
+                self.stdout.write(f"Finished {ran} deletion jobs")
+                continue
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.changes import prune
+
+
+class Command(BaseCommand):
+    help = "Delete change log entries older than the retention period (see tasks/changes.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=getattr(settings, "CHANGES_RETENTION_DAYS", 30),
+            help="Keep entries newer than this many days.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        removed = prune(before, batch_size=options["batch_size"])
+        self.stdout.write(f"Removed {removed} change log entries created before {before:%Y-%m-%d}")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from tasks.uploads import expired_before, prune
+
+
+class Command(BaseCommand):
+    help = "Delete resumable upload sessions older than SESSION_TTL, finished or not, and their stored chunks."
+
+    def handle(self, *args, **options):
+        before = expired_before()
+        removed = prune(before)
+        self.stdout.write(f"Removed {removed} upload sessions started before {before:%Y-%m-%d %H:%M}")
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-17 18:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0005_project_updated_at"),
+        ("tasks", "0005_task_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("kind", models.CharField(choices=[("task", "Task"), ("subtask", "Subtask"), ("comment", "Comment"), ("attachment", "Attachment")], max_length=10)),
+                ("object_id", models.IntegerField()),
+                ("action", models.CharField(choices=[("upsert", "Created or updated"), ("delete", "Deleted")], max_length=6)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("project", models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name="+", to="projects.project")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["project", "id"], name="change_project_cursor_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,91 @@
+from django.db import migrations
+
+# Must stay identical to the expressions in tasks/search.py, or PostgreSQL
+# will not use the indexes.
+POSTGRESQL = [
+    (
+        "CREATE INDEX IF NOT EXISTS task_search_idx ON tasks_task USING gin "
+        "((setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', description), 'B')))",
+        "DROP INDEX IF EXISTS task_search_idx",
+    ),
+    (
+        "CREATE INDEX IF NOT EXISTS comment_search_idx ON tasks_comment USING gin "
+        "(to_tsvector('english', content))",
+        "DROP INDEX IF EXISTS comment_search_idx",
+    ),
+    (
+        "CREATE INDEX IF NOT EXISTS subtask_search_idx ON tasks_subtask USING gin "
+        "(to_tsvector('english', title))",
+        "DROP INDEX IF EXISTS subtask_search_idx",
+    ),
+]
+
+# FTS5 tables that index the rows of (table, columns) in place; triggers keep
+# them current on every insert, update and delete.
+SQLITE_SOURCES = [
+    ("tasks_task", ["title", "description"]),
+    ("tasks_comment", ["content"]),
+    ("tasks_subtask", ["title"]),
+]
+
+
+def _sqlite_statements(table, columns):
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN {delete} {insert} END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def _sqlite_has_fts5(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == "postgresql":
+            for create, _ in POSTGRESQL:
+                cursor.execute(create)
+        elif vendor == "sqlite" and _sqlite_has_fts5(cursor):
+            for table, columns in SQLITE_SOURCES:
+                for statement in _sqlite_statements(table, columns):
+                    cursor.execute(statement)
+        # other databases fall back to LIKE scans in tasks/search.py
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == "postgresql":
+            for _, drop in POSTGRESQL:
+                cursor.execute(drop)
+        elif vendor == "sqlite":
+            for table, _ in SQLITE_SOURCES:
+                for suffix in ("_ai", "_ad", "_au"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts{suffix}")
+                cursor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0006_change_log"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0005_project_updated_at"),
+        ("tasks", "0007_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["project", "created_by", "-created_at", "-id"], name="task_project_creator_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["project", "title", "id"], name="task_project_title_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["project", "priority", "id"], name="task_project_priority_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["project", "status", "id"], name="task_project_status_id_idx"),
+        ),
+    ]
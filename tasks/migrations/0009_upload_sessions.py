@@ -0,0 +1,48 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0008_task_filter_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("filename", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField()),
+                ("sha256", models.CharField(max_length=64)),
+                ("received", models.PositiveBigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("task", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="upload_sessions", to="tasks.task")),
+                ("uploaded_by", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="upload_sessions", to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="UploadPart",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("offset", models.PositiveBigIntegerField()),
+                ("size", models.PositiveIntegerField()),
+                ("name", models.CharField(max_length=255)),
+                ("session", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="parts", to="tasks.uploadsession")),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="uploadsession",
+            index=models.Index(fields=["created_at"], name="upload_session_created_idx"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="uploadpart",
+            unique_together={("session", "offset")},
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.3 on 2026-10-17 19:22
+
+import os
+
+import tasks.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_filenames(apps, schema_editor):
+    Attachment = apps.get_model("tasks", "Attachment")
+    batch = []
+    for attachment in Attachment.objects.only("file").iterator(chunk_size=1000):
+        attachment.filename = os.path.basename(attachment.file.name)[:255]
+        batch.append(attachment)
+        if len(batch) == 1000:
+            Attachment.objects.bulk_update(batch, ["filename"])
+            batch = []
+    Attachment.objects.bulk_update(batch, ["filename"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0009_upload_sessions"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attachment",
+            name="filename",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(backfill_filenames, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="attachment",
+            name="file",
+            field=models.FileField(storage=tasks.storage.ContentAddressedStorage(), upload_to="attachments/"),
+        ),
+        migrations.AddIndex(
+            model_name="attachment",
+            index=models.Index(fields=["file"], name="attachment_file_idx"),
+        ),
+    ]
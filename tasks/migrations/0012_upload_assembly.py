@@ -0,0 +1,40 @@
+# Generated by Django 5.0.3 on 2026-10-17 20:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0011_deletion_jobs"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="attachment",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="tasks.attachment"),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="status",
+            field=models.CharField(choices=[("uploading", "Uploading"), ("queued", "Queued"), ("assembling", "Assembling"), ("done", "Done"), ("failed", "Failed")], default="uploading", max_length=10),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="updated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="uploadsession",
+            index=models.Index(fields=["status", "updated_at"], name="upload_session_status_idx"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-17 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0012_upload_assembly"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attachment",
+            name="thumbnail_sizes",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
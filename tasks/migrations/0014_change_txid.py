@@ -0,0 +1,31 @@
+# Generated by Django 5.0.3 on 2026-10-17 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0006_soft_delete"),
+        ("tasks", "0013_attachment_thumbnail_sizes"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="change",
+            name="change_project_cursor_idx",
+        ),
+        migrations.AddField(
+            model_name="change",
+            name="txid",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="change",
+            index=models.Index(fields=["project", "txid", "id"], name="change_project_cursor_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="change",
+            index=models.Index(fields=["created_at"], name="change_created_idx"),
+        ),
+    ]
@@ -1,8 +1,12 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
-from projects.models import Project
+from projects.models import LiveManager, Project
 from django.utils import timezone
 
+from .storage import attachment_storage
+
 User = settings.AUTH_USER_MODEL
 
 
@@ -31,6 +35,8 @@ class Task(models.Model):
         related_name="tasks_created",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
 
     assignees = models.ManyToManyField(
         User,
@@ -39,6 +45,29 @@ class Task(models.Model):
         blank=True,
     )
 
+    objects = LiveManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "status", "-created_at", "-id"], name="task_project_status_idx"),
+            models.Index(fields=["project", "due_date"], name="task_project_due_idx"),
+            # list endpoint: keyset pagination on (created_at, id)
+            models.Index(fields=["project", "-created_at", "-id"], name="task_project_created_idx"),
+            # TaskFilterSet and the ?ordering= fields of the list endpoint
+            models.Index(fields=["project", "created_by", "-created_at", "-id"], name="task_project_creator_idx"),
+            models.Index(fields=["project", "title", "id"], name="task_project_title_idx"),
+            models.Index(fields=["project", "priority", "id"], name="task_project_priority_idx"),
+            models.Index(fields=["project", "status", "id"], name="task_project_status_id_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # lets tasks/stats.py see what a save changed without re-reading the row
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def __str__(self):
         return f"{self.title} ({self.project.name})"
 
@@ -65,6 +94,11 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["task", "-created_at", "-id"], name="comment_task_created_idx"),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author} on {self.task}"
 
@@ -86,6 +120,15 @@ class Subtask(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["task", "-created_at", "-id"], name="subtask_task_created_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
     def __str__(self):
         return f"{self.title} [{self.status}] → {self.task}"
@@ -98,11 +141,164 @@ class Attachment(models.Model):
     uploaded_by = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="attachments"
     )
-    file = models.FileField(upload_to="attachments/")
+    # content-addressed: attachments with the same bytes share one file
+    file = models.FileField(upload_to="attachments/", storage=attachment_storage)
+    filename = models.CharField(max_length=255, blank=True)
+    # sizes whose thumbnails are stored, see tasks/thumbnails.py
+    thumbnail_sizes = models.JSONField(default=list, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-uploaded_at"]
+        indexes = [
+            models.Index(fields=["task", "-uploaded_at", "-id"], name="attachment_task_uploaded_idx"),
+            models.Index(fields=["file"], name="attachment_file_idx"),
+        ]
+
+    def __str__(self):
+        return f"Attachment for {self.task} by {self.uploaded_by}"
+
+class Change(models.Model):
+    """
+    Append-only log of writes to a project's tasks, subtasks, comments and
+    attachments. (txid, id) is the sync cursor (see tasks/changes.py).
+    """
+
+    KIND_CHOICES = [
+        ("task", "Task"),
+        ("subtask", "Subtask"),
+        ("comment", "Comment"),
+        ("attachment", "Attachment"),
+    ]
+    ACTION_CHOICES = [
+        ("upsert", "Created or updated"),
+        ("delete", "Deleted"),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    # no database constraint: cascade deletes of a project log their
+    # children's tombstones before the project row goes
+    project = models.ForeignKey(
+        Project, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    # PostgreSQL transaction id of the write; 0 on other databases
+    txid = models.BigIntegerField(default=0, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "txid", "id"], name="change_project_cursor_idx"),
+            models.Index(fields=["created_at"], name="change_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.kind} {self.object_id}"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable attachment upload (see tasks/uploads.py). The Attachment row
+    only exists once the finalized session has been assembled.
+    """
+
+    STATUS_CHOICES = [
+        ("uploading", "Uploading"),
+        ("queued", "Queued"),
+        ("assembling", "Assembling"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="upload_sessions")
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    # bytes stored so far; the next chunk must start here
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="uploading")
+    attachment = models.ForeignKey(
+        Attachment, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # set when assembly starts; an assembly that started long ago has lost its worker
+    updated_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="upload_session_created_idx"),
+            models.Index(fields=["status", "updated_at"], name="upload_session_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.received}/{self.size})"
+
+
+class UploadPart(models.Model):
+    """One stored chunk of an UploadSession, at byte `offset` of the file."""
+
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name="parts")
+    offset = models.PositiveBigIntegerField()
+    size = models.PositiveIntegerField()
+    # storage name of the chunk
+    name = models.CharField(max_length=255)
+
+    class Meta:
+        # two requests racing to store the same chunk: the second one fails
+        unique_together = ("session", "offset")
+
+    def __str__(self):
+        return f"{self.session_id} @ {self.offset}"
+
+
+class DeletionJob(models.Model):
+    """
+    Background purge of a soft-deleted project or task (see tasks/purge.py).
+    Polled by the client through GET /api/deletions/<id>/.
+    """
+
+    KIND_CHOICES = [
+        ("project", "Project"),
+        ("task", "Task"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=7, choices=KIND_CHOICES)
+    # no database constraints: the job outlives the rows it deletes
+    project = models.ForeignKey(
+        Project, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name="+"
+    )
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default="pending")
+    # rows to delete, counted when the job starts, and rows deleted so far
+    total = models.PositiveBigIntegerField(default=0)
+    deleted = models.PositiveBigIntegerField(default=0)
+    files_removed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # touched after every batch; a running job that stops being touched has lost its worker
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="deletion_job_status_idx"),
+        ]
 
     def __str__(self):
-        return f"Attachment for {self.task} by {self.uploaded_by}"
\ No newline at end of file
+        target = f"task {self.task_id}" if self.kind == "task" else f"project {self.project_id}"
+        return f"Deletion of {target} ({self.status})"
@@ -0,0 +1,259 @@
+"""
+Asynchronous deletion of projects and tasks.
+
+Django's cascade collector loads every dependent row, sends signals for each
+and deletes them all in one transaction, and it leaves attachment files on
+disk. For a large project that holds the request and its locks for as long
+as that takes. Instead:
+
+1. delete_project() / delete_task() soft-delete in the request. They set
+   deleted_at, which hides the row from the default managers
+   (projects.models.LiveManager). A project also loses its memberships, so
+   nothing in it can be reached any more. A task leaves the counters and
+   gets its tombstone in the change log. Both queue a DeletionJob.
+2. The job purges the dependent tables one by one, in batches of
+   settings.DELETIONS["BATCH_SIZE"] rows with a short transaction each,
+   using plain DELETE ... WHERE id IN (...) statements: no collector and no
+   per-row signals. What those signals would have done is done per batch
+   instead: tombstones for the task's children (a project's log goes with
+   it), unread counters of deleted notifications, stored upload chunks, and
+   attachment blobs, which are collected once nothing refers to them
+   (tasks/storage.py). Search indexes follow by themselves; the SQLite FTS
+   triggers fire for bulk deletes too.
+3. Last, the task or project row.
+
+Jobs run the way notification fan-out does (notifications/worker.py).
+settings.DELETIONS["WORKER"] == "thread" runs them in a background thread
+of the web process once the request commits. With "command", run
+``manage.py process_deletions --loop``. Purging is idempotent, so a running
+job that has not progressed for STALE_SECONDS is taken over by
+process_deletions.
+"""
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from notifications.inbox import add_unread
+from notifications.models import Notification, NotificationEvent
+from projects import response_cache
+from projects.models import Project, ProjectMembership, ProjectStats
+from . import changes, stats, storage
+from .models import (Attachment, Change, Comment, DeletionJob, Subtask, Task,
+                     TaskAssignment, UploadPart, UploadSession)
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def config():
+    config = {"WORKER": "thread", "BATCH_SIZE": 1000, "STALE_SECONDS": 600}
+    config.update(getattr(settings, "DELETIONS", {}))
+    return config
+
+
+def delete_project(project, user):
+    """
+    Soft-delete `project` and queue its purge. Returns the DeletionJob, or
+    None if another request deleted it first.
+    """
+    with transaction.atomic():
+        if not Project.all_objects.filter(pk=project.pk, deleted_at__isnull=True).update(deleted_at=timezone.now()):
+            return None
+        # few rows; their signals drop the cached roles
+        ProjectMembership.objects.filter(project_id=project.pk).delete()
+        response_cache.bump(project.pk)
+        job = DeletionJob.objects.create(kind="project", project_id=project.pk, requested_by=user)
+        schedule(job)
+    return job
+
+
+def delete_task(task, user):
+    """
+    Soft-delete `task` and queue its purge. Returns the DeletionJob, or None
+    if another request deleted it first.
+    """
+    with transaction.atomic():
+        # the counters, tombstone and job follow only the request that hid it
+        if not Task.all_objects.filter(pk=task.pk, deleted_at__isnull=True).update(deleted_at=timezone.now()):
+            return None
+        subtasks = Subtask.objects.filter(task_id=task.pk).aggregate(
+            total=Count("pk"), done=Count("pk", filter=Q(status="done"))
+        )
+        stats.apply_deltas(task.project_id, stats.merge(
+            stats.task_counters(task.status, task.priority, sign=-1),
+            {"subtasks_total": -subtasks["total"], "subtasks_done": -subtasks["done"]},
+        ))
+        changes.record(task.project_id, "task", [task.pk], action="delete")
+        job = DeletionJob.objects.create(kind="task", project_id=task.project_id, task_id=task.pk, requested_by=user)
+        schedule(job)
+    return job
+
+
+def _steps(job):
+    """
+    [(queryset, fields, hook), ...] in an order the foreign keys allow.
+    hook(job, rows) runs in the batch's transaction and returns a callable
+    to run once it has committed, or None.
+    """
+    if job.kind == "project":
+        of_tasks = {"task__project_id": job.project_id}
+        of_notifications = {"project_id": job.project_id}
+        tasks = Task.all_objects.filter(project_id=job.project_id)
+    else:
+        of_tasks = {"task_id": job.task_id}
+        of_notifications = {"task_id": job.task_id}
+        tasks = Task.all_objects.filter(pk=job.task_id)
+    steps = [
+        (Notification.objects.filter(**of_notifications), ["recipient_id", "is_read"], _forget_unread),
+        (NotificationEvent.objects.filter(**of_notifications), [], None),
+        (UploadPart.objects.filter(**{f"session__{k}": v for k, v in of_tasks.items()}), ["name"], _delete_parts),
+        (UploadSession.objects.filter(**of_tasks), [], None),
+        (TaskAssignment.objects.filter(**of_tasks), [], None),
+        (Subtask.objects.filter(**of_tasks), [], _tombstones("subtask")),
+        (Comment.objects.filter(**of_tasks), [], _tombstones("comment")),
+        (Attachment.objects.filter(**of_tasks), ["file"], _collect_blobs),
+        (tasks, [], _drop_stragglers),
+    ]
+    if job.kind == "project":
+        steps += [
+            (Change.objects.filter(project_id=job.project_id), [], None),
+            (ProjectStats.objects.filter(project_id=job.project_id), [], None),
+            (ProjectMembership.objects.filter(project_id=job.project_id), [], None),
+            (Project.all_objects.filter(pk=job.project_id), [], None),
+        ]
+    return steps
+
+
+def _forget_unread(job, rows):
+    unread = Counter(row["recipient_id"] for row in rows if not row["is_read"])
+    add_unread({user_id: -n for user_id, n in unread.items()})
+
+
+def _delete_parts(job, rows):
+    names = [row["name"] for row in rows]
+
+    def delete():
+        for name in names:
+            default_storage.delete(name)
+        return len(names)
+    return delete
+
+
+def _tombstones(kind):
+    def record(job, rows):
+        # clients of a deleted project lost access; its log is dropped anyway
+        if job.kind == "task":
+            changes.record(job.project_id, kind, [row["pk"] for row in rows], action="delete")
+    return record
+
+
+def _collect_blobs(job, rows):
+    _tombstones("attachment")(job, rows)
+    names = {row["file"] for row in rows}
+    return lambda: len(storage.collect(names))
+
+
+def _drop_stragglers(job, rows):
+    """Children written by requests that were already past their permission checks."""
+    task_ids = [row["pk"] for row in rows]
+    for queryset in [
+        Notification.objects.filter(task_id__in=task_ids),
+        NotificationEvent.objects.filter(task_id__in=task_ids),
+        UploadPart.objects.filter(session__task_id__in=task_ids),
+        UploadSession.objects.filter(task_id__in=task_ids),
+        TaskAssignment.objects.filter(task_id__in=task_ids),
+        Subtask.objects.filter(task_id__in=task_ids),
+        Comment.objects.filter(task_id__in=task_ids),
+        Attachment.objects.filter(task_id__in=task_ids),
+    ]:
+        queryset._raw_delete(queryset.db)
+
+
+def _purge_step(job, queryset, fields, hook, batch_size):
+    while True:
+        after_commit = None
+        with transaction.atomic():
+            rows = list(queryset.order_by("pk").values("pk", *fields)[:batch_size])
+            if not rows:
+                return
+            if hook is not None:
+                after_commit = hook(job, rows)
+            # no collector, no signals: one DELETE for the whole batch
+            batch = queryset.model._base_manager.filter(pk__in=[row["pk"] for row in rows])
+            batch._raw_delete(batch.db)
+        files_removed = after_commit() if after_commit else 0
+        DeletionJob.objects.filter(pk=job.pk).update(
+            deleted=F("deleted") + len(rows),
+            files_removed=F("files_removed") + (files_removed or 0),
+            updated_at=timezone.now(),
+        )
+
+
+def purge(job):
+    steps = _steps(job)
+    remaining = sum(queryset.count() for queryset, _, _ in steps)
+    DeletionJob.objects.filter(pk=job.pk).update(total=F("deleted") + remaining, updated_at=timezone.now())
+    batch_size = config()["BATCH_SIZE"]
+    for queryset, fields, hook in steps:
+        _purge_step(job, queryset, fields, hook, batch_size)
+    response_cache.bump(job.project_id)
+
+
+def _runnable():
+    stale = timezone.now() - timedelta(seconds=config()["STALE_SECONDS"])
+    return Q(status="pending") | Q(status="running", updated_at__lt=stale)
+
+
+def run(job_id):
+    """Claim and run one job. Returns False when it is not waiting or is being run elsewhere."""
+    claimed = DeletionJob.objects.filter(_runnable(), pk=job_id).update(status="running", updated_at=timezone.now())
+    if not claimed:
+        return False
+    job = DeletionJob.objects.get(pk=job_id)
+    try:
+        purge(job)
+    except Exception as exc:
+        DeletionJob.objects.filter(pk=job_id).update(status="failed", error=str(exc), finished_at=timezone.now())
+        raise
+    DeletionJob.objects.filter(pk=job_id).update(status="done", finished_at=timezone.now())
+    return True
+
+
+def run_pending():
+    """Run every waiting or abandoned job, oldest first. Returns how many ran."""
+    job_ids = list(DeletionJob.objects.filter(_runnable()).order_by("created_at").values_list("pk", flat=True))
+    return sum(run(job_id) for job_id in job_ids)
+
+
+def schedule(job):
+    """Have the job run in the background once the current transaction commits."""
+    if config()["WORKER"] != "thread":
+        return
+    job_id = job.pk
+    transaction.on_commit(lambda: _submit(job_id))
+
+
+def _submit(job_id):
+    global _executor
+    if _executor is None:
+        # one thread: purges are long and would only compete for the same tables
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deletions")
+    _executor.submit(_run, job_id)
+
+
+def _run(job_id):
+    close_old_connections()
+    try:
+        run(job_id)
+    except Exception:
+        logger.exception("Deletion job %s failed; process_deletions --retry-failed runs it again.", job_id)
+    finally:
+        connection.close()
@@ -0,0 +1,236 @@
+"""
+Push task, comment and subtask changes to WebSocket subscribers.
+
+Views call broadcast() after a save. Once the transaction commits the
+message goes to the configured backend, which hands it to the Hub of every
+ASGI process; the hub copies it onto the queue of each socket subscribed to
+that project (see tasks/websocket.py).
+
+settings.REALTIME:
+    BACKEND     "tasks.realtime.InMemoryBackend" (one process; also used in
+                tests) or "tasks.realtime.PostgresBackend" (LISTEN/NOTIFY,
+                so every ASGI process sees saves made by any other process)
+    QUEUE_SIZE  messages buffered per socket before it is treated as slow
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Sent in place of everything a slow socket missed; the client refetches over REST.
+RESYNC = json.dumps({"type": "resync"})
+
+
+def _config():
+    config = {"BACKEND": "tasks.realtime.InMemoryBackend", "QUEUE_SIZE": 100}
+    config.update(getattr(settings, "REALTIME", {}))
+    return config
+
+
+class InMemoryBackend:
+    """Delivers straight to this process's hub."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def start(self):
+        pass
+
+    def publish(self, project_id, text):
+        self.deliver(project_id, text)
+
+
+class PostgresBackend:
+    """
+    Carries messages between processes with NOTIFY on a single channel. Each
+    ASGI process runs one listener thread on its own connection. When that
+    connection fails the thread logs it, waits (doubling the delay up to
+    max_retry_delay) and listens again on a new one; subscribers are sent a
+    resync, since whatever was published in between is lost.
+    """
+
+    channel = "tasker_realtime"
+    # NOTIFY payloads are capped at 8000 bytes
+    max_payload = 7900
+    # seconds between reconnect attempts
+    min_retry_delay = 1
+    max_retry_delay = 30
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name="realtime-listen", daemon=True)
+                self._thread.start()
+
+    def publish(self, project_id, text):
+        payload = f"{project_id}:{text}"
+        if len(payload.encode()) > self.max_payload:
+            # too big to carry: say what changed and let clients fetch it
+            message = json.loads(text)
+            message.pop("data", None)
+            payload = f"{project_id}:{json.dumps(message)}"
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, payload])
+
+    def _listen(self):
+        delay = self.min_retry_delay
+        reconnecting = False
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                if reconnecting:
+                    self.deliver(None, RESYNC)
+                reconnecting = True
+                delay = self.min_retry_delay
+                self._receive(conn)
+            except Exception:
+                logger.exception("Realtime listener failed; reconnecting in %s s", delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        conn = psycopg2.connect(**connection.get_connection_params())
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        conn.cursor().execute(f"LISTEN {self.channel}")
+        return conn
+
+    def _receive(self, conn):
+        while True:
+            if select.select([conn], [], [], 5) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                project_id, _, text = conn.notifies.pop(0).payload.partition(":")
+                self.deliver(int(project_id), text)
+
+
+class Subscription:
+    """
+    One socket's bounded queue. When the consumer falls QUEUE_SIZE messages
+    behind, its backlog is dropped and replaced by a single resync message,
+    so a slow client costs a fixed amount of memory.
+    """
+
+    def __init__(self, project_id, maxsize):
+        self.project_id = project_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, text):
+        # runs on self.loop
+        if self.queue.full():
+            while not self.queue.empty():
+                if self.queue.get_nowait() != RESYNC:
+                    self.dropped += 1
+            text = RESYNC
+        self.queue.put_nowait(text)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Hub:
+    """This process's subscribers, grouped by project."""
+
+    def __init__(self, backend_class, queue_size):
+        self.queue_size = queue_size
+        self.backend = backend_class(self.dispatch)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, project_id):
+        """Call from the socket's event loop."""
+        self.backend.start()
+        subscription = Subscription(project_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            group = self._subscribers.get(subscription.project_id, set())
+            group.discard(subscription)
+            if not group:
+                self._subscribers.pop(subscription.project_id, None)
+
+    def dispatch(self, project_id, text):
+        """
+        Hand a message to the project's local subscribers, or to all of them
+        when project_id is None. Safe to call from any thread.
+        """
+        with self._lock:
+            if project_id is None:
+                subscribers = [s for group in self._subscribers.values() for s in group]
+            else:
+                subscribers = list(self._subscribers.get(project_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, text)
+            except RuntimeError:
+                # the socket's loop has closed; it will unsubscribe itself
+                pass
+
+    def subscriber_count(self, project_id=None):
+        with self._lock:
+            if project_id is not None:
+                return len(self._subscribers.get(project_id, ()))
+            return sum(len(group) for group in self._subscribers.values())
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                config = _config()
+                _hub = Hub(import_string(config["BACKEND"]), config["QUEUE_SIZE"])
+    return _hub
+
+
+def broadcast(project_id, event, pk, data=None):
+    """
+    Tell the project's subscribers that an object changed, e.g.
+    broadcast(task.project_id, "task.updated", task.pk, serializer.data).
+    Sent only if the surrounding transaction commits.
+    """
+    message = {"type": event, "project": project_id, "id": pk}
+    if data is not None:
+        message["data"] = data
+    text = json.dumps(message, cls=DjangoJSONEncoder)
+
+    def send():
+        try:
+            get_hub().backend.publish(project_id, text)
+        except Exception:
+            logger.exception("Could not broadcast %s for project %s", event, project_id)
+
+    transaction.on_commit(send)
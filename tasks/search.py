@@ -0,0 +1,169 @@
+"""
+Ranked full-text search over task titles and descriptions, comments and
+subtask titles, limited to the projects the user belongs to.
+
+PostgreSQL matches against GIN expression indexes; SQLite against FTS5 tables
+that triggers keep in step with every write (both set up by migration
+tasks/0007_search_index). Any other database falls back to LIKE scans.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from projects.models import ProjectMembership
+from .models import Task, Comment, Subtask
+
+MAX_RESULTS = 50
+
+# Must match the index expressions in tasks/migrations/0007_search_index.py.
+TASK_VECTOR = "(setweight(to_tsvector('english', t.title), 'A') || setweight(to_tsvector('english', t.description), 'B'))"
+COMMENT_VECTOR = "to_tsvector('english', c.content)"
+SUBTASK_VECTOR = "to_tsvector('english', s.title)"
+# ts_rank weights for {D, C, B, A}: comments and subtasks (D) count like descriptions (B)
+RANK_WEIGHTS = "'{0.4, 0.2, 0.4, 1.0}'"
+
+_PROJECTS = "SELECT project_id FROM projects_projectmembership WHERE user_id = %s"
+
+
+def _scope(project_id):
+    sql = f"t.deleted_at IS NULL AND t.project_id IN ({_PROJECTS})"
+    return (sql + " AND t.project_id = %s") if project_id else sql
+
+
+def _search_postgresql(cursor, user_id, text, project_id, limit):
+    scope = _scope(project_id)
+    scope_params = [user_id, project_id] if project_id else [user_id]
+    cursor.execute(
+        f"""
+        WITH q AS (SELECT websearch_to_tsquery('english', %s) AS query)
+        SELECT 'task', t.id, ts_rank({RANK_WEIGHTS}, {TASK_VECTOR}, q.query) AS score
+          FROM tasks_task t, q
+         WHERE {TASK_VECTOR} @@ q.query AND {scope}
+        UNION ALL
+        SELECT 'comment', c.id, ts_rank({RANK_WEIGHTS}, {COMMENT_VECTOR}, q.query)
+          FROM tasks_comment c JOIN tasks_task t ON t.id = c.task_id, q
+         WHERE {COMMENT_VECTOR} @@ q.query AND {scope}
+        UNION ALL
+        SELECT 'subtask', s.id, ts_rank({RANK_WEIGHTS}, {SUBTASK_VECTOR}, q.query)
+          FROM tasks_subtask s JOIN tasks_task t ON t.id = s.task_id, q
+         WHERE {SUBTASK_VECTOR} @@ q.query AND {scope}
+        ORDER BY score DESC, 2
+        LIMIT %s
+        """,
+        [text, *scope_params, *scope_params, *scope_params, limit],
+    )
+    return cursor.fetchall()
+
+
+def _fts5_query(text):
+    # quote every word so user input can never be read as FTS5 syntax
+    return " ".join('"%s"' % word for word in re.findall(r"\w+", text))
+
+
+def _search_sqlite(cursor, user_id, text, project_id, limit):
+    match = _fts5_query(text)
+    if not match:
+        return []
+    scope = _scope(project_id)
+    params = [match, user_id, project_id] if project_id else [match, user_id]
+    # bm25() is lower for better matches; titles weigh 2.5x descriptions
+    cursor.execute(
+        f"""
+        SELECT 'task', t.id, -bm25(tasks_task_fts, 2.5, 1.0) AS score
+          FROM tasks_task_fts JOIN tasks_task t ON t.id = tasks_task_fts.rowid
+         WHERE tasks_task_fts MATCH %s AND {scope}
+        UNION ALL
+        SELECT 'comment', c.id, -bm25(tasks_comment_fts)
+          FROM tasks_comment_fts JOIN tasks_comment c ON c.id = tasks_comment_fts.rowid
+          JOIN tasks_task t ON t.id = c.task_id
+         WHERE tasks_comment_fts MATCH %s AND {scope}
+        UNION ALL
+        SELECT 'subtask', s.id, -bm25(tasks_subtask_fts)
+          FROM tasks_subtask_fts JOIN tasks_subtask s ON s.id = tasks_subtask_fts.rowid
+          JOIN tasks_task t ON t.id = s.task_id
+         WHERE tasks_subtask_fts MATCH %s AND {scope}
+        ORDER BY score DESC, 2
+        LIMIT %s
+        """,
+        [*params, *params, *params, limit],
+    )
+    return cursor.fetchall()
+
+
+def _search_fallback(user_id, text, project_id, limit):
+    words = re.findall(r"\w+", text)
+    if not words:
+        return []
+    projects = ProjectMembership.objects.filter(user_id=user_id).values("project_id")
+    if project_id:
+        projects = projects.filter(project_id=project_id)
+    sources = [
+        ("task", Task.objects.filter(project_id__in=projects), ["title", "description"]),
+        ("comment", Comment.objects.filter(task__project_id__in=projects, task__deleted_at__isnull=True), ["content"]),
+        ("subtask", Subtask.objects.filter(task__project_id__in=projects, task__deleted_at__isnull=True), ["title"]),
+    ]
+    rows = []
+    for kind, queryset, fields in sources:
+        for word in words:
+            match = Q()
+            for field in fields:
+                match |= Q(**{f"{field}__icontains": word})
+            queryset = queryset.filter(match)
+        rows += [(kind, pk, 0.0) for pk in queryset.values_list("pk", flat=True)[:limit]]
+    return rows[:limit]
+
+
+_has_fts5 = None
+
+
+def _sqlite_has_index():
+    global _has_fts5
+    if _has_fts5 is None:
+        _has_fts5 = "tasks_task_fts" in connection.introspection.table_names()
+    return _has_fts5
+
+
+def _hydrate(rows):
+    ids = {"task": [], "comment": [], "subtask": []}
+    for kind, pk, _ in rows:
+        ids[kind].append(pk)
+
+    found = {}
+    if ids["task"]:
+        for pk, project_id, title in Task.objects.filter(pk__in=ids["task"]).values_list("pk", "project_id", "title"):
+            found["task", pk] = {"project": project_id, "task": pk, "text": title}
+    if ids["comment"]:
+        for pk, task_id, project_id, content in Comment.objects.filter(pk__in=ids["comment"]).values_list(
+            "pk", "task_id", "task__project_id", "content"
+        ):
+            found["comment", pk] = {"project": project_id, "task": task_id, "text": content[:200]}
+    if ids["subtask"]:
+        for pk, task_id, project_id, title in Subtask.objects.filter(pk__in=ids["subtask"]).values_list(
+            "pk", "task_id", "task__project_id", "title"
+        ):
+            found["subtask", pk] = {"project": project_id, "task": task_id, "text": title}
+
+    return [
+        {"kind": kind, "id": pk, **found[kind, pk], "rank": round(score, 6)}
+        for kind, pk, score in rows
+        if (kind, pk) in found
+    ]
+
+
+def search(user, text, project_id=None, limit=20):
+    """
+    Best matches first, as [{"kind", "id", "project", "task", "text", "rank"}].
+    Ranks are only comparable within one response.
+    """
+    limit = min(limit, MAX_RESULTS)
+    vendor = connection.vendor
+    if vendor == "postgresql":
+        with connection.cursor() as cursor:
+            rows = _search_postgresql(cursor, user.pk, text, project_id, limit)
+    elif vendor == "sqlite" and _sqlite_has_index():
+        with connection.cursor() as cursor:
+            rows = _search_sqlite(cursor, user.pk, text, project_id, limit)
+    else:
+        rows = _search_fallback(user.pk, text, project_id, limit)
+    return _hydrate(rows)
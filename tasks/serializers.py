@@ -1,10 +1,61 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from django.contrib.auth import get_user_model
-from .models import Task, TaskAssignment, Comment, Subtask, Attachment
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from .models import Task, TaskAssignment, Comment, Subtask, Attachment, DeletionJob, UploadSession
+from projects.models import ProjectMembership
+from accounts.serializers import UserSerializer
+from config.sparse import SparseFieldsMixin
+from notifications.events import build_event, publish_many
+from . import changes, stats, thumbnails, uploads
 
 User = get_user_model()
 
 
+def sync_assignees(assignees_by_task):
+    """
+    Make each task's assignees match {task_id: [user_id, ...]} with one
+    SELECT, one DELETE and one bulk INSERT, however many tasks change.
+    Returns the newly added assignees as {task_id: [user_id, ...]}.
+    """
+    wanted = {task_id: set(user_ids) for task_id, user_ids in assignees_by_task.items()}
+    if not wanted:
+        return {}
+
+    stale, current = [], set()
+    existing = TaskAssignment.objects.filter(task_id__in=wanted).values_list("pk", "task_id", "user_id")
+    for pk, task_id, user_id in existing:
+        if user_id in wanted[task_id]:
+            current.add((task_id, user_id))
+        else:
+            stale.append(pk)
+
+    if stale:
+        TaskAssignment.objects.filter(pk__in=stale).delete()
+    added = {
+        task_id: sorted(user_id for user_id in user_ids if (task_id, user_id) not in current)
+        for task_id, user_ids in wanted.items()
+    }
+    TaskAssignment.objects.bulk_create(
+        TaskAssignment(task_id=task_id, user_id=user_id)
+        for task_id, user_ids in added.items()
+        for user_id in user_ids
+    )
+    return {task_id: user_ids for task_id, user_ids in added.items() if user_ids}
+
+
+def notify_assigned(context, tasks, added):
+    """Queue one task_assigned event per task that gained assignees."""
+    actor = getattr(context.get("request"), "user", None)
+    publish_many([
+        build_event("task_assigned", actor=actor, project=task.project_id, task=task, user_ids=added[task.pk])
+        for task in tasks
+        if added.get(task.pk)
+    ])
+
+
 class TaskAssignmentSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
 
@@ -13,47 +64,225 @@ class TaskAssignmentSerializer(serializers.ModelSerializer):
         fields = ["id", "user", "assigned_at"]
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class AssigneesField(serializers.ListField):
+    """
+    Assignee user ids, which must belong to members of the task's project.
+
+    The project comes from the task being updated or from context["project"].
+    Membership answers are cached in the serializer context, so a bulk
+    request checks all of its ids with one query.
+    """
+    child = serializers.IntegerField(min_value=1)
+    default_error_messages = {
+        "not_member": "Users {ids} are not members of this project.",
+    }
+
+    def to_representation(self, value):
+        return [user.pk for user in value.all()]
+
+    def to_internal_value(self, data):
+        user_ids = list(dict.fromkeys(super().to_internal_value(data)))
+        members = self.load_member_ids(user_ids)
+        unknown = [pk for pk in user_ids if pk not in members]
+        if unknown:
+            self.fail("not_member", ids=", ".join(map(str, unknown)))
+        return user_ids
+
+    def load_member_ids(self, user_ids):
+        cache = self.context.setdefault("_assignee_checks", {})
+        missing = [pk for pk in user_ids if pk not in cache]
+        if missing:
+            project_id = self._project_id()
+            if project_id is None:
+                found = User.objects.filter(pk__in=missing).values_list("pk", flat=True)
+            else:
+                found = ProjectMembership.objects.filter(
+                    project_id=project_id, user_id__in=missing
+                ).values_list("user_id", flat=True)
+            found = set(found)
+            cache.update({pk: pk in found for pk in missing})
+        return {pk for pk in user_ids if cache[pk]}
+
+    def _project_id(self):
+        project = self.context.get("project")
+        if project is not None:
+            return getattr(project, "pk", project)
+        instance = getattr(self.parent, "instance", None)
+        return getattr(instance, "project_id", None)
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """Creates a batch of tasks and their assignments with bulk inserts."""
+
+    def to_internal_value(self, data):
+        # Check every assignee in the batch with one query up front.
+        if isinstance(data, list):
+            user_ids = {
+                pk
+                for item in data
+                if isinstance(item, dict) and isinstance(item.get("assignees"), list)
+                for pk in item["assignees"]
+                if isinstance(pk, int)
+            }
+            self.child.fields["assignees"].load_member_ids(user_ids)
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        assignees = [item.pop("assignees", []) for item in validated_data]
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(Task(**item) for item in validated_data)
+            added = sync_assignees({task.pk: users for task, users in zip(tasks, assignees) if users})
+            notify_assigned(self.context, tasks, added)
+            if tasks:
+                # bulk_create() sends no post_save, so count and log the new tasks here
+                stats.apply_deltas(
+                    tasks[0].project_id,
+                    stats.merge(*(stats.task_counters(t.status, t.priority) for t in tasks)),
+                )
+                changes.record(tasks[0].project_id, "task", [t.pk for t in tasks])
+        return tasks
+
+
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source="created_by.email")
-    assignees = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=User.objects.all(), required=False
-    )
+    assignees = AssigneesField(required=False)
 
     class Meta:
         model = Task
         fields = [
             "id", "project", "title", "description", "due_date",
-            "priority", "status", "created_by", "created_at", "assignees"
+            "priority", "status", "created_by", "created_at", "updated_at", "assignees"
         ]
-        read_only_fields = ["id", "created_by", "created_at"]
+        read_only_fields = ["id", "project", "created_by", "created_at", "updated_at"]
+        list_serializer_class = TaskListSerializer
+        expandable_fields = {"created_by": UserSerializer, "assignees": UserSerializer}
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load creators and assignee ids alongside the tasks so serializing a
+        list costs a fixed number of queries.
+        """
+        return queryset.select_related("created_by").prefetch_related(
+            Prefetch("assignees", queryset=User.objects.only("id"))
+        )
+
+    @classmethod
+    def setup_prefetch(cls, queryset, wanted, expand):
+        if "assignees" not in wanted:
+            return queryset
+        users = User.objects.all() if "assignees" in expand else User.objects.only("id")
+        return queryset.prefetch_related(Prefetch("assignees", queryset=users))
 
     def create(self, validated_data):
         assignees = validated_data.pop("assignees", [])
-        task = Task.objects.create(**validated_data)
-        for user in assignees:
-            TaskAssignment.objects.create(task=task, user=user)
+        if not assignees:
+            return Task.objects.create(**validated_data)
+
+        with transaction.atomic():
+            task = Task.objects.create(**validated_data)
+            TaskAssignment.objects.bulk_create(
+                TaskAssignment(task=task, user_id=user_id) for user_id in assignees
+            )
+            notify_assigned(self.context, [task], {task.pk: assignees})
         return task
 
     def update(self, instance, validated_data):
         assignees = validated_data.pop("assignees", None)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
-
-        if assignees is not None:
-            instance.assignees.set(assignees)
+        if assignees is None:
+            instance.save()
+            return instance
 
+        with transaction.atomic():
+            instance.save()
+            added = sync_assignees({instance.pk: assignees})
+            notify_assigned(self.context, [instance], added)
         return instance
-    
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class TaskBulkUpdateListSerializer(serializers.ListSerializer):
+    """
+    Applies a batch of partial updates to tasks drawn from the queryset
+    passed as `instance`. Errors are reported per item, in request order.
+    """
+
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+
+        request = self.context["request"]
+        can_edit_any = self.context["role"] in ("admin", "owner")
+        ids = [item["id"] for item in items]
+        tasks = self.instance.in_bulk(ids)
+
+        errors, seen = [], set()
+        for task_id in ids:
+            task = tasks.get(task_id)
+            if task is None:
+                errors.append({"id": ["Task not found in this project."]})
+            elif task_id in seen:
+                errors.append({"id": ["Task listed more than once."]})
+            elif not can_edit_any and task.created_by_id != request.user.pk:
+                errors.append({"id": ["You do not have permission to update this task."]})
+            else:
+                errors.append({})
+            seen.add(task_id)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        for item in items:
+            item["task"] = tasks[item["id"]]
+        return items
+
+    def update(self, instance, validated_data):
+        if not validated_data:
+            return []
+        now = timezone.now()
+        tasks, fields, assignees, deltas = [], {"updated_at"}, {}, []
+        for item in validated_data:
+            task = item.pop("task")
+            item.pop("id")
+            if "assignees" in item:
+                assignees[task.pk] = item.pop("assignees")
+            deltas.append(stats.task_counters(task.status, task.priority, sign=-1))
+            for attr, value in item.items():
+                setattr(task, attr, value)
+                fields.add(attr)
+            deltas.append(stats.task_counters(task.status, task.priority))
+            # bulk_update() skips auto_now; bump it so ETags change
+            task.updated_at = now
+            tasks.append(task)
+
+        with transaction.atomic():
+            Task.objects.bulk_update(tasks, sorted(fields))
+            # bulk_update() sends no post_save
+            stats.apply_deltas(tasks[0].project_id, stats.merge(*deltas))
+            changes.record(tasks[0].project_id, "task", [t.pk for t in tasks])
+            added = sync_assignees(assignees)
+            notify_assigned(self.context, tasks, added)
+        return tasks
+
+
+class TaskBulkUpdateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    assignees = AssigneesField(required=False)
+
+    class Meta:
+        list_serializer_class = TaskBulkUpdateListSerializer
+
+
+
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source="author.email")
 
     class Meta:
         model = Comment
         fields = ["id", "task", "author", "content", "created_at"]
         read_only_fields = ["id", "task", "author", "created_at"]
+        expandable_fields = {"author": UserSerializer}
 
 
 class SubtaskSerializer(serializers.ModelSerializer):
@@ -66,8 +295,62 @@ class SubtaskSerializer(serializers.ModelSerializer):
 
 class AttachmentSerializer(serializers.ModelSerializer):
     uploaded_by = serializers.ReadOnlyField(source="uploaded_by.email")
+    # media files are not served publicly; this is where members fetch them
+    download_url = serializers.HyperlinkedIdentityField(view_name="attachment-download")
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Attachment
-        fields = ["id", "task", "uploaded_by", "file", "uploaded_at"]
-        read_only_fields = ["id", "task", "uploaded_by", "uploaded_at"]
\ No newline at end of file
+        fields = ["id", "task", "uploaded_by", "file", "filename", "download_url", "thumbnails", "uploaded_at"]
+        read_only_fields = ["id", "task", "uploaded_by", "filename", "uploaded_at"]
+
+    def get_thumbnails(self, obj):
+        """{size: url} of the rendered thumbnails of an image, else None."""
+        names = thumbnails.attachment_thumbnails(obj) or {}
+        request = self.context.get("request")
+        urls = {
+            size: reverse("attachment-thumbnail", args=[obj.pk, size], request=request)
+            for size in names
+            if size in obj.thumbnail_sizes
+        }
+        return urls or None
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    offset = serializers.IntegerField(source="received", read_only=True)
+    sha256 = serializers.RegexField(r"^[0-9a-fA-F]{64}$")
+    # set once the finalized upload has been assembled
+    attachment = AttachmentSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ["id", "task", "filename", "size", "sha256", "offset", "status", "error", "attachment", "created_at"]
+        read_only_fields = ["id", "task", "status", "error", "created_at"]
+
+    def validate_size(self, value):
+        limit = uploads.config()["MAX_SIZE"]
+        if value > limit:
+            raise serializers.ValidationError(f"Attachments may be at most {limit} bytes.")
+        return value
+
+    def validate_sha256(self, value):
+        return value.lower()
+
+
+class DeletionJobSerializer(serializers.ModelSerializer):
+    url = serializers.HyperlinkedIdentityField(view_name="deletion-job-detail")
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DeletionJob
+        fields = [
+            "id", "url", "kind", "project", "task", "status", "progress",
+            "total", "deleted", "files_removed", "error", "created_at", "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """Share of the rows deleted so far, 0 to 1."""
+        if obj.status == "done":
+            return 1.0
+        return round(obj.deleted / obj.total, 3) if obj.total else 0.0
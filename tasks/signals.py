@@ -0,0 +1,127 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from projects.models import Project
+from .models import Task, Subtask, Comment, Attachment, Change, UploadPart
+from . import changes, stats, thumbnails
+
+CHANGE_KINDS = {Task: "task", Subtask: "subtask", Comment: "comment", Attachment: "attachment"}
+
+# {task_id: project_id} for tasks being deleted, so their cascaded children
+# can be logged without reading the task back
+_deleting_tasks = {}
+
+
+def _loaded(instance, field):
+    return getattr(instance, "_loaded_values", {}).get(field)
+
+
+def _remember(instance, *fields):
+    instance._loaded_values = {
+        **getattr(instance, "_loaded_values", {}),
+        **{field: getattr(instance, field) for field in fields},
+    }
+
+
+def _task_project_id(child):
+    """Project of a subtask, comment or attachment."""
+    if type(child).task.is_cached(child):
+        return child.task.project_id
+    if child.task_id in _deleting_tasks:
+        return _deleting_tasks[child.task_id]
+    return Task.all_objects.filter(pk=child.task_id).values_list("project_id", flat=True).first()
+
+
+def _project_id(instance):
+    return instance.project_id if isinstance(instance, Task) else _task_project_id(instance)
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    delta = stats.task_counters(instance.status, instance.priority)
+    if not created:
+        old_status, old_priority = _loaded(instance, "status"), _loaded(instance, "priority")
+        if old_status is None or old_priority is None:
+            # loaded without these fields, so there is nothing to diff against
+            stats.invalidate(instance.project_id)
+            _remember(instance, "status", "priority")
+            return
+        delta = stats.merge(delta, stats.task_counters(old_status, old_priority, sign=-1))
+    stats.apply_deltas(instance.project_id, delta)
+    _remember(instance, "status", "priority")
+
+
+@receiver(post_delete, sender=Task)
+def count_deleted_task(sender, instance, **kwargs):
+    stats.apply_deltas(
+        instance.project_id, stats.task_counters(instance.status, instance.priority, sign=-1)
+    )
+
+
+@receiver(post_save, sender=Subtask)
+def count_saved_subtask(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    delta = stats.subtask_counters(instance.status)
+    if not created:
+        delta = stats.merge(delta, stats.subtask_counters(_loaded(instance, "status"), sign=-1))
+        delta.pop("subtasks_total", None)
+    if delta:
+        stats.apply_deltas(_task_project_id(instance), delta)
+    _remember(instance, "status")
+
+
+@receiver(post_delete, sender=Subtask)
+def count_deleted_subtask(sender, instance, **kwargs):
+    project_id = _task_project_id(instance)
+    if project_id is not None:
+        stats.apply_deltas(project_id, stats.subtask_counters(instance.status, sign=-1))
+
+
+@receiver(pre_delete, sender=Task)
+def remember_deleting_task(sender, instance, **kwargs):
+    _deleting_tasks[instance.pk] = instance.project_id
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Subtask)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Attachment)
+def log_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    changes.record(_project_id(instance), CHANGE_KINDS[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Subtask)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Attachment)
+def log_deleted(sender, instance, **kwargs):
+    project_id = _project_id(instance)
+    if sender is Task:
+        _deleting_tasks.pop(instance.pk, None)
+    if project_id is not None:
+        changes.record(project_id, CHANGE_KINDS[sender], [instance.pk], action="delete")
+
+
+@receiver(post_delete, sender=Project)
+def drop_change_log(sender, instance, **kwargs):
+    Change.objects.filter(project_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Attachment)
+def render_attachment_thumbnails(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and thumbnails.attachment_thumbnails(instance):
+        thumbnails.schedule(thumbnails.render_attachment, instance.pk)
+
+
+@receiver(post_delete, sender=UploadPart)
+def delete_upload_part_file(sender, instance, **kwargs):
+    # finalized, cancelled, expired or cascaded away with its task
+    name = instance.name
+    transaction.on_commit(lambda: default_storage.delete(name))
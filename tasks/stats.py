@@ -0,0 +1,82 @@
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from projects.models import ProjectStats
+from .models import Task, Subtask
+
+COUNTER_FIELDS = [
+    "tasks_total", "tasks_todo", "tasks_in_progress", "tasks_done",
+    "priority_low", "priority_medium", "priority_high",
+    "subtasks_total", "subtasks_done",
+]
+
+
+def task_counters(status, priority, sign=1):
+    return {"tasks_total": sign, f"tasks_{status}": sign, f"priority_{priority}": sign}
+
+
+def subtask_counters(status, sign=1):
+    counters = {"subtasks_total": sign}
+    if status == "done":
+        counters["subtasks_done"] = sign
+    return counters
+
+
+def merge(*deltas):
+    total = {}
+    for delta in deltas:
+        for field, value in delta.items():
+            total[field] = total.get(field, 0) + value
+    return {field: value for field, value in total.items() if value}
+
+
+def apply_deltas(project_id, deltas):
+    """
+    Add {counter: delta} to the project's counters in one UPDATE. Projects
+    without a stats row are skipped; the row is built on first read.
+    """
+    if not deltas:
+        return
+    ProjectStats.objects.filter(project_id=project_id).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + value for field, value in deltas.items()},
+    )
+
+
+def invalidate(project_id):
+    """Drop the counters so the next read rebuilds them."""
+    ProjectStats.objects.filter(project_id=project_id).delete()
+
+
+def recalculate(project_id):
+    """Rebuild a project's counters with two aggregate queries."""
+    counts = Task.objects.filter(project_id=project_id).aggregate(
+        tasks_total=Count("pk"),
+        **{f"tasks_{s}": Count("pk", filter=Q(status=s)) for s, _ in Task.STATUS_CHOICES},
+        **{f"priority_{p}": Count("pk", filter=Q(priority=p)) for p, _ in Task.PRIORITY_CHOICES},
+    )
+    counts.update(
+        Subtask.objects.filter(task__project_id=project_id, task__deleted_at__isnull=True).aggregate(
+            subtasks_total=Count("pk"),
+            subtasks_done=Count("pk", filter=Q(status="done")),
+        )
+    )
+    stats, _ = ProjectStats.objects.update_or_create(project_id=project_id, defaults=counts)
+    return stats
+
+
+def get_project_stats(project):
+    """
+    Dashboard numbers for a project. Everything but the overdue count is read
+    from the counters row; overdue depends on today's date, so it is counted
+    through the (project, due_date) index.
+    """
+    stats = ProjectStats.objects.filter(project=project).first() or recalculate(project.pk)
+    data = {field: getattr(stats, field) for field in COUNTER_FIELDS}
+    data["overdue"] = (
+        Task.objects.filter(project=project, due_date__lt=timezone.localdate())
+        .exclude(status="done")
+        .count()
+    )
+    data["updated_at"] = stats.updated_at
+    return data
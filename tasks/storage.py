@@ -0,0 +1,161 @@
+"""
+Content-addressed storage for attachment files.
+
+Every distinct file is stored once, as attachments/<ab>/<sha256>, however
+many attachments share it. The digest is computed while the upload streams
+to a temporary file, and the file is then moved into place unless the blob
+already exists. An Attachment row is a reference to its blob. A blob that
+no row refers to any more is garbage: AttachmentDetailView removes it when
+it deletes the last reference, and `manage.py gc_attachments` sweeps up the
+rest, e.g. after tasks or projects were deleted.
+
+Saving a blob that already exists touches its mtime. Collection leaves
+blobs younger than ATTACHMENT_BLOBS["GRACE_SECONDS"] alone, so a blob is
+not removed between an upload reusing it and that upload's Attachment row
+being committed.
+
+Collecting a blob also removes its thumbnails (tasks/thumbnails.py).
+
+Files saved before this storage existed keep their names and are still
+served; they are collected the same way once unreferenced.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.deconstruct import deconstructible
+
+from . import thumbnails
+
+PREFIX = "attachments"
+BLOB_NAME = re.compile(rf"^{PREFIX}/[0-9a-f]{{2}}/([0-9a-f]{{64}})$")
+COLLECT_BATCH_SIZE = 500
+
+
+def config():
+    config = {"GRACE_SECONDS": 3600}
+    config.update(getattr(settings, "ATTACHMENT_BLOBS", {}))
+    return config
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def blob_name(self, digest):
+        return f"{PREFIX}/{digest[:2]}/{digest}"
+
+    @staticmethod
+    def digest(name):
+        """The SHA-256 of a blob, or None for a file stored under its own name."""
+        match = BLOB_NAME.match(name or "")
+        return match.group(1) if match else None
+
+    def get_available_name(self, name, max_length=None):
+        return name  # _save() names the file after its content
+
+    def _save(self, name, content):
+        tmp_dir = self.path(f"{PREFIX}/tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            sha256 = hashlib.sha256()
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in content.chunks():
+                    sha256.update(chunk)
+                    tmp.write(chunk)
+
+            name = self.blob_name(sha256.hexdigest())
+            path = self.path(name)
+            if os.path.exists(path):
+                os.utime(path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+                # atomic; two uploads of the same content write the same bytes
+                os.replace(tmp_path, path)
+                tmp_path = None
+        finally:
+            if tmp_path is not None:
+                os.remove(tmp_path)
+        return name
+
+    def is_recent(self, name, grace):
+        try:
+            return time.time() - os.path.getmtime(self.path(name)) < grace
+        except FileNotFoundError:
+            return False
+
+
+attachment_storage = ContentAddressedStorage()
+
+
+def collect(names, grace=None):
+    """
+    Delete the files among `names` that no Attachment refers to. Returns
+    the names deleted.
+    """
+    from .models import Attachment
+
+    grace = config()["GRACE_SECONDS"] if grace is None else grace
+    candidates = {name for name in names if name and not attachment_storage.is_recent(name, grace)}
+    if not candidates:
+        return []
+    used = set(Attachment.objects.filter(file__in=candidates).values_list("file", flat=True))
+    deleted = sorted(candidates - used)
+    for name in deleted:
+        attachment_storage.delete(name)
+        digest = attachment_storage.digest(name)
+        if digest:
+            _delete_thumbnails(digest)
+    return deleted
+
+
+def _delete_thumbnails(digest):
+    folder = f"{thumbnails.ATTACHMENT_PREFIX}/{digest[:2]}/{digest}"
+    try:
+        _, files = default_storage.listdir(folder)
+    except FileNotFoundError:
+        return
+    for name in files:
+        default_storage.delete(f"{folder}/{name}")
+
+
+def _stored_names(folder):
+    try:
+        directories, files = attachment_storage.listdir(folder)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield f"{folder}/{name}"
+    for directory in directories:
+        if f"{folder}/{directory}" != f"{PREFIX}/tmp":
+            yield from _stored_names(f"{folder}/{directory}")
+
+
+def sweep():
+    """
+    Collect every unreferenced file under attachments/, plus temporary
+    files left by interrupted saves. Returns how many files were deleted.
+    """
+    grace = config()["GRACE_SECONDS"]
+    deleted, batch = 0, []
+    for name in _stored_names(PREFIX):
+        batch.append(name)
+        if len(batch) == COLLECT_BATCH_SIZE:
+            deleted += len(collect(batch, grace))
+            batch = []
+    deleted += len(collect(batch, grace))
+
+    try:
+        _, leftovers = attachment_storage.listdir(f"{PREFIX}/tmp")
+    except FileNotFoundError:
+        leftovers = []
+    for name in leftovers:
+        name = f"{PREFIX}/tmp/{name}"
+        if not attachment_storage.is_recent(name, grace):
+            attachment_storage.delete(name)
+            deleted += 1
+    return deleted
@@ -1,3 +1,1339 @@
-from django.test import TestCase
+import asyncio
+import csv
+import hashlib
+import json
+import os
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+
+from projects.models import Project, ProjectMembership
+from projects.roles import role_cache
+from projects.testing import ProjectTestCase
+from .models import Task, TaskAssignment, Comment, Subtask, Attachment, Change, DeletionJob, UploadSession
+from .serializers import TaskBulkUpdateSerializer, TaskSerializer
+from .views import TaskDetailView
+from . import purge, storage, thumbnails, uploads
+
+User = get_user_model()
+
+
+class MembershipQueryCountTests(ProjectTestCase):
+    """
+    Each endpoint should look up the caller's membership at most once,
+    however many permission checks it runs.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.member = cls.add_member("member@example.com", "Member")
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.member)
+        cls.comment = Comment.objects.create(task=cls.task, author=cls.member, content="hi")
+        cls.subtask = Subtask.objects.create(task=cls.task, title="S")
+
+    def test_task_detail_get(self):
+        # task + created_by, membership, assignees
+        with self.assertNumQueries(3):
+            response = self.client.get(f"/api/tasks/{self.task.pk}/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_detail_patch_checks_membership_once(self):
+        # task + created_by, membership, update, counters, change log, assignees
+        with self.assertNumQueries(6):
+            response = self.client.patch(f"/api/tasks/{self.task.pk}/", {"status": "done"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_detail_delete_forbidden_for_member(self):
+        self.client.force_authenticate(self.member)
+        with self.assertNumQueries(2):  # task + created_by, membership
+            response = self.client.delete(f"/api/tasks/{self.task.pk}/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_comment_create(self):
+        # task, membership, insert, change log, queue event
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                f"/api/tasks/{self.task.pk}/comments/", {"content": "hello"}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_comment_detail_patch(self):
+        # comment + task, membership, update, change log, author
+        with self.assertNumQueries(5):
+            response = self.client.patch(f"/api/comments/{self.comment.pk}/", {"content": "edited"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_subtask_detail_patch(self):
+        # subtask + task, membership, update, counters, change log, queue event
+        with self.assertNumQueries(6):
+            response = self.client.patch(f"/api/subtasks/{self.subtask.pk}/", {"status": "done"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_project_detail_patch(self):
+        # project + created_by, membership, update
+        with self.assertNumQueries(3):
+            response = self.client.patch(f"/api/projects/{self.project.pk}/", {"name": "Q"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_non_member_is_rejected(self):
+        outsider = User.objects.create_user(email="out@example.com", password="pass1234", name="Out")
+        self.client.force_authenticate(outsider)
+        response = self.client.get(f"/api/tasks/{self.task.pk}/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_non_member_cannot_list_or_create(self):
+        urls = [
+            f"/api/projects/{self.project.pk}/tasks/",
+            f"/api/tasks/{self.task.pk}/comments/",
+            f"/api/tasks/{self.task.pk}/subtasks/",
+            f"/api/tasks/{self.task.pk}/attachments/",
+        ]
+        for url in urls:
+            self.client.get(url)  # a member's response is in the list cache now
+        self.client.force_authenticate(self.create_user("out@example.com", "Out"))
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+                self.assertEqual(self.client.post(url, {"title": "x", "content": "x"}, format="json").status_code, 403)
+
+
+class TaskListQueryCountTests(ProjectTestCase):
+    """
+    Regression benchmark: listing tasks must not issue per-row queries for
+    creators or assignees.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.members = [cls.add_member(f"m{i}@example.com", f"M{i}") for i in range(3)]
+
+    def _create_tasks(self, count):
+        for i in range(count):
+            task = Task.objects.create(
+                project=self.project, title=f"T{i}", created_by=self.members[i % 3]
+            )
+            task.assignees.set(self.members[: i % 3 + 1])
+
+    def _list_tasks(self, url=None):
+        # the caller's role keys the response cache; keep its lookup out of the count
+        role_cache.set(self.owner.pk, self.project.pk, "owner")
+        # tasks + created_by, assignees
+        with self.assertNumQueries(2):
+            response = self.client.get(url or f"/api/projects/{self.project.pk}/tasks/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self._create_tasks(5)
+        self.assertEqual(len(self._list_tasks()["results"]), 5)
+        self._create_tasks(45)
+        results = self._list_tasks()["results"]
+        self.assertEqual(len(results), 50)
+        self.assertEqual(len(results[-1]["assignees"]), 1)
+        self.assertIn(results[0]["created_by"], {u.email for u in self.members})
+
+
+class CursorPaginationTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        tasks = Task.objects.bulk_create(
+            Task(project=cls.project, title=f"T{i}", created_by=cls.owner) for i in range(25)
+        )
+        # Identical timestamps force the id tie-break.
+        Task.objects.filter(pk__in=[t.pk for t in tasks[:10]]).update(created_at=tasks[0].created_at)
+
+    def _walk(self, url, link):
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(row["id"] for row in data["results"])
+            url = data[link]
+        return seen
+
+    def test_pages_cover_every_row_once(self):
+        ids = self._walk(f"/api/projects/{self.project.pk}/tasks/?page_size=4", "next")
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+
+    def test_previous_links_walk_back(self):
+        url = f"/api/projects/{self.project.pk}/tasks/?page_size=4"
+        while True:
+            data = self.client.get(url).json()
+            if not data["next"]:
+                break
+            url = data["next"]
+        back = self._walk(data["previous"], "previous")
+        self.assertEqual(len(back) + len(data["results"]), 25)
+
+    def test_page_size_is_capped(self):
+        data = self.client.get(f"/api/projects/{self.project.pk}/tasks/?page_size=100000").data
+        self.assertEqual(len(data["results"]), 25)
+
+    def test_bad_cursor_is_404(self):
+        response = self.client.get(f"/api/projects/{self.project.pk}/tasks/?cursor=cD1nYXJiYWdlJTdDMQ==")
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskBulkTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.member = cls.add_member("member@example.com", "Member")
+        cls.url = f"/api/projects/{cls.project.pk}/tasks/bulk/"
+
+    def test_bulk_create(self):
+        payload = [
+            {"title": f"T{i}", "assignees": [self.owner.pk, self.member.pk]} for i in range(20)
+        ]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([task["title"] for task in response.data], [item["title"] for item in payload])
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 20)
+        self.assertEqual(TaskAssignment.objects.count(), 40)
+
+    def test_bulk_create_reports_errors_per_item_and_writes_nothing(self):
+        payload = [{"title": "ok"}, {"title": ""}, {"title": "bad", "assignees": [999]}]
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("title", response.data[1])
+        self.assertIn("assignees", response.data[2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_empty_body_is_rejected(self):
+        for method in (self.client.post, self.client.patch):
+            with self.subTest(method=method.__name__):
+                response = method(self.url, [], format="json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("empty", str(response.data))
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update(self):
+        tasks = Task.objects.bulk_create(
+            Task(project=self.project, title=f"T{i}", created_by=self.member) for i in range(3)
+        )
+        payload = [
+            {"id": tasks[2].pk, "status": "in_progress"},
+            {"id": tasks[0].pk, "status": "done"},
+            {"id": tasks[1].pk, "priority": "high", "assignees": [self.member.pk]},
+        ]
+        response = self.client.patch(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([task["id"] for task in response.data], [item["id"] for item in payload])
+        self.assertEqual(Task.objects.get(pk=tasks[0].pk).status, "done")
+        self.assertEqual(Task.objects.get(pk=tasks[1].pk).priority, "high")
+        self.assertEqual(list(tasks[1].assignees.values_list("pk", flat=True)), [self.member.pk])
+
+    def test_bulk_update_of_no_items_writes_nothing(self):
+        serializer = TaskBulkUpdateSerializer(
+            Task.objects.filter(project=self.project), data=[], many=True,
+            context={"request": None, "role": "owner", "project": self.project.pk},
+        )
+        self.assertTrue(serializer.is_valid())
+        with self.assertNumQueries(0):
+            self.assertEqual(serializer.save(), [])
+
+    def test_bulk_update_checks_each_task(self):
+        mine = Task.objects.create(project=self.project, title="mine", created_by=self.member)
+        theirs = Task.objects.create(project=self.project, title="theirs", created_by=self.owner)
+        self.client.force_authenticate(self.member)
+        payload = [{"id": mine.pk, "status": "done"}, {"id": theirs.pk, "status": "done"}, {"id": 0}]
+        response = self.client.patch(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertIn("permission", str(response.data[1]["id"]))
+        self.assertIn("not found", str(response.data[2]["id"]))
+        self.assertEqual(Task.objects.get(pk=mine.pk).status, "todo")
+
+
+class AssigneeWriteTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.members = [cls.add_member(f"m{i}@example.com", f"M{i}") for i in range(4)]
+        cls.outsider = cls.create_user("out@example.com", "Out")
+
+    def test_create_validates_and_inserts_assignees_in_batches(self):
+        ids = [user.pk for user in self.members]
+        # assignee check, project, membership, savepoint, insert task,
+        # counters, change log, insert assignments, queue event, release, read back
+        with self.assertNumQueries(11):
+            response = self.client.post(
+                f"/api/projects/{self.project.pk}/tasks/", {"title": "T", "assignees": ids}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sorted(response.data["assignees"]), sorted(ids))
+
+    def test_non_members_cannot_be_assigned(self):
+        response = self.client.post(
+            f"/api/projects/{self.project.pk}/tasks/",
+            {"title": "T", "assignees": [self.members[0].pk, self.outsider.pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(self.outsider.pk), str(response.data["assignees"]))
+
+    def test_update_diffs_assignments(self):
+        task = Task.objects.create(project=self.project, title="T", created_by=self.owner)
+        task.assignees.set(self.members[:2])
+        kept = TaskAssignment.objects.get(task=task, user=self.members[1])
+
+        new_ids = [self.members[1].pk, self.members[2].pk, self.members[3].pk]
+        response = self.client.patch(f"/api/tasks/{task.pk}/", {"assignees": new_ids}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data["assignees"]), sorted(new_ids))
+        # untouched rows keep their assigned_at
+        self.assertTrue(TaskAssignment.objects.filter(pk=kept.pk).exists())
+
+
+class TaskExportTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.task = Task.objects.create(project=cls.project, title="Write, spec", created_by=cls.owner)
+        cls.task.assignees.set([cls.owner])
+        Subtask.objects.create(task=cls.task, title="a", status="done")
+        Subtask.objects.create(task=cls.task, title="b")
+        Comment.objects.create(task=cls.task, author=cls.owner, content="hi")
+        cls.url = f"/api/projects/{cls.project.pk}/tasks/export/"
+
+    def test_ndjson(self):
+        response = self.client.get(self.url + "?format=ndjson")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        row = json.loads(lines[0])
+        self.assertEqual(row["assignees"], [self.owner.pk])
+        self.assertEqual((row["subtasks_total"], row["subtasks_done"], row["comments"]), (2, 1, 1))
+
+    def test_csv(self):
+        response = self.client.get(self.url + "?format=csv")
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:2], ["id", "title"])
+        self.assertEqual(rows[1][1], "Write, spec")
+
+    def test_requires_membership(self):
+        outsider = User.objects.create_user(email="out@example.com", password="pass1234", name="Out")
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_errors_are_json(self):
+        missing = f"/api/projects/{self.project.pk + 1}/tasks/export/"
+        cases = [
+            (self.client.get(missing + "?format=csv"), 404),
+            (self.client.get(self.url, HTTP_ACCEPT="application/json"), 406),
+        ]
+        self.client.force_authenticate(self.create_user("out@example.com", "Out"))
+        cases.append((self.client.get(self.url + "?format=csv"), 403))
+        for response, status_code in cases:
+            with self.subTest(status_code=status_code):
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertIn("detail", response.json())
+
+
+class ConditionalRequestTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+
+    def setUp(self):
+        super().setUp()
+        self.url = f"/api/tasks/{self.task.pk}/"
+
+    def test_unchanged_task_answers_304_without_serializing(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):  # the task; role is cached
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_update_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.patch(self.url, {"title": "U"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_stale_if_match_is_rejected(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.patch(self.url, {"title": "U"}, format="json")
+        response = self.client.patch(self.url, {"title": "V"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "U")
+
+    def test_write_between_check_and_update_is_rejected(self):
+        from config.conditional import ConditionalObjectMixin
+
+        etag = self.client.get(self.url)["ETag"]
+        check = ConditionalObjectMixin.check_preconditions
+
+        def check_then_race(view, request, obj):
+            response = check(view, request, obj)
+            # another request with the same ETag writes first
+            Task.objects.filter(pk=obj.pk).update(title="Other", updated_at=timezone.now())
+            return response
+
+        with mock.patch.object(ConditionalObjectMixin, "check_preconditions", check_then_race):
+            patched = self.client.patch(self.url, {"title": "U"}, format="json", HTTP_IF_MATCH=etag)
+            deleted = self.client.delete(self.url, HTTP_IF_MATCH=etag)
+        self.assertEqual((patched.status_code, deleted.status_code), (412, 412))
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, "Other")
+
+    def test_project_detail_supports_etags(self):
+        url = f"/api/projects/{self.project.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class RealtimeTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.outsider = cls.create_user("out@example.com", "Out")
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+
+    def connect(self, user, project_id=None):
+        from asgiref.testing import ApplicationCommunicator
+        from rest_framework_simplejwt.tokens import AccessToken
+        from .websocket import project_updates
+
+        scope = {
+            "type": "websocket",
+            "path": f"/ws/projects/{project_id or self.project.pk}/",
+            "query_string": f"token={AccessToken.for_user(user)}".encode(),
+        }
+        return ApplicationCommunicator(project_updates, scope)
+
+    @override_settings(NOTIFICATIONS={"WORKER": "command"})
+    def test_saves_are_broadcast_after_commit(self):
+        with mock.patch("tasks.realtime.get_hub") as get_hub:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(f"/api/tasks/{self.task.pk}/", {"status": "done"}, format="json")
+                self.client.post(f"/api/tasks/{self.task.pk}/comments/", {"content": "hi"}, format="json")
+                get_hub.return_value.backend.publish.assert_not_called()
+        sent = [json.loads(c.args[1]) for c in get_hub.return_value.backend.publish.call_args_list]
+        self.assertEqual([m["type"] for m in sent], ["task.updated", "comment.created"])
+        self.assertEqual(sent[0]["data"]["status"], "done")
+
+    async def test_member_receives_project_messages(self):
+        from .realtime import get_hub
+
+        communicator = self.connect(self.owner)
+        await communicator.send_input({"type": "websocket.connect"})
+        self.assertEqual(await communicator.receive_output(), {"type": "websocket.accept"})
+
+        get_hub().dispatch(self.project.pk + 1, '{"type": "other"}')
+        get_hub().dispatch(self.project.pk, '{"type": "task.updated"}')
+        message = await communicator.receive_output()
+        self.assertEqual(message["text"], '{"type": "task.updated"}')
+
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait()
+        self.assertEqual(get_hub().subscriber_count(self.project.pk), 0)
+
+    async def test_non_member_is_refused_at_connect(self):
+        communicator = self.connect(self.outsider)
+        await communicator.send_input({"type": "websocket.connect"})
+        self.assertEqual(await communicator.receive_output(), {"type": "websocket.close", "code": 4403})
+
+    async def test_slow_consumer_gets_resync_instead_of_backlog(self):
+        from .realtime import RESYNC, Hub, InMemoryBackend
+
+        hub = Hub(InMemoryBackend, queue_size=2)
+        subscription = hub.subscribe(1)
+        for i in range(5):
+            hub.backend.publish(1, str(i))
+        await asyncio.sleep(0)
+        self.assertEqual(subscription.queue.qsize(), 1)
+        self.assertEqual(await subscription.get(), RESYNC)
+        self.assertEqual(subscription.dropped, 3)
+
+    def test_postgres_listener_reconnects_with_backoff(self):
+        from .realtime import RESYNC, PostgresBackend
+
+        class Stop(BaseException):
+            pass
+
+        deliver = mock.Mock()
+        backend = PostgresBackend(deliver)
+        first, second = mock.Mock(), mock.Mock()
+        with mock.patch.object(backend, "_connect", side_effect=[first, OSError("refused"), second]), \
+                mock.patch.object(backend, "_receive", side_effect=[OSError("server closed"), Stop()]), \
+                mock.patch("tasks.realtime.time.sleep") as sleep, \
+                self.assertLogs("tasks.realtime", "ERROR") as logs:
+            with self.assertRaises(Stop):
+                backend._listen()
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1, 2])
+        self.assertEqual(len(logs.records), 2)
+        first.close.assert_called_once_with()
+        second.close.assert_called_once_with()
+        deliver.assert_called_once_with(None, RESYNC)  # only after a reconnect
+
+    def test_postgres_listener_is_restarted_if_its_thread_died(self):
+        from .realtime import PostgresBackend
+
+        backend = PostgresBackend(mock.Mock())
+        backend._thread = mock.Mock(**{"is_alive.return_value": False})
+        with mock.patch("tasks.realtime.threading.Thread") as thread:
+            backend.start()
+            backend._thread.is_alive.return_value = True
+            backend.start()
+        thread.return_value.start.assert_called_once_with()
+
+
+@override_settings(NOTIFICATIONS={"WORKER": "command"}, DELETIONS={"WORKER": "command"})
+class ChangesTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+        cls.url = f"/api/projects/{cls.project.pk}/changes/"
+
+    def sync(self, cursor, **params):
+        return self.client.get(self.url, {"since": cursor, **params}).data
+
+    def test_only_changes_after_cursor_are_returned(self):
+        cursor = self.client.get(self.url).data["cursor"]
+        self.client.patch(f"/api/tasks/{self.task.pk}/", {"status": "done"}, format="json")
+        self.client.patch(f"/api/tasks/{self.task.pk}/", {"title": "T2"}, format="json")
+        comment = self.client.post(f"/api/tasks/{self.task.pk}/comments/", {"content": "c"}, format="json").data
+
+        data = self.sync(cursor)
+        self.assertEqual([(c["kind"], c["action"]) for c in data["changes"]], [("task", "upsert"), ("comment", "upsert")])
+        self.assertEqual(data["changes"][0]["data"]["title"], "T2")  # collapsed to the latest state
+        self.assertEqual(data["changes"][1]["id"], comment["id"])
+        self.assertEqual(self.sync(data["cursor"])["changes"], [])
+
+    def test_deletes_leave_tombstones_for_cascaded_children(self):
+        subtask = Subtask.objects.create(task=self.task, title="S")
+        cursor = self.client.get(self.url).data["cursor"]
+        self.client.delete(f"/api/tasks/{self.task.pk}/")
+        self.assertEqual(self.sync(cursor)["changes"], [{"kind": "task", "id": self.task.pk, "action": "delete"}])
+        call_command("process_deletions", stdout=StringIO())  # children go with the purge
+        changes = self.sync(cursor)["changes"]
+        self.assertIn({"kind": "subtask", "id": subtask.pk, "action": "delete"}, changes)
+        self.assertIn({"kind": "task", "id": self.task.pk, "action": "delete"}, changes)
+
+    def test_bulk_writes_are_logged(self):
+        cursor = self.client.get(self.url).data["cursor"]
+        self.client.post(f"/api/projects/{self.project.pk}/tasks/bulk/", [{"title": "A"}, {"title": "B"}], format="json")
+        titles = [c["data"]["title"] for c in self.sync(cursor)["changes"]]
+        self.assertEqual(titles, ["A", "B"])
+
+    def test_cost_follows_changes_not_project_size(self):
+        Task.objects.bulk_create(Task(project=self.project, title=f"x{i}", created_by=self.owner) for i in range(50))
+        cursor = self.client.get(self.url).data["cursor"]
+        self.client.patch(f"/api/tasks/{self.task.pk}/", {"status": "done"}, format="json")
+        # project, log, tasks, assignees; the role is cached
+        with self.assertNumQueries(4):
+            data = self.sync(cursor)
+        self.assertEqual(len(data["changes"]), 1)
+
+    def test_pages_and_rejects_bad_cursor(self):
+        with mock.patch("tasks.changes.PAGE_SIZE", 2):
+            for i in range(3):
+                Subtask.objects.create(task=self.task, title=f"s{i}")
+            data = self.client.get(self.url, {"since": 0}).data
+            self.assertTrue(data["has_more"])
+            self.assertEqual(len(data["changes"]), 2)
+        self.assertEqual(self.client.get(self.url, {"since": "abc"}).status_code, 400)
+
+    def test_deleting_project_drops_its_log(self):
+        self.client.delete(f"/api/projects/{self.project.pk}/")
+        call_command("process_deletions", stdout=StringIO())
+        self.assertFalse(Change.objects.filter(project_id=self.project.pk).exists())
+
+    def test_postgres_reads_in_commit_order_up_to_snapshot_xmin(self):
+        cursor = self.client.get(self.url).data["cursor"]
+        running = Subtask.objects.create(task=self.task, title="running")
+        committed = Subtask.objects.create(task=self.task, title="committed")
+        # transaction 100 wrote the smaller id but has not committed; 101 has
+        Change.objects.filter(kind="subtask", object_id=running.pk).update(txid=100)
+        Change.objects.filter(kind="subtask", object_id=committed.pk).update(txid=101)
+
+        postgres = mock.MagicMock(vendor="postgresql")
+        xmin = postgres.cursor.return_value.__enter__.return_value.fetchone
+        with mock.patch("tasks.changes.connection", postgres):
+            xmin.return_value = [100]
+            held = self.sync(cursor)
+            self.assertEqual(held["changes"], [])  # 101 waits until 100 is done
+            xmin.return_value = [102]
+            data = self.sync(held["cursor"])
+        self.assertEqual([c["id"] for c in data["changes"]], [running.pk, committed.pk])
+        self.assertEqual(data["cursor"], f"101.{Change.objects.get(txid=101).pk}")
+        self.assertEqual(self.client.get(self.url, {"since": "1.2.3"}).status_code, 400)
+
+    def test_other_databases_hold_back_young_changes(self):
+        with mock.patch("tasks.changes.connection", mock.Mock(vendor="mysql")):
+            with override_settings(CHANGES_SETTLE_SECONDS=0):
+                cursor = self.client.get(self.url).data["cursor"]
+            Subtask.objects.create(task=self.task, title="s")
+            self.assertEqual(self.sync(cursor)["changes"], [])
+            with override_settings(CHANGES_SETTLE_SECONDS=0):
+                self.assertEqual(len(self.sync(cursor)["changes"]), 1)
+
+    def test_pruned_cursor_is_gone(self):
+        cursor = self.client.get(self.url).data["cursor"]
+        self.client.patch(f"/api/tasks/{self.task.pk}/", {"status": "done"}, format="json")
+        Change.objects.update(created_at=timezone.now() - timedelta(days=31))
+        self.client.patch(f"/api/tasks/{self.task.pk}/", {"title": "T2"}, format="json")
+
+        out = StringIO()
+        call_command("prune_changes", stdout=out)
+        self.assertIn("Removed 2 change log entries", out.getvalue())
+        self.assertEqual(self.client.get(self.url, {"since": cursor}).status_code, 410)
+        fresh = self.client.get(self.url).data["cursor"]
+        self.assertEqual(self.sync(fresh)["changes"], [])
+
+
+class SearchTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.create_user("other@example.com", "Other")
+        cls.hidden = cls.create_project(cls.other, name="H")
+
+        cls.title_hit = Task.objects.create(project=cls.project, title="Invoice export", created_by=cls.owner)
+        cls.body_hit = Task.objects.create(
+            project=cls.project, title="Billing", description="send the invoice", created_by=cls.owner
+        )
+        cls.comment = Comment.objects.create(task=cls.body_hit, author=cls.owner, content="invoice is late")
+        cls.subtask = Subtask.objects.create(task=cls.title_hit, title="Draft invoice template")
+        Task.objects.create(project=cls.hidden, title="Secret invoice", created_by=cls.other)
+
+    def hits(self, **params):
+        response = self.client.get("/api/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return [(r["kind"], r["id"]) for r in response.data["results"]]
+
+    def test_matches_every_source_within_the_users_projects(self):
+        hits = self.hits(q="invoice")
+        self.assertEqual(
+            set(hits),
+            {("task", self.title_hit.pk), ("task", self.body_hit.pk),
+             ("comment", self.comment.pk), ("subtask", self.subtask.pk)},
+        )
+        self.assertEqual(hits[0], ("task", self.title_hit.pk))  # title outranks description
+
+    def test_index_follows_saves_and_deletes(self):
+        self.comment.content = "paid already"
+        self.comment.save()
+        self.assertNotIn(("comment", self.comment.pk), self.hits(q="invoice"))
+        self.subtask.delete()
+        self.assertNotIn(("subtask", self.subtask.pk), self.hits(q="invoice"))
+        self.assertEqual(self.hits(q="paid"), [("comment", self.comment.pk)])
+
+    def test_all_words_must_match_and_syntax_is_inert(self):
+        self.assertEqual(self.hits(q="invoice export"), [("task", self.title_hit.pk)])
+        self.assertEqual(self.hits(q='invoice" OR "secret'), [])
+        self.assertEqual(self.client.get("/api/search/").status_code, 400)
+
+    def test_project_filter(self):
+        self.assertEqual(self.hits(q="secret", project=self.hidden.pk), [])
+        self.assertEqual(len(self.hits(q="invoice", project=self.project.pk)), 4)
+
+
+class TaskFilterTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from datetime import date, timedelta
+
+        super().setUpTestData()
+        cls.member = cls.add_member("member@example.com", "Member")
+        today = date.today()
+        cls.late = Task.objects.create(
+            project=cls.project, title="late", priority="high", due_date=today - timedelta(days=3), created_by=cls.owner
+        )
+        cls.late_done = Task.objects.create(
+            project=cls.project, title="late but done", status="done", due_date=today - timedelta(days=3),
+            created_by=cls.member,
+        )
+        cls.upcoming = Task.objects.create(
+            project=cls.project, title="upcoming", status="in_progress", due_date=today + timedelta(days=3),
+            created_by=cls.member,
+        )
+        cls.undated = Task.objects.create(project=cls.project, title="undated", created_by=cls.owner)
+        cls.upcoming.assignees.set([cls.member])
+        cls.url = f"/api/projects/{cls.project.pk}/tasks/"
+        cls.today = today
+
+    def titles(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {task["title"] for task in response.data["results"]}
+
+    def test_status_and_priority_accept_several_values(self):
+        self.assertEqual(self.titles({"status": ["done", "in_progress"]}), {"late but done", "upcoming"})
+        self.assertEqual(self.titles({"priority": "high"}), {"late"})
+
+    def test_assignee_and_creator(self):
+        self.assertEqual(self.titles({"assignee": self.member.pk}), {"upcoming"})
+        self.assertEqual(self.titles({"created_by": self.member.pk}), {"late but done", "upcoming"})
+
+    def test_due_dates_and_overdue(self):
+        self.assertEqual(self.titles({"due_after": self.today.isoformat()}), {"upcoming"})
+        self.assertEqual(self.titles({"due_before": self.today.isoformat()}), {"late", "late but done"})
+        self.assertEqual(self.titles({"overdue": "true"}), {"late"})
+        self.assertEqual(self.titles({"overdue": "false"}), {"late but done", "upcoming", "undated"})
+
+    def test_ordering_and_bad_values(self):
+        response = self.client.get(self.url, {"ordering": "title"})
+        self.assertEqual([t["title"] for t in response.data["results"]], ["late", "late but done", "undated", "upcoming"])
+        self.assertEqual(self.client.get(self.url, {"status": "nope"}).status_code, 400)
+
+
+class MyTasksTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="me@example.com", password="pass1234", name="Me")
+        cls.other = User.objects.create_user(email="other@example.com", password="pass1234", name="Other")
+        cls.projects = []
+        for i in range(5):
+            project = Project.objects.create(name=f"P{i}", start_date="2025-01-01", created_by=cls.other)
+            ProjectMembership.objects.create(project=project, user=cls.user, role="member")
+            cls.projects.append(project)
+            mine = Task.objects.create(project=project, title=f"mine {i}", priority="high" if i else "low",
+                                       created_by=cls.other)
+            mine.assignees.set([cls.user, cls.other])
+            Task.objects.create(project=project, title=f"not mine {i}", created_by=cls.other)
+        # still assigned, but no longer a member
+        cls.left = Project.objects.create(name="Left", start_date="2025-01-01", created_by=cls.other)
+        Task.objects.create(project=cls.left, title="stale", created_by=cls.other).assignees.set([cls.user])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_lists_assigned_tasks_across_member_projects_in_two_queries(self):
+        with self.assertNumQueries(2):  # tasks, assignees
+            response = self.client.get("/api/tasks/mine/")
+        titles = [t["title"] for t in response.data["results"]]
+        self.assertEqual(titles, [f"mine {i}" for i in reversed(range(5))])
+        self.assertEqual(set(response.data["results"][0]["assignees"]), {self.user.pk, self.other.pk})
+
+    def test_filters_and_pagination(self):
+        response = self.client.get("/api/tasks/mine/", {"priority": "high", "page_size": 2})
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["next"])
+        response = self.client.get("/api/tasks/mine/", {"project": self.projects[0].pk})
+        self.assertEqual([t["title"] for t in response.data["results"]], ["mine 0"])
+
+
+class SparseFieldsTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for i in range(3):
+            task = Task.objects.create(project=cls.project, title=f"T{i}", description="long " * 50, created_by=cls.owner)
+            task.assignees.set([cls.owner])
+        cls.task = task
+        Comment.objects.create(task=task, author=cls.owner, content="hi")
+        cls.url = f"/api/projects/{cls.project.pk}/tasks/"
+
+    def test_board_fields_skip_columns_joins_and_prefetch(self):
+        self.client.get(self.url)  # cache the role
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"fields": "id,title,status,priority"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "status", "priority"})
+        self.assertEqual(len(queries), 1)  # tasks; no assignee prefetch
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertNotIn("description", sql)
+        self.assertNotIn("accounts_user", sql)
+
+    def test_expand_and_compact_relations(self):
+        response = self.client.get(self.url, {"fields": "id,created_by,assignees"})
+        self.assertEqual(response.data["results"][0]["created_by"], self.owner.pk)
+        self.assertEqual(response.data["results"][0]["assignees"], [self.owner.pk])
+
+        with self.assertNumQueries(2):  # tasks + creators, assignees
+            response = self.client.get(self.url, {"fields": "id,created_by,assignees", "expand": "created_by,assignees"})
+        row = response.data["results"][0]
+        self.assertEqual(row["created_by"]["email"], self.owner.email)
+        self.assertEqual(row["assignees"][0]["email"], self.owner.email)
+
+    def test_default_representation_unchanged_and_bad_names_rejected(self):
+        row = self.client.get(self.url).data["results"][0]
+        self.assertEqual(row["created_by"], self.owner.email)
+        self.assertIn("description", row)
+        self.assertEqual(self.client.get(self.url, {"fields": "id,nope"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"expand": "title"}).status_code, 400)
+
+    def test_writes_ignore_fields(self):
+        response = self.client.post(self.url + "?fields=id", {"title": "New"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["title"], "New")
+
+    def test_comments_and_detail(self):
+        response = self.client.get(f"/api/tasks/{self.task.pk}/comments/", {"fields": "id,author", "expand": "author"})
+        self.assertEqual(response.data["results"][0]["author"]["name"], "Owner")
+        response = self.client.get(f"/api/tasks/{self.task.pk}/", {"fields": "id,title"})
+        self.assertEqual(response.data, {"id": self.task.pk, "title": "T2"})
+
+
+@override_settings(RESPONSE_CACHE={"TTL": 0})
+class FastListRenderingTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.add_member("other@example.com", "Other")
+        texts = ["plain", 'quotes " and \\ slashes', "ünïcødé ✓ 😀", "line\nbreak\ttab\x01\x1f", "js    separators", ""]
+        for i, text in enumerate(texts):
+            task = Task.objects.create(
+                project=cls.project, title=f"T{i} {text}", description=text, created_by=cls.owner,
+                due_date="2025-02-0%d" % (i + 1) if i % 2 else None, priority=["low", "high"][i % 2],
+            )
+            task.assignees.set([cls.other, cls.owner][: i % 3])
+            Comment.objects.create(task=task, author=cls.other, content=text)
+        cls.task = task
+        cls.url = f"/api/projects/{cls.project.pk}/tasks/"
+
+    def get_both(self, url, params=None):
+        with override_settings(FAST_LIST_RENDERING=False):
+            regular = self.client.get(url, params)
+        with override_settings(FAST_LIST_RENDERING=True):
+            fast = self.client.get(url, params)
+        return regular, fast
+
+    def test_output_is_byte_identical(self):
+        for params in [None, {"page_size": 4}, {"ordering": "title"}, {"ordering": "-priority"}, {"status": "todo"}]:
+            regular, fast = self.get_both(self.url, params)
+            self.assertEqual(regular.status_code, 200)
+            self.assertEqual(fast["Content-Type"], regular["Content-Type"])
+            self.assertEqual(fast.content, regular.content, params)
+
+        regular, fast = self.get_both(self.url, {"page_size": 4})
+        regular, fast = self.get_both(json.loads(fast.content)["next"])
+        self.assertEqual(fast.content, regular.content)
+
+        regular, fast = self.get_both(f"/api/tasks/{self.task.pk}/comments/")
+        self.assertEqual(fast.content, regular.content)
+
+    @override_settings(FAST_LIST_RENDERING=True)
+    def test_skips_model_serializers_but_not_sparse_or_browsable_requests(self):
+        with mock.patch.object(TaskSerializer, "to_representation", side_effect=AssertionError):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url, {"fields": "id,title"}).json()["results"][0].keys(), {"id", "title"})
+        response = self.client.get(self.url, HTTP_ACCEPT="text/html")
+        self.assertIn(b"<html", response.content)
+
+    @override_settings(RESPONSE_CACHE={"TTL": 300})
+    def test_benchmark_command_compares_bytes(self):
+        out = StringIO()
+        to_representation = TaskSerializer.to_representation
+        with mock.patch.object(TaskSerializer, "to_representation", autospec=True, side_effect=to_representation) as spy:
+            call_command("bench_list_rendering", tasks=20, rounds=2, stdout=out)
+        self.assertIn("identical", out.getvalue())
+        self.assertEqual(spy.call_count, 2 * 20)  # every serializer round renders, none is cached
+
+
+class UploadTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+
+    def setUp(self):
+        super().setUp()
+        self.media = self.use_temp_media(ATTACHMENT_UPLOADS={"MAX_CHUNK_SIZE": 4, "WORKER": "command"})
+
+    def start(self, content, **overrides):
+        body = {"filename": "notes.txt", "size": len(content), "sha256": hashlib.sha256(content).hexdigest(), **overrides}
+        response = self.client.post(f"/api/tasks/{self.task.pk}/uploads/", body, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return f"/api/uploads/{response.data['id']}/"
+
+    def put(self, url, content, first):
+        last = first + len(content) - 1
+        return self.client.generic(
+            "PUT", url, content, content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {first}-{last}/{self.size}",
+        )
+
+    def upload(self, content, chunk=4):
+        self.size = len(content)
+        url = self.start(content)
+        for first in range(0, len(content), chunk):
+            self.assertEqual(self.put(url, content[first:first + chunk], first).status_code, 200)
+        return url
+
+    def stored_files(self, folder):
+        path = os.path.join(self.media, folder)
+        return [name for _, _, names in os.walk(path) for name in names]
+
+    def finalize(self, url):
+        """Finalize, assemble as the worker would and return the session."""
+        response = self.client.post(url + "finalize/")
+        self.assertEqual(response.status_code, 202, response.data)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("assemble_uploads", stdout=StringIO())
+        return self.client.get(url).data
+
+    def test_chunks_are_assembled_after_finalize(self):
+        url = self.upload(b"hello chunked world")
+        self.assertEqual(self.client.get(url).data["offset"], 19)
+
+        response = self.client.post(url + "finalize/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "queued")
+        self.assertTrue(response["Location"].endswith(url))
+        self.assertEqual(self.client.post(url + "finalize/").status_code, 202)  # again: no-op
+        self.assertFalse(Attachment.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("assemble_uploads", stdout=StringIO())
+        session = self.client.get(url).data
+        self.assertEqual(session["status"], "done")
+        self.assertEqual(session["attachment"]["uploaded_by"], self.owner.email)
+        attachment = Attachment.objects.get()
+        self.assertEqual(session["attachment"]["id"], attachment.pk)
+        self.assertEqual(attachment.file.read(), b"hello chunked world")
+        self.assertEqual(self.stored_files("uploads"), [])
+        self.assertEqual(self.client.post(url + "finalize/").status_code, 200)
+
+    @override_settings(ATTACHMENT_UPLOADS={"WORKER": "thread"})
+    def test_thread_worker_starts_after_commit(self):
+        session = UploadSession.objects.create(
+            task=self.task, uploaded_by=self.owner, filename="a", size=0, sha256="0" * 64
+        )
+        with mock.patch("tasks.uploads._submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                uploads.finalize(session)
+                submit.assert_not_called()
+        submit.assert_called_once_with(session.pk)
+
+    def test_abandoned_assembly_is_taken_over(self):
+        url = self.upload(b"abcd")
+        self.client.post(url + "finalize/")
+        UploadSession.objects.update(status="assembling", updated_at=timezone.now())
+        self.assertEqual(uploads.run_pending(), 0)  # still running elsewhere
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(uploads.run_pending(), 1)
+        self.assertEqual(self.client.get(url).data["status"], "done")
+
+    def test_resume_after_a_lost_chunk(self):
+        content = b"0123456789"
+        self.size = len(content)
+        url = self.start(content)
+        self.put(url, content[:4], 0)
+        response = self.put(url, content[8:], 8)  # skipped a chunk
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["offset"], 4)
+        self.assertEqual(self.put(url, content[:4], 0).status_code, 409)  # already stored
+        self.put(url, content[4:8], 4)
+        self.put(url, content[8:], 8)
+        self.assertEqual(self.finalize(url)["status"], "done")
+
+    def test_bad_ranges_and_short_bodies_are_rejected(self):
+        self.size = 10
+        url = self.start(b"0123456789")
+        self.assertEqual(self.put(url, b"01234", 0).status_code, 400)  # over MAX_CHUNK_SIZE
+        response = self.client.generic("PUT", url, b"01", HTTP_CONTENT_RANGE="bytes 0-3/10")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.generic("PUT", url, b"01", HTTP_CONTENT_RANGE="bytes 0-1/99").status_code, 400)
+        self.assertEqual(self.client.post(url + "finalize/").status_code, 400)  # incomplete
+        self.assertEqual(self.stored_files("uploads"), [])
+
+    def test_checksum_mismatch_discards_the_upload(self):
+        self.size = 4
+        url = self.start(b"abcd", sha256="0" * 64)
+        self.put(url, b"abcd", 0)
+        session = self.finalize(url)
+        self.assertEqual(session["status"], "failed")
+        self.assertIn("Checksum mismatch", session["error"])
+        self.assertFalse(Attachment.objects.exists())
+        self.assertEqual(self.stored_files("uploads") + self.stored_files("attachments"), [])
+
+    def test_sessions_are_private_and_expire(self):
+        url = self.upload(b"abcd")
+        other = User.objects.create_user(email="other@example.com", password="pass1234", name="Other")
+        client = APIClient()
+        client.force_authenticate(other)
+        self.assertEqual(client.get(url).status_code, 404)
+        self.assertEqual(client.post(f"/api/tasks/{self.task.pk}/uploads/", {
+            "filename": "x", "size": 1, "sha256": "0" * 64}, format="json").status_code, 403)
+
+        UploadSession.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("prune_uploads", stdout=out)
+        self.assertIn("Removed 1 upload sessions", out.getvalue())
+        self.assertEqual(self.stored_files("uploads"), [])
+
+    def test_finalized_upload_shares_the_blob_of_identical_content(self):
+        existing = Attachment.objects.create(
+            task=self.task, uploaded_by=self.owner, file=SimpleUploadedFile("a.txt", b"same bytes")
+        )
+        url = self.upload(b"same bytes")
+        attachment = self.finalize(url)["attachment"]
+        self.assertEqual(attachment["filename"], "notes.txt")
+        self.assertEqual(Attachment.objects.get(pk=attachment["id"]).file.name, existing.file.name)
+        self.assertEqual(len(self.stored_files("attachments")), 1)
+
+
+class AttachmentBlobTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+
+    def setUp(self):
+        super().setUp()
+        self.media = self.use_temp_media(ATTACHMENT_BLOBS={"GRACE_SECONDS": 0})
+
+    def post(self, name, content):
+        response = self.client.post(
+            f"/api/tasks/{self.task.pk}/attachments/", {"file": SimpleUploadedFile(name, content)}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return Attachment.objects.get(pk=response.data["id"])
+
+    def blobs(self):
+        path = os.path.join(self.media, "attachments")
+        return sorted(name for folder, _, names in os.walk(path) if not folder.endswith("tmp") for name in names)
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.post("a.txt", b"same bytes")
+        second = self.post("b.txt", b"same bytes")
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(self.blobs(), [hashlib.sha256(b"same bytes").hexdigest()])
+        self.assertEqual((first.filename, second.filename), ("a.txt", "b.txt"))
+
+        response = self.client.get(f"/api/attachments/{second.pk}/download/")
+        self.assertIn('filename="b.txt"', response["Content-Disposition"])
+        self.assertIn(hashlib.sha256(b"same bytes").hexdigest(), response["ETag"])
+
+    def test_blob_is_deleted_with_its_last_attachment(self):
+        first = self.post("a.txt", b"same bytes")
+        second = self.post("b.txt", b"same bytes")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f"/api/attachments/{first.pk}/").status_code, 204)
+        self.assertEqual(len(self.blobs()), 1)
+        self.assertEqual(second.file.read(), b"same bytes")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/attachments/{second.pk}/")
+        self.assertEqual(self.blobs(), [])
+
+    def test_recent_blobs_survive_until_the_grace_period_ends(self):
+        attachment = self.post("a.txt", b"bytes")
+        with override_settings(ATTACHMENT_BLOBS={"GRACE_SECONDS": 3600}):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f"/api/attachments/{attachment.pk}/")
+            self.assertEqual(len(self.blobs()), 1)
+            call_command("gc_attachments", stdout=StringIO())
+            self.assertEqual(len(self.blobs()), 1)
+
+        out = StringIO()
+        call_command("gc_attachments", stdout=out)
+        self.assertIn("Removed 1 unreferenced", out.getvalue())
+        self.assertEqual(self.blobs(), [])
+
+    def test_sweep_collects_files_of_deleted_tasks(self):
+        kept = self.post("a.txt", b"kept")
+        other = Task.objects.create(project=self.project, title="Other", created_by=self.owner)
+        Attachment.objects.create(task=other, uploaded_by=self.owner, file=SimpleUploadedFile("b.txt", b"gone"))
+        other.delete()
+        self.assertEqual(storage.sweep(), 1)
+        self.assertEqual(self.blobs(), [os.path.basename(kept.file.name)])
+
+
+def image_bytes(fmt="PNG", size=(2000, 1000), mode="RGB"):
+    buffer = BytesIO()
+    Image.new(mode, size, "red").save(buffer, fmt)
+    return buffer.getvalue()
+
+
+@override_settings(THUMBNAILS={"WORKER": "command", "SIZES": {"small": 100, "large": 400}})
+class AttachmentThumbnailTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+
+    def setUp(self):
+        super().setUp()
+        self.use_temp_media(ATTACHMENT_BLOBS={"GRACE_SECONDS": 0})
+
+    def post(self, name, content):
+        response = self.client.post(
+            f"/api/tasks/{self.task.pk}/attachments/", {"file": SimpleUploadedFile(name, content)}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def test_thumbnails_are_rendered_and_served_to_members(self):
+        data = self.post("photo.png", image_bytes())
+        self.assertIsNone(data["thumbnails"])  # not rendered yet
+        out = StringIO()
+        call_command("generate_thumbnails", stdout=out)
+        self.assertIn("Rendered thumbnails for 1 images", out.getvalue())
+
+        with mock.patch.object(default_storage, "exists") as exists:
+            listed = self.client.get(f"/api/tasks/{self.task.pk}/attachments/").data["results"][0]
+        exists.assert_not_called()  # rendered sizes are recorded on the row
+        self.assertEqual(set(listed["thumbnails"]), {"small", "large"})
+        response = self.client.get(listed["thumbnails"]["large"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        with Image.open(BytesIO(response.getvalue())) as thumbnail:
+            self.assertEqual((thumbnail.format, thumbnail.size), ("WEBP", (400, 200)))
+        self.assertEqual(self.client.get(listed["thumbnails"]["large"], HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(f"/api/attachments/{data['id']}/thumbnails/huge/").status_code, 404)
+
+        outsider = User.objects.create_user(email="out@example.com", password="pass1234", name="Out")
+        client = APIClient()
+        client.force_authenticate(outsider)
+        self.assertEqual(client.get(listed["thumbnails"]["small"]).status_code, 403)
+
+    def test_identical_images_share_thumbnails_until_the_blob_goes(self):
+        content = image_bytes("JPEG")
+        first, second = self.post("a.jpg", content), self.post("b.jpg", content)
+        thumbnails.render_attachment(first["id"])
+        names = thumbnails.attachment_thumbnails(Attachment.objects.get(pk=second["id"]))
+        self.assertTrue(all(default_storage.exists(name) for name in names.values()))
+        thumbnails.render_attachment(second["id"])  # nothing to render, only recorded
+        self.assertEqual(Attachment.objects.get(pk=second["id"]).thumbnail_sizes, sorted(names))
+
+        for data in (first, second):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.delete(f"/api/attachments/{data['id']}/")
+        self.assertFalse(any(default_storage.exists(name) for name in names.values()))
+
+    def test_other_files_have_no_thumbnails(self):
+        data = self.post("notes.txt", b"not an image")
+        call_command("generate_thumbnails", stdout=StringIO())
+        self.assertIsNone(self.client.get(f"/api/tasks/{self.task.pk}/attachments/").data["results"][0]["thumbnails"])
+        self.assertEqual(self.client.get(f"/api/attachments/{data['id']}/thumbnails/small/").status_code, 404)
+        # a corrupt image is skipped rather than failing the run
+        self.post("broken.png", b"not a png")
+        with self.assertLogs("tasks.thumbnails", "WARNING"):
+            call_command("generate_thumbnails", stdout=StringIO())
+
+    def test_upload_schedules_rendering_on_commit(self):
+        with override_settings(THUMBNAILS={"WORKER": "thread"}), mock.patch.object(thumbnails, "_submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                data = self.post("photo.png", image_bytes())
+                self.post("notes.txt", b"text")
+        submit.assert_called_once_with(thumbnails.render_attachment, data["id"])
+
+
+@override_settings(
+    DELETIONS={"WORKER": "command", "BATCH_SIZE": 2},
+    NOTIFICATIONS={"WORKER": "command"},
+    ATTACHMENT_BLOBS={"GRACE_SECONDS": 0},
+)
+class DeletionTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.member = cls.add_member("member@example.com", "Member")
+        cls.tasks = [
+            Task.objects.create(project=cls.project, title=f"T{i}", created_by=cls.member) for i in range(3)
+        ]
+        for task in cls.tasks:
+            TaskAssignment.objects.create(task=task, user=cls.member)
+            Subtask.objects.create(task=task, title="S", status="done")
+            for i in range(3):
+                Comment.objects.create(task=task, author=cls.owner, content=f"c{i}")
+
+    def setUp(self):
+        super().setUp()
+        self.media = self.use_temp_media()
+
+    def attach(self, task, content):
+        return Attachment.objects.create(
+            task=task, uploaded_by=self.owner, file=SimpleUploadedFile("a.txt", content), filename="a.txt"
+        )
+
+    def stored_files(self):
+        return [name for folder, _, names in os.walk(self.media) if not folder.endswith("tmp") for name in names]
+
+    def test_concurrent_deletes_count_once(self):
+        task = self.tasks[0]
+        before = self.client.get(f"/api/projects/{self.project.pk}/stats/").data
+        # both requests loaded the task before either hid it
+        self.assertIsNotNone(purge.delete_task(task, self.owner))
+        self.assertIsNone(purge.delete_task(task, self.owner))
+        with mock.patch.object(TaskDetailView, "get_object", return_value=task):
+            self.assertEqual(self.client.delete(f"/api/tasks/{task.pk}/").status_code, 404)
+        after = self.client.get(f"/api/projects/{self.project.pk}/stats/").data
+        self.assertEqual((after["tasks_total"], after["subtasks_done"]), (before["tasks_total"] - 1, before["subtasks_done"] - 1))
+        self.assertEqual(DeletionJob.objects.filter(task_id=task.pk).count(), 1)
+        self.assertEqual(Change.objects.filter(kind="task", object_id=task.pk, action="delete").count(), 1)
+
+        self.assertIsNotNone(purge.delete_project(self.project, self.owner))
+        self.assertIsNone(purge.delete_project(self.project, self.owner))
+        self.assertEqual(DeletionJob.objects.filter(kind="project").count(), 1)
+
+    def purge(self):
+        out = StringIO()
+        call_command("process_deletions", stdout=out)
+        return out.getvalue()
+
+    def test_project_is_hidden_at_once_and_purged_in_batches(self):
+        from notifications import inbox, worker
+        from notifications.events import publish
+        from notifications.models import Notification, NotificationEvent
+
+        self.attach(self.tasks[0], b"first")
+        self.attach(self.tasks[1], b"second")
+        publish("comment_added", actor=self.owner, project=self.project, task=self.tasks[0], excerpt="x")
+        worker.process_pending()
+        self.assertEqual(inbox.unread_count(self.member), 1)
+        self.client.get(f"/api/projects/{self.project.pk}/stats/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f"/api/projects/{self.project.pk}/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.data["kind"], response.data["status"]), ("project", "pending"))
+        self.assertTrue(response["Location"].endswith(f"/api/deletions/{response.data['id']}/"))
+        self.assertEqual(self.client.get(f"/api/projects/{self.project.pk}/").status_code, 404)
+        self.assertEqual(self.client.get("/api/projects/").data["results"], [])
+        self.assertEqual(self.client.get(f"/api/tasks/{self.tasks[0].pk}/").status_code, 403)
+
+        self.assertIn("Finished 1 deletion jobs", self.purge())
+        job = self.client.get(response["Location"]).data
+        self.assertEqual((job["status"], job["progress"], job["files_removed"]), ("done", 1.0, 2))
+        self.assertEqual(job["deleted"], job["total"])
+        for model in (Task.all_objects, Comment.objects, Subtask.objects, TaskAssignment.objects,
+                      Attachment.objects, Notification.objects, NotificationEvent.objects, Project.all_objects):
+            self.assertFalse(model.exists(), model.model)
+        self.assertEqual(self.stored_files(), [])
+        self.assertEqual(inbox.unread_count(self.member), 0)
+
+    def test_soft_delete_cost_does_not_depend_on_project_size(self):
+        def delete_queries(project):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.delete(f"/api/projects/{project.pk}/").status_code, 202)
+            return len(queries)
+
+        small = Project.objects.create(name="S", start_date="2025-01-01", created_by=self.owner)
+        ProjectMembership.objects.create(project=small, user=self.owner, role="owner")
+        self.assertEqual(delete_queries(small), delete_queries(self.project))
+
+    def test_task_is_hidden_at_once_and_its_children_leave_tombstones(self):
+        task, other = self.tasks[0], self.tasks[1]
+        comment = task.comments.first()
+        self.attach(task, b"shared")
+        kept = self.attach(other, b"shared")
+        cursor = self.client.get(f"/api/projects/{self.project.pk}/changes/").data["cursor"]
+
+        response = self.client.delete(f"/api/tasks/{task.pk}/")
+        self.assertEqual((response.status_code, response.data["kind"]), (202, "task"))
+        self.assertEqual(self.client.get(f"/api/tasks/{task.pk}/").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/tasks/{task.pk}/comments/").status_code, 404)
+        self.assertEqual(self.client.patch(f"/api/comments/{comment.pk}/", {"content": "x"}).status_code, 404)
+        self.assertEqual(len(self.client.get(f"/api/projects/{self.project.pk}/tasks/").json()["results"]), 2)
+        stats = self.client.get(f"/api/projects/{self.project.pk}/stats/").data
+        self.assertEqual((stats["tasks_total"], stats["subtasks_total"], stats["subtasks_done"]), (2, 2, 2))
+
+        self.purge()
+        self.assertFalse(Task.all_objects.filter(pk=task.pk).exists())
+        self.assertEqual(Comment.objects.count(), 6)
+        self.assertEqual(kept.file.read(), b"shared")  # the blob is still referenced
+        changes = self.client.get(f"/api/projects/{self.project.pk}/changes/", {"since": cursor}).data["changes"]
+        self.assertIn({"kind": "comment", "id": comment.pk, "action": "delete"}, changes)
+        self.assertEqual(
+            self.client.get(f"/api/projects/{self.project.pk}/stats/").data["tasks_total"], 2
+        )
+
+    def test_jobs_are_private_and_abandoned_ones_are_resumed(self):
+        job_url = self.client.delete(f"/api/tasks/{self.tasks[0].pk}/")["Location"]
+        client = APIClient()
+        client.force_authenticate(self.member)
+        self.assertEqual(client.get(job_url).status_code, 404)
+
+        DeletionJob.objects.update(status="running")
+        self.purge()
+        self.assertEqual(DeletionJob.objects.get().status, "running")  # its worker may still be busy
+        DeletionJob.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertIn("Finished 1 deletion jobs", self.purge())
+        self.assertEqual(self.client.get(job_url).data["status"], "done")
+
+
+class AttachmentDownloadTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.task = Task.objects.create(project=cls.project, title="T", created_by=cls.owner)
+
+    def setUp(self):
+        super().setUp()
+        self.use_temp_media()
+        self.attachment = Attachment.objects.create(
+            task=self.task, uploaded_by=self.owner, file=SimpleUploadedFile("report.txt", b"0123456789"),
+            filename="report.txt",
+        )
+        self.url = f"/api/attachments/{self.attachment.pk}/download/"
+
+    def test_whole_file_with_validators(self):
+        response = self.client.get(self.url, HTTP_ACCEPT="application/pdf")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.getvalue(), b"0123456789")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn('filename="report', response["Content-Disposition"])
+        self.assertIn("private", response["Cache-Control"])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_ranges(self):
+        for header, body, content_range in [
+            ("bytes=2-5", b"2345", "bytes 2-5/10"),
+            ("bytes=7-", b"789", "bytes 7-9/10"),
+            ("bytes=-3", b"789", "bytes 7-9/10"),
+            ("bytes=8-100", b"89", "bytes 8-9/10"),
+        ]:
+            response = self.client.get(self.url, HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(response.getvalue(), body, header)
+            self.assertEqual(response["Content-Range"], content_range)
+            self.assertEqual(response["Content-Length"], str(len(body)))
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-")
+        self.assertEqual((response.status_code, response["Content-Range"]), (416, "bytes */10"))
+        # several ranges, nonsense and a stale If-Range get the whole file
+        for headers in [{"HTTP_RANGE": "bytes=0-1,4-5"}, {"HTTP_RANGE": "lines=1-2"},
+                        {"HTTP_RANGE": "bytes=0-1", "HTTP_IF_RANGE": '"old"'}]:
+            self.assertEqual(self.client.get(self.url, **headers).status_code, 200)
+
+    def test_members_only(self):
+        outsider = User.objects.create_user(email="out@example.com", password="pass1234", name="Out")
+        client = APIClient()
+        client.force_authenticate(outsider)
+        self.assertEqual(client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get("/media/" + self.attachment.file.name).status_code, 404)
+
+        listed = self.client.get(f"/api/tasks/{self.task.pk}/attachments/").data["results"][0]
+        self.assertTrue(listed["download_url"].endswith(self.url))
+
+    def test_offload_headers(self):
+        with override_settings(ATTACHMENT_DOWNLOADS={"OFFLOAD": "x-accel-redirect"}):
+            response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 200)  # nginx applies the range
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/" + self.attachment.file.name)
+        self.assertEqual(response.content, b"")
+        with override_settings(ATTACHMENT_DOWNLOADS={"OFFLOAD": "x-sendfile"}):
+            response = self.client.get(self.url)
+        self.assertEqual(response["X-Sendfile"], self.attachment.file.path)
@@ -0,0 +1,179 @@
+"""
+WebP thumbnails of image attachments and profile pictures.
+
+Rendering happens off the request path:
+
+* settings.THUMBNAILS["WORKER"] == "thread": a thread pool in the web
+  process picks the image up once the upload's transaction commits.
+* "command": nothing runs in the web process; run
+  ``manage.py generate_thumbnails`` periodically instead.
+
+Thumbnails are named after the SHA-256 of the original, so identical images
+share them and a size is never rendered twice:
+
+    thumbnails/<ab>/<sha256>/<size>.webp            attachments, served to
+                                                    members by AttachmentThumbnailView
+    profiles/thumbnails/<ab>/<sha256>/<size>.webp   profile pictures, public
+                                                    like the pictures themselves
+
+An attachment's digest is part of its stored name (tasks/storage.py), so its
+thumbnail names follow from it; the sizes rendered so far are kept in
+Attachment.thumbnail_sizes, so listing attachments never asks the storage.
+Attachments stored before content addressing get none. A profile picture is
+hashed when it is rendered and the result is kept in User.profile_thumbnails.
+"""
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_PREFIX = "thumbnails"
+PROFILE_PREFIX = "profiles/thumbnails"
+
+_executor = None
+
+
+def config():
+    config = {"WORKER": "thread", "WORKERS": 2, "SIZES": {"small": 128, "medium": 512, "large": 1280}, "QUALITY": 80}
+    config.update(getattr(settings, "THUMBNAILS", {}))
+    return config
+
+
+def is_image(filename):
+    """Whether Pillow can open a file of this name."""
+    extension = os.path.splitext(filename or "")[1].lower()
+    return Image.registered_extensions().get(extension) in Image.OPEN
+
+
+def thumbnail_names(prefix, digest):
+    return {size: f"{prefix}/{digest[:2]}/{digest}/{size}.webp" for size in config()["SIZES"]}
+
+
+def attachment_thumbnails(attachment):
+    """{size: stored name} for an image attachment, rendered yet or not; None for other files."""
+    digest = attachment.file.storage.digest(attachment.file.name)
+    if digest is None or not is_image(attachment.filename):
+        return None
+    return thumbnail_names(ATTACHMENT_PREFIX, digest)
+
+
+def profile_thumbnails(user):
+    """{size: stored name} of the current profile picture's thumbnails, or None until rendered."""
+    rendered = user.profile_thumbnails or {}
+    if not user.profile_picture or rendered.get("source") != user.profile_picture.name:
+        return None
+    return rendered.get("sizes") or None
+
+
+def render(file, names):
+    """Render the sizes among `names` ({size: stored name}) not stored yet from an open image."""
+    sizes = config()["SIZES"]
+    missing = {size: name for size, name in names.items() if not default_storage.exists(name)}
+    if not missing:
+        return
+    with Image.open(file) as original:
+        edge = max(sizes[size] for size in missing)
+        original.draft("RGB", (edge, edge))  # JPEG: decode at a reduced scale
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        # largest first, each one scaled down from the one before
+        for size in sorted(missing, key=sizes.get, reverse=True):
+            image.thumbnail((sizes[size], sizes[size]), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            image.save(buffer, "WEBP", quality=config()["QUALITY"])
+            name = default_storage.save(missing[size], ContentFile(buffer.getvalue()))
+            if name != missing[size]:
+                default_storage.delete(name)  # another worker stored it first
+
+
+def render_attachment(attachment_id):
+    from .models import Attachment
+
+    attachment = Attachment.objects.filter(pk=attachment_id).first()
+    names = attachment and attachment_thumbnails(attachment)
+    if names:
+        with attachment.file.storage.open(attachment.file.name, "rb") as file:
+            render(file, names)
+        # also when another attachment of the same image rendered them
+        Attachment.objects.filter(pk=attachment_id).update(thumbnail_sizes=sorted(names))
+
+
+def render_profile(user_id):
+    User = get_user_model()
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or not user.profile_picture:
+        return
+    source = user.profile_picture.name
+    with user.profile_picture.storage.open(source, "rb") as file:
+        sha256 = hashlib.sha256()
+        for chunk in file.chunks():
+            sha256.update(chunk)
+        names = thumbnail_names(PROFILE_PREFIX, sha256.hexdigest())
+        file.seek(0)
+        render(file, names)
+    # unless the picture changed meanwhile; update() does not signal post_save
+    User.objects.filter(pk=user_id, profile_picture=source).update(
+        profile_thumbnails={"source": source, "sizes": names}
+    )
+
+
+def schedule(renderer, pk):
+    """Have `renderer(pk)` run in the pool once the current transaction commits."""
+    if config()["WORKER"] != "thread":
+        return
+    transaction.on_commit(lambda: _submit(renderer, pk))
+
+
+def _submit(renderer, pk):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config()["WORKERS"], thread_name_prefix="thumbnails")
+    _executor.submit(_run, renderer, pk)
+
+
+def _run(renderer, pk):
+    close_old_connections()
+    try:
+        renderer(pk)
+    except Exception:
+        logger.exception("Rendering thumbnails with %s(%s) failed.", renderer.__name__, pk)
+    finally:
+        connection.close()
+
+
+def render_missing():
+    """Render every thumbnail not stored yet. Returns how many images were rendered."""
+    from .models import Attachment
+
+    User = get_user_model()
+    rendered = 0
+    for attachment in Attachment.objects.only("pk", "file", "filename", "thumbnail_sizes").iterator():
+        names = attachment_thumbnails(attachment)
+        if names and not set(names) <= set(attachment.thumbnail_sizes):
+            rendered += _render_or_log(render_attachment, attachment.pk)
+    users = User.objects.exclude(profile_picture="").exclude(profile_picture__isnull=True)
+    for user in users.only("pk", "profile_picture", "profile_thumbnails").iterator():
+        if profile_thumbnails(user) is None:
+            rendered += _render_or_log(render_profile, user.pk)
+    return rendered
+
+
+def _render_or_log(renderer, pk):
+    try:
+        renderer(pk)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        # not an image after all, truncated or too large: skip it
+        logger.warning("Could not render thumbnails with %s(%s).", renderer.__name__, pk, exc_info=True)
+        return 0
+    return 1
@@ -0,0 +1,259 @@
+"""
+Resumable, chunked attachment uploads.
+
+    POST   /api/tasks/<task_pk>/uploads/   {"filename", "size", "sha256"}
+    PUT    /api/uploads/<id>/              Content-Range: bytes <first>-<last>/<size>
+    GET    /api/uploads/<id>/              where to resume: {"offset": ...}; status
+    POST   /api/uploads/<id>/finalize/     202, assembly queued
+    DELETE /api/uploads/<id>/
+
+Each PUT streams its body straight into storage as one part, so a request
+holds a worker only for as long as one chunk takes to arrive and never
+buffers it in memory. Chunks must arrive in order.
+
+Finalizing only queues the session. Assembly concatenates the parts into the
+content-addressed attachment storage (tasks/storage.py), which hashes them in
+the same pass, checks the SHA-256 announced when the session was created
+against that digest and only then creates the Attachment row. The client
+polls GET /api/uploads/<id>/ until "status" is "done" (the attachment is in
+"attachment") or "failed" ("error" says why). A running SHA-256 kept while
+the chunks arrive would have to live in one process, and chunks may reach
+any worker; copying is unavoidable anyway, so hashing costs no extra read.
+
+Sessions are assembled the way notification fan-out runs
+(notifications/worker.py): with settings.ATTACHMENT_UPLOADS["WORKER"] ==
+"thread" in a background thread of the web process once the finalize request
+commits, with "command" by ``manage.py assemble_uploads --loop``. An
+assembly that started more than STALE_SECONDS ago is taken over by
+assemble_uploads.
+"""
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import Attachment, UploadPart, UploadSession
+from .storage import attachment_storage, collect
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+READ_SIZE = 64 * 1024
+
+_executor = None
+
+
+def config():
+    config = {
+        "MAX_SIZE": 2 * 1024 ** 3, "MAX_CHUNK_SIZE": 16 * 1024 ** 2, "SESSION_TTL": 24 * 3600,
+        "WORKER": "thread", "STALE_SECONDS": 600,
+    }
+    config.update(getattr(settings, "ATTACHMENT_UPLOADS", {}))
+    return config
+
+
+class OffsetConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Chunk does not start where the upload left off."
+    default_code = "offset_conflict"
+
+    def __init__(self, offset):
+        super().__init__()
+        # keep the offset a number; APIException would turn it into a string
+        self.detail = {"detail": self.detail, "offset": offset}
+
+
+def expired_before():
+    return timezone.now() - timedelta(seconds=config()["SESSION_TTL"])
+
+
+def parse_content_range(header, size):
+    """(first byte, length) of a chunk of an upload of `size` bytes."""
+    match = CONTENT_RANGE.match(header or "")
+    if match is None:
+        raise ValidationError({"Content-Range": "Expected 'bytes <first>-<last>/<size>'."})
+    first, last, total = map(int, match.groups())
+    if total != size or first > last or last >= size:
+        raise ValidationError({"Content-Range": f"Range must lie within the {size} bytes of this upload."})
+    if last - first + 1 > config()["MAX_CHUNK_SIZE"]:
+        raise ValidationError({"Content-Range": f"Chunks may be at most {config()['MAX_CHUNK_SIZE']} bytes."})
+    return first, last - first + 1
+
+
+class _ChunkReader:
+    """The first `length` bytes of a request body, read as storage asks for them."""
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.remaining = length
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        if self.remaining <= 0 or self.stream is None:
+            return b""
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.stream.read(size)
+        self.remaining -= len(data)
+        self.read_bytes += len(data)
+        return data
+
+
+class _PartsReader:
+    """The parts of a session back to back."""
+
+    def __init__(self, names):
+        self.names = iter(names)
+        self.current = None
+
+    def read(self, size=-1):
+        size = READ_SIZE if size is None or size < 0 else size
+        while True:
+            if self.current is None:
+                name = next(self.names, None)
+                if name is None:
+                    return b""
+                self.current = default_storage.open(name, "rb")
+            data = self.current.read(size)
+            if data:
+                return data
+            self.current.close()
+            self.current = None
+
+
+def write_chunk(session, first, length, stream):
+    """Store `length` bytes of `stream` as the part of `session` at `first`."""
+    if first != session.received:
+        raise OffsetConflict(session.received)
+
+    reader = _ChunkReader(stream, length)
+    name = default_storage.save(f"uploads/{session.pk}/{first}", File(reader))
+    if reader.read_bytes != length:
+        default_storage.delete(name)
+        raise ValidationError({"Content-Range": f"Expected {length} bytes, got {reader.read_bytes}."})
+
+    try:
+        with transaction.atomic():
+            UploadPart.objects.create(session=session, offset=first, size=length, name=name)
+            UploadSession.objects.filter(pk=session.pk).update(received=F("received") + length)
+    except IntegrityError:
+        # another request stored this chunk first
+        default_storage.delete(name)
+        session.refresh_from_db(fields=["received"])
+        raise OffsetConflict(session.received)
+    session.received += length
+
+
+def finalize(session):
+    """
+    Queue `session` for assembly once every byte is in, or raise
+    ValidationError. Finalizing again is harmless. Returns the session.
+    """
+    if session.received != session.size:
+        raise ValidationError({"detail": f"Only {session.received} of {session.size} bytes received."})
+
+    with transaction.atomic():
+        queued = UploadSession.objects.filter(pk=session.pk, status="uploading").update(status="queued")
+        if queued:
+            schedule(session)
+    session.refresh_from_db()
+    return session
+
+
+def assemble(session):
+    """Build the attachment of a claimed session, or mark the session failed. Returns the attachment."""
+    names = list(session.parts.order_by("offset").values_list("name", flat=True))
+    # the attachment storage names the file after the SHA-256 of what it read
+    name = attachment_storage.save(session.filename, File(_PartsReader(names)))
+    matched = attachment_storage.digest(name) == session.sha256
+    attachment = None
+    with transaction.atomic():
+        if not matched:
+            UploadSession.objects.filter(pk=session.pk, status="assembling").update(
+                status="failed", error="Checksum mismatch; the upload has been discarded."
+            )
+        else:
+            attachment = Attachment.objects.create(
+                task_id=session.task_id, uploaded_by_id=session.uploaded_by_id, file=name, filename=session.filename
+            )
+            if not UploadSession.objects.filter(pk=session.pk, status="assembling").update(
+                status="done", attachment=attachment
+            ):
+                # discarded meanwhile, or finished by a worker that took over
+                transaction.set_rollback(True)
+                attachment = None
+        # the parts leave storage on commit (tasks/signals.py)
+        UploadPart.objects.filter(session_id=session.pk).delete()
+    if attachment is None:
+        # unless another attachment has the same content
+        collect([name], grace=None if matched else 0)
+    return attachment
+
+
+def _runnable():
+    stale = timezone.now() - timedelta(seconds=config()["STALE_SECONDS"])
+    return Q(status="queued") | Q(status="assembling", updated_at__lt=stale)
+
+
+def run(session_id):
+    """Claim and assemble one session. Returns False when it is not waiting or is being assembled elsewhere."""
+    claimed = UploadSession.objects.filter(_runnable(), pk=session_id).update(
+        status="assembling", updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+    assemble(UploadSession.objects.get(pk=session_id))
+    return True
+
+
+def run_pending():
+    """Assemble every queued or abandoned session, oldest first. Returns how many were assembled."""
+    session_ids = list(
+        UploadSession.objects.filter(_runnable()).order_by("created_at").values_list("pk", flat=True)
+    )
+    return sum(run(session_id) for session_id in session_ids)
+
+
+def schedule(session):
+    """Have the session assembled in the background once the current transaction commits."""
+    if config()["WORKER"] != "thread":
+        return
+    session_id = session.pk
+    transaction.on_commit(lambda: _submit(session_id))
+
+
+def _submit(session_id):
+    global _executor
+    if _executor is None:
+        # one thread: assembly is disk-bound and would only compete for the disk
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="uploads")
+    _executor.submit(_run, session_id)
+
+
+def _run(session_id):
+    close_old_connections()
+    try:
+        run(session_id)
+    except Exception:
+        logger.exception("Assembling upload %s failed; assemble_uploads retries it later.", session_id)
+    finally:
+        connection.close()
+
+
+def discard(session):
+    """Drop a session; its parts leave storage when the transaction commits."""
+    UploadSession.objects.filter(pk=session.pk).delete()
+
+
+def prune(before):
+    """Drop sessions started before `before`. Returns how many."""
+    deleted, by_model = UploadSession.objects.filter(created_at__lt=before).delete()
+    return by_model.get(UploadSession._meta.label, 0)
@@ -1,11 +1,19 @@
 from django.urls import path
-from .views import (TaskListCreateView, TaskDetailView, 
+from .views import (TaskListCreateView, TaskDetailView, TaskBulkView, TaskExportView,
+                    ProjectChangesView, SearchView, MyTasksView,
                     CommentListCreateView, CommentDetailView,
                     SubtaskListCreateView, SubtaskDetailView,
-                    AttachmentDetailView, AttachmentListCreateView)
+                    AttachmentDetailView, AttachmentListCreateView, AttachmentDownloadView, AttachmentThumbnailView,
+                    UploadSessionCreateView, UploadSessionDetailView, UploadFinalizeView,
+                    DeletionJobDetailView)
 
 urlpatterns = [
     path("projects/<int:project_pk>/tasks/", TaskListCreateView.as_view(), name="task-list-create"),
+    path("projects/<int:project_pk>/tasks/bulk/", TaskBulkView.as_view(), name="task-bulk"),
+    path("projects/<int:project_pk>/tasks/export/", TaskExportView.as_view(), name="task-export"),
+    path("projects/<int:project_pk>/changes/", ProjectChangesView.as_view(), name="project-changes"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("tasks/mine/", MyTasksView.as_view(), name="task-mine"),
     path("tasks/<int:pk>/", TaskDetailView.as_view(), name="task-detail"),
     path("tasks/<int:task_pk>/comments/", CommentListCreateView.as_view(), name="comment-list-create"),
     path("comments/<int:pk>/", CommentDetailView.as_view(), name="comment-detail"),
@@ -13,4 +21,12 @@ urlpatterns = [
     path("subtasks/<int:pk>/", SubtaskDetailView.as_view(), name="subtask-detail"),
     path("tasks/<int:task_pk>/attachments/", AttachmentListCreateView.as_view(), name="attachment-list-create"),
     path("attachments/<int:pk>/", AttachmentDetailView.as_view(), name="attachment-detail"),
+    path("attachments/<int:pk>/download/", AttachmentDownloadView.as_view(), name="attachment-download"),
+    path(
+        "attachments/<int:pk>/thumbnails/<str:size>/", AttachmentThumbnailView.as_view(), name="attachment-thumbnail"
+    ),
+    path("tasks/<int:task_pk>/uploads/", UploadSessionCreateView.as_view(), name="upload-create"),
+    path("uploads/<uuid:pk>/", UploadSessionDetailView.as_view(), name="upload-detail"),
+    path("uploads/<uuid:pk>/finalize/", UploadFinalizeView.as_view(), name="upload-finalize"),
+    path("deletions/<uuid:pk>/", DeletionJobDetailView.as_view(), name="deletion-job-detail"),
 ]
@@ -1,82 +1,340 @@
-from rest_framework import generics, permissions
+import os
+
+from rest_framework import generics, permissions, status
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
+from django.core.files.storage import default_storage
+from django.http import Http404, StreamingHttpResponse
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from .models import Task, Comment, Subtask, Attachment
+from .models import Task, Comment, Subtask, Attachment, DeletionJob, UploadSession
 from .serializers import (TaskSerializer, CommentSerializer, 
-                          SubtaskSerializer, AttachmentSerializer)
+                          SubtaskSerializer, AttachmentSerializer,
+                          TaskBulkUpdateSerializer, UploadSessionSerializer,
+                          DeletionJobSerializer)
 from projects.models import Project, ProjectMembership
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from projects.permissions import IsMember, IsAdminOrOwner, IsSelfOrAdminOrOwner, IsProjectMember, IsProjectOwner
+from projects.response_cache import CachedListMixin
+from projects.roles import get_request_role
+from config.conditional import ConditionalObjectMixin
+from config.fastread import FastListMixin
+from config.sparse import SparseQuerysetMixin
+from notifications.events import publish
+from .realtime import broadcast
+from . import changes, downloads, purge, storage, thumbnails, uploads
+from .search import search
+from .filters import MyTaskFilterSet, TaskFilterSet
+from rest_framework.exceptions import ValidationError
+from .export import CSVRenderer, NDJSONRenderer, iter_rows, stream_csv, stream_ndjson
 from rest_framework.exceptions import PermissionDenied
 
-class TaskListCreateView(generics.ListCreateAPIView):
+class TaskListCreateView(CachedListMixin, FastListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     GET  /api/projects/{project_pk}/tasks/
     POST /api/projects/{project_pk}/tasks/
     """
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated, IsMember]
+    filterset_class = TaskFilterSet
+    ordering_fields = ["created_at", "title", "priority", "status"]
+
+    def check_permissions(self, request):
+        super().check_permissions(request)
+        # IsMember only checks objects and a list has none. By id, so a
+        # cached list needs no query; before a body is validated.
+        if get_request_role(request, self.kwargs["project_pk"]) is None:
+            get_object_or_404(Project, pk=self.kwargs["project_pk"])
+            raise PermissionDenied("You are not a member of this project.")
 
     def get_queryset(self):
-        project = get_object_or_404(Project, pk=self.kwargs["project_pk"])
-        return Task.objects.filter(project=project)
+        return TaskSerializer.setup_eager_loading(Task.objects.filter(project_id=self.kwargs["project_pk"]))
+
+    def get_cache_projects(self):
+        role = get_request_role(self.request, self.kwargs["project_pk"])
+        return [(self.kwargs["project_pk"], role)] if role else None
+
+    def get_serializer_context(self):
+        # assignees are validated against this project's members
+        return {**super().get_serializer_context(), "project": self.kwargs["project_pk"]}
 
     def perform_create(self, serializer):
         project = get_object_or_404(Project, pk=self.kwargs["project_pk"])
-        # user must at least be a member
-        if not ProjectMembership.objects.filter(project=project, user=self.request.user).exists():
+        task = serializer.save(project=project, created_by=self.request.user)
+        broadcast(project.pk, "task.created", task.pk, serializer.data)
+
+
+class MyTasksView(SparseQuerysetMixin, generics.ListAPIView):
+    """
+    GET /api/tasks/mine/
+
+    Tasks assigned to the caller in every project they still belong to, in
+    one query: the assignment join, scoped by a membership subquery. Accepts
+    the task list filters plus ?project=<id>.
+    """
+    serializer_class = TaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_class = MyTaskFilterSet
+    ordering_fields = ["created_at", "priority", "status"]
+
+    def get_queryset(self):
+        user = self.request.user
+        projects = ProjectMembership.objects.filter(user=user).values("project_id")
+        return TaskSerializer.setup_eager_loading(
+            Task.objects.filter(assignees=user, project_id__in=projects)
+        )
+
+
+class TaskBulkView(generics.GenericAPIView):
+    """
+    POST  /api/projects/{project_pk}/tasks/bulk/   body: [{task}, ...]
+    PATCH /api/projects/{project_pk}/tasks/bulk/   body: [{"id", "status", "priority", "assignees"}, ...]
+
+    All-or-nothing: if any item is invalid nothing is written and the
+    response lists the errors per item, in request order.
+    """
+    serializer_class = TaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    max_items = 1000
+
+    def get_project(self):
+        project = get_object_or_404(Project, pk=self.kwargs["project_pk"])
+        if get_request_role(self.request, project) is None:
             raise PermissionDenied("You are not a member of this project.")
-        serializer.save(project=project, created_by=self.request.user)
+        return project
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "project": self.kwargs["project_pk"]}
+
+    def _respond(self, tasks, status_code, event):
+        loaded = TaskSerializer.setup_eager_loading(Task.objects.all()).in_bulk([task.pk for task in tasks])
+        # in request order, so clients can match results to their items by position
+        data = TaskSerializer([loaded[task.pk] for task in tasks], many=True).data
+        for item in data:
+            broadcast(int(self.kwargs["project_pk"]), event, item["id"], item)
+        return Response(data, status=status_code)
+
+    def post(self, request, project_pk):
+        project = self.get_project()
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False, max_length=self.max_items)
+        serializer.is_valid(raise_exception=True)
+        tasks = serializer.save(project=project, created_by=request.user)
+        return self._respond(tasks, status.HTTP_201_CREATED, "task.created")
+
+    def patch(self, request, project_pk):
+        project = self.get_project()
+        serializer = TaskBulkUpdateSerializer(
+            Task.objects.filter(project=project),
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=self.max_items,
+            context={**self.get_serializer_context(), "role": get_request_role(request, project)},
+        )
+        serializer.is_valid(raise_exception=True)
+        tasks = serializer.save()
+        return self._respond(tasks, status.HTTP_200_OK, "task.updated")
+
 
+class TaskExportView(APIView):
+    """
+    GET /api/projects/{project_pk}/tasks/export/?format=ndjson|csv
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+    Streams every task of the project, reading the table in chunks so
+    memory stays flat however large the project is.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def handle_exception(self, exc):
+        # errors are JSON whatever was asked for; the export renderers only
+        # pass a streamed body through. Also covers a 406 from negotiation.
+        self.request.accepted_renderer = JSONRenderer()
+        self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
+    def get(self, request, project_pk):
+        project = get_object_or_404(Project, pk=project_pk)
+        if get_request_role(request, project) is None:
+            raise PermissionDenied("You are not a member of this project.")
+
+        renderer = request.accepted_renderer
+        stream = stream_csv if renderer.format == "csv" else stream_ndjson
+        response = StreamingHttpResponse(stream(iter_rows(project)), content_type=renderer.media_type)
+        response["Content-Disposition"] = f'attachment; filename="project-{project.pk}-tasks.{renderer.format}"'
+        return response
+
+
+class ProjectChangesView(APIView):
+    """
+    GET /api/projects/{project_pk}/changes/
+    GET /api/projects/{project_pk}/changes/?since=<cursor>
+
+    Without `since`, returns the current cursor: take it, then load the
+    lists. With it, returns the objects created, updated or deleted after
+    the cursor (latest state only, deletes as tombstones) and the cursor to
+    send next time. Keep asking while `has_more` is true. 410 if the log
+    behind the cursor has been pruned: reload the lists and start over.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_sources(self, project):
+        live_tasks = Task.objects.filter(project=project)
+        return {
+            "task": (
+                TaskSerializer.setup_eager_loading(Task.objects.filter(project=project)),
+                TaskSerializer,
+            ),
+            "subtask": (Subtask.objects.filter(task__in=live_tasks), SubtaskSerializer),
+            "comment": (
+                Comment.objects.filter(task__in=live_tasks).select_related("author"),
+                CommentSerializer,
+            ),
+            "attachment": (
+                Attachment.objects.filter(task__in=live_tasks).select_related("uploaded_by"),
+                AttachmentSerializer,
+            ),
+        }
+
+    def get(self, request, project_pk):
+        project = get_object_or_404(Project, pk=project_pk)
+        if get_request_role(request, project) is None:
+            raise PermissionDenied("You are not a member of this project.")
+
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"cursor": changes.format_cursor(changes.head(project.pk)), "has_more": False, "changes": []})
+        try:
+            entries, cursor, has_more = changes.since(project.pk, changes.parse_cursor(since))
+        except ValueError:
+            raise ValidationError({"since": "Must be a cursor returned by this endpoint."})
+        except changes.CursorExpired:
+            return Response(
+                {"detail": "This cursor has expired; reload the project and start from a new one."},
+                status=status.HTTP_410_GONE,
+            )
+        wanted = {}
+        for kind, object_id, action in entries:
+            if action == "upsert":
+                wanted.setdefault(kind, []).append(object_id)
+
+        data = {}
+        for kind, (queryset, serializer_class) in self.get_sources(project).items():
+            if kind in wanted:
+                objects = queryset.filter(pk__in=wanted[kind])
+                for item in serializer_class(objects, many=True, context={"request": request}).data:
+                    data[(kind, item["id"])] = item
+
+        results = []
+        for kind, object_id, action in entries:
+            if action == "delete":
+                results.append({"kind": kind, "id": object_id, "action": "delete"})
+            elif (kind, object_id) in data:
+                results.append({"kind": kind, "id": object_id, "action": "upsert", "data": data[(kind, object_id)]})
+            # else deleted after this page; its tombstone is on a later one
+        return Response({"cursor": changes.format_cursor(cursor), "has_more": has_more, "changes": results})
+
+
+class SearchView(APIView):
+    """
+    GET /api/search/?q=<text>[&project=<id>][&limit=<n>]
+
+    Ranked matches in task titles and descriptions, comments and subtask
+    titles across the caller's projects.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            raise ValidationError({"q": "This parameter is required."})
+        project = request.query_params.get("project")
+        limit = request.query_params.get("limit", "20")
+        if (project and not project.isdigit()) or not limit.isdigit():
+            raise ValidationError({"detail": "project and limit must be integers."})
+        results = search(request.user, text, project_id=int(project) if project else None, limit=int(limit))
+        return Response({"results": results})
+
+
+class TaskDetailView(ConditionalObjectMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     GET    /api/tasks/{id}/
     PATCH  /api/tasks/{id}/
     DELETE /api/tasks/{id}/
+
+    Sends ETag/Last-Modified; honours If-None-Match on GET and If-Match on writes.
     """
-    queryset = Task.objects.all()
+    # assignees are read only when the body is serialized, so not prefetched:
+    # a 304 answer never needs them
+    queryset = Task.objects.select_related("created_by")
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated, IsMember]
 
     def perform_update(self, serializer):
-        task = self.get_object()
-        project = task.project
+        task = serializer.instance
 
         # Allow if: creator OR admin/owner
-        if task.created_by != self.request.user and not IsAdminOrOwner().has_object_permission(self.request, self, project):
+        if task.created_by_id != self.request.user.pk and not IsAdminOrOwner().has_object_permission(self.request, self, task):
             raise PermissionDenied("You do not have permission to update this task.")
 
         serializer.save()
+        broadcast(task.project_id, "task.updated", task.pk, serializer.data)
 
     def perform_destroy(self, instance):
-        project = instance.project
-
         # Only admin/owner can delete tasks
-        if not IsAdminOrOwner().has_object_permission(self.request, self, project):
+        if not IsAdminOrOwner().has_object_permission(self.request, self, instance):
             raise PermissionDenied("Only admins or owner can delete tasks.")
 
-        instance.delete()
+        # hidden at once, purged in the background (tasks/purge.py)
+        self.deletion_job = purge.delete_task(instance, self.request.user)
+        if self.deletion_job is None:
+            raise Http404("No Task matches the given query.")
+        broadcast(instance.project_id, "task.deleted", instance.pk)
+
+    def destroy(self, request, *args, **kwargs):
+        response = super().destroy(request, *args, **kwargs)
+        if response.status_code != status.HTTP_204_NO_CONTENT:
+            return response  # failed If-Match
+        return deletion_accepted(request, self.deletion_job)
 
 
-class CommentListCreateView(generics.ListCreateAPIView):
+class TaskChildListMixin:
+    """
+    For the list/create views under /api/tasks/{task_pk}/. Their permission
+    classes only check objects and a list has none, so membership of the
+    task's project is checked here, for reads and writes alike and before
+    a body is validated. Sets self.task.
+    """
+
+    def check_permissions(self, request):
+        super().check_permissions(request)
+        self.task = get_object_or_404(Task, pk=self.kwargs["task_pk"])
+        if get_request_role(request, self.task) is None:
+            raise PermissionDenied("You are not a member of this project.")
+
+
+class CommentListCreateView(TaskChildListMixin, FastListMixin, SparseQuerysetMixin, generics.ListCreateAPIView):
     """
     GET  /api/tasks/{task_pk}/comments/
     POST /api/tasks/{task_pk}/comments/
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsMember]
+    ordering_fields = ["created_at"]
 
     def get_queryset(self):
-        task = get_object_or_404(Task, pk=self.kwargs["task_pk"])
-        return task.comments.all()
+        return self.task.comments.all()
 
     def perform_create(self, serializer):
-        task = get_object_or_404(Task, pk=self.kwargs["task_pk"])
-        if not ProjectMembership.objects.filter(project=task.project, user=self.request.user).exists():
-            raise PermissionDenied("You are not a member of this project.")
-        serializer.save(task=task, created_by=self.request.user)
+        task = self.task
+        comment = serializer.save(task=task, author=self.request.user)
+        broadcast(task.project_id, "comment.created", comment.pk, serializer.data)
+        publish("comment_added", actor=self.request.user, project=task.project_id, task=task,
+                excerpt=comment.content[:100])
 
 
 class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -85,50 +343,46 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     PATCH  /api/comments/{id}/
     DELETE /api/comments/{id}/
     """
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.filter(task__deleted_at__isnull=True).select_related("task")
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated, IsMember]
 
     def perform_update(self, serializer):
-        comment = self.get_object()
-        project = comment.task.project
+        comment = serializer.instance
 
         # Allow if: comment author OR admin/owner
-        if comment.created_by != self.request.user and not IsAdminOrOwner().has_object_permission(self.request, self, project):
+        if comment.author_id != self.request.user.pk and not IsAdminOrOwner().has_object_permission(self.request, self, comment):
             raise PermissionDenied("You cannot update this comment.")
 
         serializer.save()
+        broadcast(comment.task.project_id, "comment.updated", comment.pk, serializer.data)
 
     def perform_destroy(self, instance):
-        project = instance.task.project
-
         # Allow if: comment author OR admin/owner
-        if instance.created_by != self.request.user and not IsAdminOrOwner().has_object_permission(self.request, self, project):
+        if instance.author_id != self.request.user.pk and not IsAdminOrOwner().has_object_permission(self.request, self, instance):
             raise PermissionDenied("You cannot delete this comment.")
 
+        pk = instance.pk
         instance.delete()
+        broadcast(instance.task.project_id, "comment.deleted", pk)
 
 
-class SubtaskListCreateView(generics.ListCreateAPIView):
+class SubtaskListCreateView(TaskChildListMixin, generics.ListCreateAPIView):
     """
     GET  /api/tasks/<task_pk>/subtasks/
     POST /api/tasks/<task_pk>/subtasks/
     """
     serializer_class = SubtaskSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    ordering_fields = ["created_at", "title", "status"]
 
     def get_queryset(self):
-        task = get_object_or_404(Task, pk=self.kwargs["task_pk"])
-        return task.subtasks.all()
+        return self.task.subtasks.all()
 
     def perform_create(self, serializer):
-        task = get_object_or_404(Task, pk=self.kwargs["task_pk"])
-        # ensure requester is a project member
-        if not ProjectMembership.objects.filter(
-            project=task.project, user=self.request.user
-        ).exists():
-            raise PermissionDenied("You are not a member of this project.")
-        serializer.save(task=task)
+        task = self.task
+        subtask = serializer.save(task=task)
+        broadcast(task.project_id, "subtask.created", subtask.pk, serializer.data)
 
 
 class SubtaskDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -137,65 +391,199 @@ class SubtaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     PATCH  /api/subtasks/<pk>/
     DELETE /api/subtasks/<pk>/
     """
-    queryset = Subtask.objects.all()
+    queryset = Subtask.objects.filter(task__deleted_at__isnull=True).select_related("task")
     serializer_class = SubtaskSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectMember]
 
     def _can_modify(self, subtask):
-        project = subtask.task.project
         return (
-            IsProjectOwner().has_object_permission(self.request, self, project)
-            or subtask.task.created_by == self.request.user
+            IsProjectOwner().has_object_permission(self.request, self, subtask)
+            or subtask.task.created_by_id == self.request.user.pk
         )
 
     def perform_update(self, serializer):
-        subtask = self.get_object()
+        subtask = serializer.instance
         if not self._can_modify(subtask):
             raise PermissionDenied("Only project owner or task creator can update.")
-        serializer.save()
+        old_status = subtask.status
+        subtask = serializer.save()
+        broadcast(subtask.task.project_id, "subtask.updated", subtask.pk, serializer.data)
+        if subtask.status != old_status:
+            publish("subtask_status", actor=self.request.user, project=subtask.task.project_id,
+                    task=subtask.task, subtask_title=subtask.title, status=subtask.status)
 
     def perform_destroy(self, instance):
         if not self._can_modify(instance):
             raise PermissionDenied("Only project owner or task creator can delete.")
+        pk = instance.pk
         instance.delete()
+        broadcast(instance.task.project_id, "subtask.deleted", pk)
 
 
-class AttachmentListCreateView(generics.ListCreateAPIView):
+class AttachmentListCreateView(TaskChildListMixin, generics.ListCreateAPIView):
     """
     GET  /api/tasks/<task_pk>/attachments/
     POST /api/tasks/<task_pk>/attachments/
     """
     serializer_class = AttachmentSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+    ordering = ["-uploaded_at"]
+    ordering_fields = ["uploaded_at"]
 
     def get_queryset(self):
-        task = get_object_or_404(Task, pk=self.kwargs["task_pk"])
-        return task.attachments.all()
+        return self.task.attachments.all()
 
     def perform_create(self, serializer):
-        task = get_object_or_404(Task, pk=self.kwargs["task_pk"])
-        # ensure uploader is a project member
-        if not ProjectMembership.objects.filter(
-            project=task.project, user=self.request.user
-        ).exists():
-            raise PermissionDenied("You are not a member of this project.")
-        serializer.save(task=task, uploaded_by=self.request.user)
+        task = self.task
+        serializer.save(task=task, uploaded_by=self.request.user, filename=serializer.validated_data["file"].name)
 
 
 class AttachmentDetailView(generics.DestroyAPIView):
     """
     DELETE /api/attachments/<pk>/
     """
-    queryset = Attachment.objects.all()
+    queryset = Attachment.objects.filter(task__deleted_at__isnull=True).select_related("task")
     serializer_class = AttachmentSerializer
     permission_classes = [permissions.IsAuthenticated, IsProjectMember]
 
     def perform_destroy(self, instance):
-        project = instance.task.project
         user = self.request.user
 
         # ✅ Inline check: only project owner or the uploader can delete
-        if project.owner != user and instance.uploaded_by != user:
+        if get_request_role(self.request, instance) != "owner" and instance.uploaded_by_id != user.pk:
             raise PermissionDenied("Only project owner or uploader can delete this file.")
 
-        instance.delete()
\ No newline at end of file
+        name = instance.file.name
+        instance.delete()
+        # drop the file too unless another attachment has the same content
+        transaction.on_commit(lambda: storage.collect([name]))
+
+
+class AttachmentDownloadView(generics.GenericAPIView):
+    """
+    GET /api/attachments/{pk}/download/
+
+    The file, for project members only. Supports Range, If-Range and
+    If-None-Match; tasks/downloads.py can hand the transfer to nginx or
+    Apache.
+    """
+    queryset = Attachment.objects.filter(task__deleted_at__isnull=True).select_related("task")
+    permission_classes = [permissions.IsAuthenticated, IsProjectMember]
+
+    def perform_content_negotiation(self, request, force=False):
+        # the body is the file itself, whatever the client says it accepts
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, pk):
+        return downloads.serve(request, self.get_object())
+
+
+class AttachmentThumbnailView(AttachmentDownloadView):
+    """
+    GET /api/attachments/{pk}/thumbnails/{size}/
+
+    A WebP thumbnail of an image attachment (sizes in settings.THUMBNAILS),
+    for project members. 404 until the worker has rendered it.
+    """
+
+    def get(self, request, pk, size):
+        attachment = self.get_object()
+        name = (thumbnails.attachment_thumbnails(attachment) or {}).get(size)
+        if name is None or size not in attachment.thumbnail_sizes:
+            raise Http404("No such thumbnail.")
+        digest = attachment.file.storage.digest(attachment.file.name)
+        stem = os.path.splitext(attachment.filename)[0]
+        return downloads.serve_file(
+            request, default_storage, name, filename=f"{stem}-{size}.webp", etag=f'"{digest}-{size}"',
+            modified=attachment.uploaded_at, as_attachment=False,
+        )
+
+
+class UploadSessionCreateView(generics.CreateAPIView):
+    """
+    POST /api/tasks/{task_pk}/uploads/
+    body: { "filename": "report.pdf", "size": 1048576, "sha256": "<hex digest>" }
+
+    Starts a resumable upload; see tasks/uploads.py for the protocol.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        task = get_object_or_404(Task, pk=self.kwargs["task_pk"])
+        if get_request_role(self.request, task) is None:
+            raise PermissionDenied("You are not a member of this project.")
+        serializer.save(task=task, uploaded_by=self.request.user)
+
+
+class UploadSessionDetailView(generics.RetrieveDestroyAPIView):
+    """
+    GET    /api/uploads/{id}/
+    PUT    /api/uploads/{id}/    raw bytes; Content-Range: bytes <first>-<last>/<size>
+    DELETE /api/uploads/{id}/
+
+    Only the uploader sees their sessions. A PUT that does not start at the
+    current offset gets 409 with the offset to resume from. After finalizing,
+    GET shows the assembly status and then the attachment.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(
+            uploaded_by=self.request.user, created_at__gte=uploads.expired_before(), task__deleted_at__isnull=True
+        ).select_related("attachment__uploaded_by")
+
+    def put(self, request, pk):
+        session = self.get_object()
+        first, length = uploads.parse_content_range(request.headers.get("Content-Range"), session.size)
+        # read the raw body, never request.data: nothing gets buffered or parsed
+        uploads.write_chunk(session, first, length, request.stream)
+        return Response(self.get_serializer(session).data)
+
+    def perform_destroy(self, instance):
+        uploads.discard(instance)
+
+
+class UploadFinalizeView(generics.GenericAPIView):
+    """
+    POST /api/uploads/{id}/finalize/
+
+    Queues the upload for assembly once every byte is in: 202, then poll
+    the session until its status is "done" and it shows the attachment.
+    """
+    serializer_class = UploadSessionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(
+            uploaded_by=self.request.user, created_at__gte=uploads.expired_before(), task__deleted_at__isnull=True
+        ).select_related("task")
+
+    def post(self, request, pk):
+        session = self.get_object()
+        if get_request_role(request, session.task) is None:
+            raise PermissionDenied("You are not a member of this project.")
+        session = uploads.finalize(session)
+        code = status.HTTP_200_OK if session.status in ("done", "failed") else status.HTTP_202_ACCEPTED
+        location = reverse("upload-detail", kwargs={"pk": session.pk}, request=request)
+        return Response(self.get_serializer(session).data, status=code, headers={"Location": location})
+
+
+def deletion_accepted(request, job):
+    """202 answer to a DELETE that queued `job`, pointing at its progress."""
+    data = DeletionJobSerializer(job, context={"request": request}).data
+    return Response(data, status=status.HTTP_202_ACCEPTED, headers={"Location": data["url"]})
+
+
+class DeletionJobDetailView(generics.RetrieveAPIView):
+    """
+    GET /api/deletions/{id}/
+
+    Progress of a project or task deletion, for whoever asked for it.
+    """
+    serializer_class = DeletionJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return DeletionJob.objects.filter(requested_by=self.request.user)
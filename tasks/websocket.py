@@ -0,0 +1,74 @@
+"""
+ASGI WebSocket endpoint for live project updates.
+
+    ws://host/ws/projects/<project_id>/?token=<JWT access token>
+
+Browsers cannot set headers on a WebSocket handshake, so the access token
+travels in the query string. Membership is checked once, when the socket
+connects; afterwards the socket only receives the project's messages from
+tasks/realtime.py. Close codes: 4401 bad token, 4403 not a member,
+4404 unknown path.
+"""
+import asyncio
+import re
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+from projects.roles import RoleResolver
+from .realtime import get_hub
+
+PATH = re.compile(r"^/ws/projects/(?P<project_id>\d+)/?$")
+
+
+@sync_to_async
+def _authorize(token, project_id):
+    """The user, or an error close code."""
+    auth = JWTAuthentication()
+    try:
+        user = auth.get_user(auth.get_validated_token(token))
+    except (InvalidToken, AuthenticationFailed, TokenError):
+        return None, 4401
+    if RoleResolver(user).get_role(project_id) is None:
+        return None, 4403
+    return user, None
+
+
+async def project_updates(scope, receive, send):
+    match = PATH.match(scope["path"])
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    if match is None:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+
+    project_id = int(match["project_id"])
+    token = parse_qs(scope.get("query_string", b"").decode()).get("token", [""])[0]
+    _, error = await _authorize(token, project_id)
+    if error:
+        await send({"type": "websocket.close", "code": error})
+        return
+
+    hub = get_hub()
+    subscription = hub.subscribe(project_id)
+    await send({"type": "websocket.accept"})
+
+    async def pump():
+        while True:
+            await send({"type": "websocket.send", "text": await subscription.get()})
+
+    async def wait_for_disconnect():
+        # clients have nothing to say; anything they send is ignored
+        while (await receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        hub.unsubscribe(subscription)
+        for task in tasks:
+            task.cancel()